@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { Card, CardBody, CardTitle, Container, Row, Col, Spinner } from "reactstrap";
+import { getDashboard } from "utils/dashboard";
 
 const Header = () => {
   const [user, setUser] = useState(null);
@@ -15,36 +16,16 @@ const Header = () => {
   useEffect(() => {
     const fetchUserAndCounts = async () => {
       try {
-        const headers = {
-          "Content-Type": "application/json",
-          Authorization: `Bearer ${token}`,
+        // Profile and counters (scoped by role on the server) in one request
+        const data = await getDashboard();
+        setUser(data.user);
+
+        const updatedCounts = {
+          users: data.counts.users || 0,
+          forms: data.counts.forms || 0,
+          submissions: data.counts.submissions || 0,
         };
 
-        // Fetch current user
-        const userRes = await fetch("http://127.0.0.1:8000/onboarding/me/", { headers });
-        const userData = await userRes.json();
-        setUser(userData);
-
-        // Fetch counts for everyone (we need submissions at least)
-        const submissionsRes = await fetch("http://127.0.0.1:8000/onboarding/count-submissions/", { headers });
-        const submissionsData = await submissionsRes.json();
-
-        const updatedCounts = { submissions: submissionsData.count || 0 };
-
-        // If admin+staff, fetch other counts
-        if (userData.is_superuser && userData.is_staff) {
-          const [usersRes, formsRes] = await Promise.all([
-            fetch("http://127.0.0.1:8000/onboarding/count-users/", { headers }),
-            fetch("http://127.0.0.1:8000/onboarding/count-forms/", { headers }),
-          ]);
-
-          const usersData = await usersRes.json();
-          const formsData = await formsRes.json();
-
-          updatedCounts.users = usersData.count || 0;
-          updatedCounts.forms = formsData.count || 0;
-        }
-
         setCounts(updatedCounts);
       } catch (error) {
         console.error("Error fetching header data:", error);
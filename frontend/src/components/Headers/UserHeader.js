@@ -1,20 +1,14 @@
 import React, { useEffect, useState } from "react";
 import { Button, Container, Row, Col } from "reactstrap";
+import { getCurrentUser } from "utils/dashboard";
 
 const UserHeader = () => {
   const [user, setUser] = useState(null);
 
   useEffect(() => {
     const fetchUser = async () => {
-      const token = localStorage.getItem("access");
       try {
-        const res = await fetch("http://127.0.0.1:8000/onboarding/me/", {
-          headers: { 
-            "Content-Type": "application/json", 
-            Authorization: `Bearer ${token}` 
-          },
-        });
-        const data = await res.json();
+        const data = await getCurrentUser();
         setUser(data);
       } catch (error) {
         console.error("Error fetching user data:", error);
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
+import { getCurrentUser } from "utils/dashboard";
 // reactstrap components
 import {
   DropdownMenu,
@@ -23,15 +24,8 @@ const AdminNavbar = (props) => {
 
   useEffect(() => {
     const fetchUser = async () => {
-      const token = localStorage.getItem("access");
       try {
-        const res = await fetch("http://127.0.0.1:8000/onboarding/me/", {
-          headers: {
-            "Content-Type": "application/json",
-            Authorization: `Bearer ${token}`,
-          },
-        });
-        const data = await res.json();
+        const data = await getCurrentUser();
         setUser(data);
       } catch (error) {
         console.error("Error fetching user data:", error);
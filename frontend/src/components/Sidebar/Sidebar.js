@@ -1,6 +1,7 @@
 import { useState, useEffect } from "react";
 import { NavLink as NavLinkRRD, Link } from "react-router-dom";
 import { PropTypes } from "prop-types";
+import { getCurrentUser } from "utils/dashboard";
 import {
   Button, Collapse, NavItem, NavLink, Nav, Container, Row, Col,
   Form, InputGroup, Input, InputGroupAddon, InputGroupText, Navbar, NavbarBrand,
@@ -41,11 +42,7 @@ const Sidebar = (props) => {
   useEffect(() => {
     const fetchUser = async () => {
       try {
-        const token = localStorage.getItem("access");
-        const res = await fetch("http://127.0.0.1:8000/onboarding/me/", {
-          headers: { "Content-Type": "application/json", Authorization: `Bearer ${token}` }
-        });
-        const data = await res.json();
+        const data = await getCurrentUser();
         setUser(data);
 
         // Filter routes
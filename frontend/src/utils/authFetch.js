@@ -23,3 +23,20 @@ export async function authFetch(url, options = {}) {
 
   return response;
 }
+
+// Follows the `next` links of a cursor-paginated endpoint and returns all results
+export async function fetchAllPages(url, options = {}) {
+  const results = [];
+  let next = url;
+  while (next) {
+    const response = await authFetch(next, options);
+    if (!response) return results;
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    const page = await response.json();
+    results.push(...page.results);
+    next = page.next;
+  }
+  return results;
+}
@@ -0,0 +1,28 @@
+// src/utils/dashboard.js
+// One /dashboard/ request per page view, shared by every component that needs
+// the current user or the header counters.
+let cached = null;
+
+export function getDashboard() {
+  const token = localStorage.getItem("access");
+  if (!cached || cached.token !== token) {
+    const promise = fetch("http://127.0.0.1:8000/onboarding/dashboard/", {
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${token}`,
+      },
+    }).then((res) => {
+      if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
+      return res.json();
+    });
+    cached = { token, promise };
+    // let the next page view fetch fresh counters
+    promise.finally(() => setTimeout(() => { if (cached?.promise === promise) cached = null; }, 1000));
+  }
+  return cached.promise;
+}
+
+export async function getCurrentUser() {
+  const data = await getDashboard();
+  return data.user;
+}
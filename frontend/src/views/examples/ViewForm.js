@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { authFetch } from "utils/authFetch";
+import { authFetch, fetchAllPages } from "utils/authFetch";
 import {
   Card,
   CardHeader,
@@ -58,14 +58,13 @@ const ViewForms = () => {
         const formsData = await formsRes.json();
 
         // ✅ 3. Fetch submissions
-        const subsRes = await authFetch("http://127.0.0.1:8000/onboarding/submissions/", {
+        const subsData = await fetchAllPages("http://127.0.0.1:8000/onboarding/submissions/?limit=500", {
           method: "GET",
           headers: {
             "Content-Type": "application/json",
             Authorization: `Bearer ${token}`,
           },
         });
-        const subsData = await subsRes.json();
 
         setForms(formsData);
         setSubmissions(subsData);
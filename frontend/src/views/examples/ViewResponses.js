@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from "react";
 import { useParams } from "react-router-dom";
-import { authFetch } from "utils/authFetch";
+import { fetchAllPages } from "utils/authFetch";
 import {
   Card,
   CardHeader,
@@ -36,8 +36,9 @@ const ViewResponses = () => {
 
     const fetchResponses = async () => {
       try {
-        const response = await authFetch(
-          "http://127.0.0.1:8000/onboarding/submissions/",
+        // ✅ Only responses for this form, page by page
+        const filtered = await fetchAllPages(
+          `http://127.0.0.1:8000/onboarding/submissions/?form=${id}&limit=500`,
           {
             method: "GET",
             headers: {
@@ -46,15 +47,6 @@ const ViewResponses = () => {
             },
           }
         );
-
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const data = await response.json();
-
-        // ✅ Filter only responses for this form
-        const filtered = data.filter((res) => res.form === parseInt(id));
         setResponses(filtered);
         setFilteredResponses(filtered);
       } catch (error) {
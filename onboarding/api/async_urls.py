@@ -0,0 +1,15 @@
+from django.urls import path
+from . import async_views
+
+
+# Async views for the read-heavy endpoints, on the same paths and names as
+# their sync versions in api.urls. Only mounted under ASGI (onboarding.asgi_urls).
+urlpatterns = [
+    path('user-forms/', async_views.user_forms, name='user-forms'),
+    path('submissions/', async_views.submissions_api, name='submissions'),
+    path('count-users/', async_views.count_users, name='count-users'),
+    path('count-forms/', async_views.count_forms, name='count-forms'),
+    path('count-submissions/', async_views.count_submissions, name='count-submissions'),
+    path('forms/available/', async_views.available_forms, name='available-forms'),
+    path('me/', async_views.mydataapi, name='me_api'),
+]
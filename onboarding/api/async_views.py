@@ -0,0 +1,139 @@
+"""
+Async versions of the read-heavy endpoints, used when the project is served
+over ASGI (onboarding/asgi.py routes through settings.ASGI_URLCONF, which puts
+these in front of the sync views on the same paths).
+
+DRF views are sync only, so these are plain Django async views that keep the
+same contract: JWT authentication, IsAuthenticated, DRF error bodies and the
+same serializers for the response, with every query made through the async
+ORM so a request never ties up a thread while it waits on the database.
+
+Django still runs the stock middleware's hooks in a thread under ASGI (about
+fifteen handoffs per request), so this pays off when requests spend their
+time waiting on a remote database; against a local SQLite file the WSGI
+deployment serves more requests per second. Measure with `manage.py loadtest`.
+"""
+import functools
+
+from django.http import HttpResponse, HttpResponseBase
+from rest_framework.exceptions import APIException, MethodNotAllowed, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from . import counters, response_cache
+from .authentication import CachedJWTAuthentication
+from .conditional import add_validators, alist_validators, not_modified
+from .models import Counter, Form
+from .pagination import keyset_page, split_page
+from .serializers import FormSerializer, SimpleFormSerializer
+from .views import _profile_data, filtered_submissions, submissions_page, user_forms_queryset
+
+_authenticator = CachedJWTAuthentication()
+_renderer = JSONRenderer()
+
+
+def _render(data, status=200):
+    return HttpResponse(_renderer.render(data), status=status, content_type="application/json")
+
+
+def _error(request, exc):
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    response = _render(detail, status=exc.status_code)
+    if exc.status_code == 401:
+        response["WWW-Authenticate"] = _authenticator.authenticate_header(request)
+    return response
+
+
+def async_api_view(view):
+    """
+    Wrap an async GET view that returns response data (or a finished
+    response): authenticates the request (IsAuthenticated), hands the view a
+    DRF Request so query_params and the shared helpers work, and renders the
+    result as JSON.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            if request.method not in ("GET", "HEAD"):
+                raise MethodNotAllowed(request.method)
+            result = await _authenticator.aauthenticate(request)
+            if result is None:
+                raise NotAuthenticated()
+            request = Request(request, authenticators=())
+            request.user, request.auth = result
+            result = await view(request, *args, **kwargs)
+            return result if isinstance(result, HttpResponseBase) else _render(result)
+        except APIException as exc:
+            return _error(request, exc)
+    return wrapper
+
+
+@async_api_view
+async def mydataapi(request):
+    return _profile_data(request.user)
+
+
+@async_api_view
+async def count_users(request):
+    return {"count": await counters.aget_count("users")}
+
+
+@async_api_view
+async def count_forms(request):
+    return {"count": await counters.aget_count("forms")}
+
+
+@async_api_view
+async def count_submissions(request):
+    user = request.user
+    if user.is_superuser and user.is_staff:
+        count = await counters.aget_count("submissions")
+    else:
+        count = await counters.aget_count("submissions", Counter.SCOPE_SUBMITTER, user.pk)
+    return {"count": count}
+
+
+@async_api_view
+async def available_forms(request):
+    forms = Form.objects.filter(is_active=True)
+
+    async def validators():
+        return await alist_validators(forms, await response_cache.ageneration())
+
+    async def build():
+        return SimpleFormSerializer([form async for form in forms], many=True).data
+
+    etag, last_modified = await response_cache.acached("available_forms.validators", "all", validators)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    return add_validators(_render(await response_cache.acached("available_forms", "all", build)), etag, last_modified)
+
+
+@async_api_view
+async def user_forms(request):
+    forms = user_forms_queryset(request.user)
+    scope = response_cache.user_scope(request.user)
+
+    async def validators():
+        return await alist_validators(forms, await response_cache.ageneration(), scope)
+
+    async def build():
+        return FormSerializer([form async for form in forms], many=True).data
+
+    etag, last_modified = await response_cache.acached("user_forms.validators", scope, validators)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    return add_validators(_render(await response_cache.acached("user_forms", scope, build)), etag, last_modified)
+
+
+@async_api_view
+async def submissions_api(request):
+    page, page_size = keyset_page(filtered_submissions(request), request)
+    etag, last_modified = await alist_validators(page, response_cache.user_scope(request.user))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    rows, next_cursor = split_page([row async for row in page.prefetch_related("attachments")], page_size)
+    return add_validators(_render(submissions_page(request, rows, next_cursor)), etag, last_modified)
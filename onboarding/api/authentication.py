@@ -0,0 +1,91 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# profile fields copied into every token, so clients can read the user's role
+# and details without asking the API
+USER_CLAIMS = ("username", "email", "first_name", "last_name", "is_staff", "is_superuser")
+
+_users = OrderedDict()  # user id -> (expires_at, user)
+_lock = threading.Lock()
+
+
+class UserRefreshToken(RefreshToken):
+    """Refresh token whose claims (and those of its access tokens) describe the user"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+def invalidate_user(user_id):
+    """Forget a cached user; called from signals whenever a User is saved or deleted"""
+    with _lock:
+        _users.pop(str(user_id), None)
+
+
+def clear_user_cache():
+    with _lock:
+        _users.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps authenticated users in a small in-process
+    cache for AUTH_USER_CACHE_SECONDS, so repeat requests skip the user query.
+    Changes to a user drop its entry in this process immediately; other
+    worker processes pick them up when their entry expires. Callers get a
+    copy, so nothing one request sets on its user leaks into another.
+    """
+
+    def get_user(self, validated_token):
+        # simplejwt may store the id claim as a string
+        user_id = str(validated_token.get(api_settings.USER_ID_CLAIM))
+        user = self._cached(user_id)
+        if user is None:
+            user = self._remember(user_id, super().get_user(validated_token))
+        return copy.copy(user)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views; only a cache miss leaves the event loop"""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        user_id = str(validated_token.get(api_settings.USER_ID_CLAIM))
+        user = self._cached(user_id)
+        if user is None:
+            user = self._remember(user_id, await sync_to_async(super().get_user)(validated_token))
+        return copy.copy(user), validated_token
+
+    def _cached(self, user_id):
+        now = time.monotonic()
+        with _lock:
+            entry = _users.get(user_id)
+            if entry and entry[0] > now:
+                _users.move_to_end(user_id)
+                return entry[1]
+        return None
+
+    def _remember(self, user_id, user):
+        ttl = getattr(settings, "AUTH_USER_CACHE_SECONDS", 60)
+        with _lock:
+            _users[user_id] = (time.monotonic() + ttl, user)
+            _users.move_to_end(user_id)
+            while len(_users) > getattr(settings, "AUTH_USER_CACHE_SIZE", 10_000):
+                _users.popitem(last=False)
+        return user
@@ -0,0 +1,49 @@
+"""
+Benchmarks run with `python manage.py benchmark [name ...]`.
+
+Each benchmark is a function registered with @benchmark(name) that runs
+against a throwaway test database and returns a JSON-serializable dict.
+"""
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+class QueryCounter:
+    """connection.execute_wrapper that only counts statements, without the debug cursor overhead"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def measure(result):
+    """Record wall time (ms) and query count of the block into `result`"""
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        start = time.perf_counter()
+        yield result
+        result["ms"] = round((time.perf_counter() - start) * 1000, 2)
+    result["queries"] = counter.count
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
@@ -0,0 +1,230 @@
+import random
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import synthetic
+from api.authentication import UserRefreshToken
+from api.models import Form, UploadSession
+from api.urls import urlpatterns
+
+from . import benchmark, measure, rolled_back
+
+CHUNK = b"x" * (256 * 1024)
+
+
+# URL name -> [(method, who, prepare, write)]. prepare(ctx) builds the request
+# (path plus client kwargs) and is not timed; `write` routes run every
+# iteration in a rolled-back transaction so they see the same data each time.
+# Signup and login hash a password and get `slow_iterations` instead.
+
+def _get(name, *args):
+    return lambda ctx: {"path": reverse(name, args=[a(ctx) if callable(a) else a for a in args])}
+
+
+def _post(name, build, *args, format="json"):
+    return lambda ctx: {
+        "path": reverse(name, args=[a(ctx) for a in args]), "data": build(ctx), "format": format,
+    }
+
+
+def _session(ctx, received=0):
+    session = UploadSession.objects.create(
+        user=ctx.client_user, filename="id.pdf", content_type="application/pdf",
+        size=len(CHUNK), received=received, chunks=1 if received else 0,
+    )
+    if received:
+        with open(session.temp_path, "wb") as part:
+            part.write(CHUNK)
+    return session
+
+
+def _chunk(ctx):
+    session = _session(ctx)
+    return {
+        "path": reverse("upload-chunk", args=[session.pk, 0]), "data": CHUNK,
+        "content_type": "application/octet-stream", "headers": {"Upload-Offset": "0"},
+    }
+
+
+def _unique(ctx, prefix):
+    ctx.sequence += 1
+    return f"{prefix}{ctx.sequence}"
+
+
+def _form(ctx):
+    return ctx.form_id
+
+
+ROUTES = {
+    "signup": [("POST", None, _post("signup", lambda ctx: {
+        "username": (name := _unique(ctx, "bench-signup-")), "email": f"{name}@example.com",
+        "first_name": "Bench", "last_name": "Signup",
+        "password": "Password123", "confirm_password": "Password123",
+    }), True)],
+    "login": [("POST", None, _post("login", lambda ctx: {
+        "email": ctx.client_user.email, "password": ctx.password,
+    }), False)],
+    "forms-list-create": [("POST", "admin", _post("forms-list-create", lambda ctx: synthetic.form_definition(
+        ctx.rng, _unique(ctx, ""), "bench-create", ctx.sections, ctx.fields_per_section,
+    )), True)],
+    "user-forms": [("GET", "client", _get("user-forms"), False)],
+    "form-detail": [
+        ("GET", "client", _get("form-detail", _form), False),
+        ("PUT", "admin", _post("form-detail", lambda ctx: {"description": _unique(ctx, "Updated ")}, _form), True),
+        ("DELETE", "admin", _get("form-detail", _form), True),
+    ],
+    "form-submit": [("POST", "client", _post(
+        "form-submit", lambda ctx: synthetic.answers(ctx.rng, ctx.form_specs), _form, format="multipart",
+    ), True)],
+    "form-submissions-export": [("GET", "admin", _get("form-submissions-export", _form), False)],
+    "uploads": [("POST", "client", _post("uploads", lambda ctx: {
+        "filename": "id.pdf", "content_type": "application/pdf", "size": len(CHUNK),
+    }), True)],
+    "upload-status": [("GET", "client", lambda ctx: {"path": reverse("upload-status", args=[_session(ctx).pk])}, True)],
+    "upload-chunk": [("PUT", "client", _chunk, True)],
+    "upload-finalize": [("POST", "client", lambda ctx: {
+        "path": reverse("upload-finalize", args=[_session(ctx, received=len(CHUNK)).pk]),
+    }, True)],
+    "submissions": [("GET", "admin", _get("submissions"), False)],
+    "submissions-search": [("GET", "admin", lambda ctx: {
+        "path": reverse("submissions-search"), "data": {"q": ctx.rng.choice(synthetic.WORDS)},
+    }, False)],
+    "count-users": [("GET", "client", _get("count-users"), False)],
+    "count-forms": [("GET", "client", _get("count-forms"), False)],
+    "count-submissions": [("GET", "client", _get("count-submissions"), False)],
+    "roles-list": [("POST", "admin", _post("roles-list", lambda ctx: {
+        "userid": ctx.rng.choice(ctx.client_ids), "role": "client",
+    }), True)],
+    "users-list": [("GET", "admin", _get("users-list"), False)],
+    "users-bulk-import": [("POST", "admin", _post("users-bulk-import", lambda ctx: [
+        {"username": (name := _unique(ctx, "bench-import-")), "email": f"{name}@example.com", "role": "client"}
+        for _ in range(100)
+    ]), True)],
+    "available-forms": [("GET", "client", _get("available-forms"), False)],
+    "assign-form": [("POST", "admin", _post("assign-form", lambda ctx: {
+        "form": ctx.rng.choice(ctx.form_ids), "group": "staff",
+    }), True)],
+    "assign-forms-bulk": [("POST", "admin", _post("assign-forms-bulk", lambda ctx: {
+        "forms": ctx.rng.sample(ctx.form_ids, min(20, len(ctx.form_ids))), "groups": ["staff"],
+    }), True)],
+    "forms-bulk-import": [("POST", "admin", _post("forms-bulk-import", lambda ctx: [
+        synthetic.form_definition(ctx.rng, _unique(ctx, ""), "bench-import", ctx.sections, ctx.fields_per_section)
+        for _ in range(10)
+    ]), True)],
+    "me_api": [("GET", "client", _get("me_api"), False)],
+    "dashboard": [("GET", "client", _get("dashboard"), False)],
+    "response-cache-stats": [("GET", "admin", _get("response-cache-stats"), False)],
+    "delete-user": [("DELETE", "admin", _get("delete-user", lambda ctx: ctx.rng.choice(ctx.client_ids)), True)],
+}
+
+SLOW = {"signup", "login"}
+
+
+def _send(client, method, request):
+    request = dict(request)
+    path = request.pop("path")
+    response = getattr(client, method.lower())(path, **request)
+    if response.streaming:
+        b"".join(response.streaming_content)
+    return response
+
+
+def _summary(first, timings, queries, statuses):
+    ordered = sorted(timings)
+    return {
+        "status": sorted(set(statuses)),
+        "first_ms": first["ms"],
+        "first_queries": first["queries"],
+        "p50_ms": ordered[int(len(ordered) * 0.50)],
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "queries": max(queries),
+    }
+
+
+@benchmark("endpoints")
+def endpoints(forms=200, users=2_000, submissions=50_000, iterations=30, slow_iterations=3,
+              sections=3, fields_per_section=8, seed=0):
+    """
+    Latency (p50/p95) and query count of every route in api/urls.py, through
+    the test client with real JWTs, over synthetic data (api.synthetic).
+    `first_*` is the first request, before any cache is warm. Requests that
+    write run in a rolled-back transaction each time; fails if a route in
+    api/urls.py has no entry in ROUTES.
+    """
+    missing = {p.name for p in urlpatterns} - set(ROUTES)
+    if missing:
+        raise RuntimeError(f"No benchmark request for route(s): {', '.join(sorted(missing))}")
+
+    media_root = tempfile.mkdtemp()
+    overrides = override_settings(MEDIA_ROOT=media_root, FILE_UPLOAD_TEMP_DIR=media_root)
+    overrides.enable()
+    try:
+        start = time.perf_counter()
+        data = synthetic.generate(
+            forms=forms, users=users, submissions=submissions, sections=sections,
+            fields_per_section=fields_per_section, prefix="bench", seed=seed,
+        )
+        seed_seconds = time.perf_counter() - start
+
+        ctx = _context(seed, sections, fields_per_section)
+        client = APIClient()
+        tokens = {
+            who: f"Bearer {UserRefreshToken.for_user(user).access_token}"
+            for who, user in (("admin", ctx.admin), ("client", ctx.client_user))
+        }
+
+        results = {}
+        for name, requests in ROUTES.items():
+            for method, who, prepare, write in requests:
+                client.credentials(**({"HTTP_AUTHORIZATION": tokens[who]} if who else {}))
+                first, timings, queries, statuses = None, [], [], []
+                for _ in range(slow_iterations if name in SLOW else iterations):
+                    sample = {}
+                    if write:
+                        with rolled_back():
+                            request = prepare(ctx)
+                            with measure(sample):
+                                response = _send(client, method, request)
+                    else:
+                        request = prepare(ctx)
+                        with measure(sample):
+                            response = _send(client, method, request)
+                    first = first or sample
+                    timings.append(sample["ms"])
+                    queries.append(sample["queries"])
+                    statuses.append(response.status_code)
+                results[f"{name} {method}"] = _summary(first, timings, queries, statuses)
+    finally:
+        overrides.disable()
+        shutil.rmtree(media_root, ignore_errors=True)
+
+    return {"data": data, "seed_s": round(seed_seconds, 1), "iterations": iterations, "routes": results}
+
+
+def _context(seed, sections, fields_per_section):
+    ctx = SimpleNamespace(
+        rng=random.Random(seed), sequence=0, sections=sections,
+        fields_per_section=fields_per_section, password="Password123",
+    )
+    ctx.admin = User.objects.get(username="bench-admin")
+    ctx.client_ids = list(
+        User.objects.filter(username__startswith="bench-user-", is_staff=False).values_list("id", flat=True)
+    )
+    # the client whose lists the GETs read; deletes pick from the others
+    ctx.client_user = User.objects.get(pk=ctx.client_ids.pop(0))
+    ctx.form_ids = list(Form.objects.filter(slug__startswith="bench-form-").values_list("id", flat=True))
+    # a form the client can see, for detail, submit and export
+    form = Form.objects.assigned_to(ctx.client_user).filter(slug__startswith="bench-form-").first()
+    ctx.form_id = form.pk
+    ctx.form_specs = synthetic.field_specs({"fields": [
+        {"name": f.name, "field_type": f.field_type, "options": [{"value": o.value} for o in f.options.all()]}
+        for f in form.fields.prefetch_related("options")
+    ]})
+    return ctx
@@ -0,0 +1,67 @@
+import resource
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Form, FormField, Submission
+from api.views import export_submissions
+
+from . import benchmark
+
+
+def _consume(request, form):
+    response = export_submissions(request, id=form.pk)
+    start = time.perf_counter()
+    first_byte_ms = None
+    size = 0
+    for chunk in response.streaming_content:
+        if first_byte_ms is None:
+            first_byte_ms = round((time.perf_counter() - start) * 1000, 2)
+        size += len(chunk)
+    return first_byte_ms, round((time.perf_counter() - start) * 1000, 2), size
+
+
+@benchmark("export")
+def export(sizes=(1_000, 10_000, 50_000), fields=20):
+    """
+    Peak Python memory and max RSS while streaming CSV exports of growing size.
+    The benchmark database is in-memory SQLite, so max RSS also grows with the
+    rows inserted; peak_python_kb is the export's own footprint.
+    """
+    admin = User.objects.create_user(username="bench-admin", password="x", is_staff=True, is_superuser=True)
+    form = Form.objects.create(name="Export", slug="bench-export")
+    FormField.objects.bulk_create([
+        FormField(form=form, name=f"field_{i}", label=f"Field {i}", field_type="text", order=i)
+        for i in range(fields)
+    ])
+    factory = APIRequestFactory()
+    data = {f"field_{i}": f"value {i} " * 4 for i in range(fields)}
+
+    results = []
+    created = 0
+    for size in sizes:
+        Submission.objects.bulk_create(
+            (Submission(form=form, submitted_by=admin, data=data) for _ in range(size - created)),
+            batch_size=2000,
+        )
+        created = size
+
+        for gzip in (False, True):
+            request = factory.get("/export/", {"gzip": "1"} if gzip else {})
+            force_authenticate(request, user=admin)
+            tracemalloc.start()
+            first_byte_ms, total_ms, nbytes = _consume(request, form)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append({
+                "rows": size,
+                "gzip": gzip,
+                "first_byte_ms": first_byte_ms,
+                "total_ms": total_ms,
+                "bytes": nbytes,
+                "peak_python_kb": peak // 1024,
+                "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            })
+    return results
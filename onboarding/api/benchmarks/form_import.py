@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+
+from api.models import FieldOption, Form, FormField, FormSection
+
+from . import benchmark, measure, rolled_back
+
+
+def _definitions(forms, sections, fields, options):
+    return [
+        {
+            "name": f"Form {f}",
+            "slug": f"bench-form-{f}",
+            "sections": [
+                {
+                    "title": f"Section {s}",
+                    "order": s,
+                    "fields": [
+                        {
+                            "name": f"field_{s}_{i}",
+                            "label": f"Field {s}.{i}",
+                            "field_type": "select",
+                            "order": i,
+                            "options": [{"value": f"v{o}", "label": f"V{o}", "order": o} for o in range(options)],
+                        }
+                        for i in range(fields)
+                    ],
+                }
+                for s in range(sections)
+            ],
+        }
+        for f in range(forms)
+    ]
+
+
+def _create_row_by_row(definition, user):
+    """The previous FormSerializer.create: one INSERT per form, section, field and option"""
+    form = Form.objects.create(created_by=user, **{k: v for k, v in definition.items() if k != "sections"})
+    for section_data in definition["sections"]:
+        section = FormSection.objects.create(form=form, **{k: v for k, v in section_data.items() if k != "fields"})
+        for field_data in section_data["fields"]:
+            field = FormField.objects.create(
+                form=form, section=section, **{k: v for k, v in field_data.items() if k != "options"}
+            )
+            for opt in field_data["options"]:
+                FieldOption.objects.create(field=field, **opt)
+    return form
+
+
+@benchmark("form_import")
+def form_import(forms=10, sections=4, fields=50, options=4):
+    """Row-by-row form creation vs Form.objects.create_trees for 10 forms of 200 fields"""
+    user = User.objects.create_user(username="bench-admin", password="x", is_staff=True, is_superuser=True)
+    definitions = _definitions(forms, sections, fields, options)
+    results = {"forms": forms, "fields_per_form": sections * fields, "options_per_field": options}
+
+    with rolled_back():
+        with measure(results.setdefault("row_by_row", {})):
+            for definition in definitions:
+                _create_row_by_row(definition, user)
+
+    with rolled_back():
+        with measure(results.setdefault("bulk", {})):
+            Form.objects.create_trees(definitions, created_by=user)
+
+    results["speedup"] = round(results["row_by_row"]["ms"] / max(results["bulk"]["ms"], 0.01), 1)
+    return results
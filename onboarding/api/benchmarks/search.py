@@ -0,0 +1,77 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import search, synthetic
+from api.models import Submission
+
+from . import benchmark
+
+
+def _timings(client, params, iterations):
+    timings, response = [], None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = client.get(reverse("submissions-search"), params)
+        timings.append((time.perf_counter() - start) * 1000)
+    assert response.status_code == 200, response.data
+    ordered = sorted(timings)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2], 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "results": len(response.data["results"]),
+        "next_cursor": bool(response.data["next_cursor"]),
+    }
+
+
+@benchmark("search")
+def search_submissions(submissions=200_000, forms=100, users=5_000, iterations=20, seed=0):
+    """
+    /submissions/search/ latency over synthetic submissions: a rare term
+    (an email), a term in most documents, two terms, a client's own
+    submissions and the third page of a common term. Also the rate at
+    which index_submissions() writes documents.
+    """
+    synthetic.generate(forms=forms, users=users, submissions=submissions, prefix="search", seed=seed)
+
+    ids = list(Submission.objects.order_by("pk").values_list("pk", flat=True)[:20_000])
+    start = time.perf_counter()
+    search.index_submissions(ids)
+    index_rate = len(ids) / (time.perf_counter() - start)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {search.TABLE}")
+        documents = cursor.fetchone()[0]
+
+    rng = random.Random(seed)
+    sample = Submission.objects.select_related("submitted_by").order_by("?").first()
+    email = next(value for value in sample.data.values() if isinstance(value, str) and "@" in value)
+    client_user = sample.submitted_by
+    admin = User.objects.get(username="search-admin")
+
+    client = APIClient()
+    client.force_authenticate(admin)
+    results = {
+        "rare_email": _timings(client, {"q": email}, iterations),
+        "common_word": _timings(client, {"q": rng.choice(synthetic.WORDS)}, iterations),
+        "two_words": _timings(client, {"q": " ".join(rng.sample(synthetic.WORDS, 2))}, iterations),
+        "id_prefix": _timings(client, {"q": email.split("@")[0][:-2]}, iterations),
+    }
+    cursor = None
+    for _ in range(2):
+        page = client.get(reverse("submissions-search"), {"q": "income", **({"cursor": cursor} if cursor else {})})
+        cursor = page.data["next_cursor"]
+    results["third_page_common_word"] = _timings(client, {"q": "income", "cursor": cursor}, iterations)
+
+    client.force_authenticate(client_user)
+    results["client_own_common_word"] = _timings(client, {"q": "income"}, iterations)
+
+    return {
+        "submissions": submissions,
+        "documents": documents,
+        "index_docs_per_s": round(index_rate),
+        "queries": results,
+    }
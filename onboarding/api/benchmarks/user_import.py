@@ -0,0 +1,61 @@
+import os
+import time
+
+from django.contrib.auth.models import User
+
+from api.serializers import SignupSerializer, UserImportSerializer
+from api.user_import import hash_passwords
+
+from . import benchmark, measure, rolled_back
+
+
+def _rows(count, prefix, password=""):
+    return [
+        {"username": f"{prefix}{i}", "email": f"{prefix}{i}@example.com", "first_name": "Bench",
+         "last_name": str(i), "password": password, "role": "client"}
+        for i in range(count)
+    ]
+
+
+@benchmark("user_import")
+def user_import(users=10_000, signup_sample=10, hash_sample=16, workers=None):
+    """
+    Throughput of the /signup/ path (one user at a time) against the bulk
+    import. A full 10k run is dominated by PBKDF2, so hashing throughput is
+    measured on a sample and the bulk total is that rate plus the measured
+    validate-and-insert time for all rows with hashing taken out.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    with rolled_back():
+        start = time.perf_counter()
+        for row in _rows(signup_sample, "signup", "Password123"):
+            serializer = SignupSerializer(data={**row, "confirm_password": row["password"]})
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        signup_rate = signup_sample / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    hash_passwords(["Password123"] * hash_sample, workers=workers)
+    hash_rate = hash_sample / (time.perf_counter() - start)
+
+    insert = {}
+    with rolled_back():
+        with measure(insert):
+            serializer = UserImportSerializer(data=_rows(users, "bulk"), many=True, context={"workers": 1})
+            serializer.is_valid(raise_exception=True)
+            created = len(serializer.save())
+        assert User.objects.filter(username__startswith="bulk").count() == created == users
+
+    bulk_seconds = insert["ms"] / 1000 + users / hash_rate
+    return {
+        "cpus": os.cpu_count(),
+        "workers": workers,
+        "signup_users_per_s": round(signup_rate, 2),
+        "signup_10k_estimate_s": round(users / signup_rate),
+        "hash_per_s": round(hash_rate, 2),
+        "bulk_validate_insert": insert,
+        "bulk_users_per_s_estimate": round(users / bulk_seconds, 2),
+        "bulk_10k_estimate_s": round(bulk_seconds),
+        "bulk_without_hashing_users_per_s": round(users / (insert["ms"] / 1000)),
+    }
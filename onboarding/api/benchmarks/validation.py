@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from api.form_schema import clear_form_schema_cache
+from api.models import FieldOption, Form, FormField
+from api.validation import clear_validator_cache, get_submission_validator
+
+from . import benchmark, measure
+
+# (field_type, validation, sample value) cycled over the form's fields
+FIELD_KINDS = [
+    ("text", {"min_length": 2, "max_length": 80, "regex": r"[\w ]+"}, "Ada Lovelace"),
+    ("number", {"min": 0, "max": 1000}, "42"),
+    ("date", {"min": "1900-01-01"}, "1990-05-01"),
+    ("email", {}, "ada@example.com"),
+    ("select", {}, "b"),
+    ("checkbox", {"max": 2}, ["a", "c"]),
+]
+
+
+@benchmark("submission_validation")
+def submission_validation(fields=300, iterations=2_000):
+    """
+    Compile a validator for a 300-field form once, then time validating a
+    full valid payload against the cached validator.
+    """
+    form = Form.objects.create(name="Validation", slug="bench-validation")
+    created = FormField.objects.bulk_create([
+        FormField(
+            form=form, name=f"field_{i}", label=f"Field {i}", order=i, required=True,
+            field_type=FIELD_KINDS[i % len(FIELD_KINDS)][0],
+            validation=FIELD_KINDS[i % len(FIELD_KINDS)][1],
+        )
+        for i in range(fields)
+    ])
+    FieldOption.objects.bulk_create([
+        FieldOption(field=field, value=value, label=value.upper())
+        for field in created if field.field_type in ("select", "checkbox")
+        for value in "abcd"
+    ])
+    payload = {f"field_{i}": FIELD_KINDS[i % len(FIELD_KINDS)][2] for i in range(fields)}
+
+    clear_form_schema_cache()
+    clear_validator_cache()
+    form = Form.objects.defer("schema").get(pk=form.pk)
+    cold = {}
+    with measure(cold):
+        validator = get_submission_validator(form)
+
+    warm = {}
+    with measure(warm):
+        for _ in range(iterations):
+            get_submission_validator(form)
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        _, errors = validator.clean(payload)
+        timings.append(time.perf_counter() - start)
+    assert not errors, errors
+
+    return {
+        "fields": fields,
+        "compile": cold,
+        "warm_lookup_queries": warm["queries"],
+        "validate_us_median": round(statistics.median(timings) * 1e6, 1),
+        "validate_us_p95": round(sorted(timings)[int(len(timings) * 0.95)] * 1e6, 1),
+    }
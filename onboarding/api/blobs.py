@@ -0,0 +1,56 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Blob
+from .storage import blob_storage
+
+
+def acquire(digest, name, size):
+    """
+    Add a reference to the blob with this digest, creating its row on first
+    use, and return it. Call it inside a transaction: the row stays locked
+    until that ends, so sweep() can't take the file away before the caller
+    has made sure it is stored.
+    """
+    while True:
+        blob = Blob.objects.select_for_update().filter(digest=digest).first()
+        if blob is not None:
+            Blob.objects.filter(pk=blob.pk).update(refcount=F("refcount") + 1)
+            blob.refcount += 1
+            return blob
+        try:
+            with transaction.atomic():
+                return Blob.objects.create(digest=digest, file=name, size=size, refcount=1)
+        except IntegrityError:
+            pass  # another request created it first; take a reference on theirs
+
+
+def release(blob_id):
+    """
+    Drop a reference. The row stays at refcount 0 as a tombstone, so an
+    upload of the same bytes picks it up again; sweep() collects the rest.
+    """
+    with transaction.atomic():
+        blob = Blob.objects.select_for_update().filter(pk=blob_id, refcount__gt=0).first()
+        if blob is not None:
+            Blob.objects.filter(pk=blob.pk).update(refcount=F("refcount") - 1)
+
+
+def sweep():
+    """
+    Delete the rows and files of blobs nobody references. Each is checked
+    again at refcount 0 under its row lock, which acquire() takes too, so a
+    file is never deleted from under a new reference. Returns how many.
+    """
+    removed = 0
+    for pk in Blob.objects.filter(refcount=0).values_list("pk", flat=True).iterator():
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update(skip_locked=True).filter(pk=pk, refcount=0).first()
+            if blob is None:
+                continue
+            blob.delete()
+            # if the commit fails after this, acquire() finds the tombstone
+            # and the storage writes the missing file again
+            blob_storage.delete(blob.file.name)
+        removed += 1
+    return removed
@@ -0,0 +1,66 @@
+"""
+Conditional GET (ETag / Last-Modified) for the form and submission reads.
+
+Views work out their validators first, with one small query, and answer
+with not_modified()'s 304 before serializing anything when the client's
+copy is still current. Responses are marked private and no-cache, so
+browsers keep them but revalidate on every use.
+
+Lists only answer 304 on a matching ETag: removing a row can move their
+max(updated_at) backwards, so If-Modified-Since alone can't be trusted.
+"""
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+# count and the id sum catch rows leaving or joining the list, which
+# max(updated_at) alone would miss
+LIST_STATS = {"last_modified": Max("updated_at"), "count": Count("id"), "ids": Sum("id")}
+
+
+def list_validators(queryset, *parts):
+    """
+    (etag, last_modified) for a list of rows with an updated_at column, from
+    one aggregate query; pass a sliced queryset to cover just one page.
+    `parts` are folded into the ETag, for anything else the response depends on.
+    """
+    stats = queryset.aggregate(**LIST_STATS)
+    return make_etag(stats["count"], stats["ids"], stats["last_modified"], *parts), stats["last_modified"]
+
+
+async def alist_validators(queryset, *parts):
+    """list_validators() for async views"""
+    stats = await queryset.aaggregate(**LIST_STATS)
+    return make_etag(stats["count"], stats["ids"], stats["last_modified"], *parts), stats["last_modified"]
+
+
+def add_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    # one URL serves a different list to every user
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    A 304 response if the request's If-None-Match (or, given last_modified,
+    If-Modified-Since) shows the client's copy is current, else None
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None,
+    )
+    if response is not None:
+        add_validators(response, etag, last_modified)
+    return response
@@ -0,0 +1,104 @@
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+
+from .models import Counter, Form, Submission
+
+GLOBAL = Counter.SCOPE_GLOBAL
+FORM = Counter.SCOPE_FORM
+SUBMITTER = Counter.SCOPE_SUBMITTER
+
+
+def increment(name, scope=GLOBAL, object_id=0, delta=1):
+    """Atomically add `delta` to a counter, creating the row on first use"""
+    lookup = {"name": name, "scope": scope, "object_id": object_id}
+    if Counter.objects.filter(**lookup).update(value=F("value") + delta):
+        return
+    try:
+        with transaction.atomic():
+            Counter.objects.create(value=delta, **lookup)
+    except IntegrityError:
+        # another request created it first
+        Counter.objects.filter(**lookup).update(value=F("value") + delta)
+
+
+def decrement_many(name, scope, deltas, batch_size=250):
+    """
+    Subtract {object_id: amount} from the existing counters of one scope,
+    one UPDATE per `batch_size` objects rather than one per object
+    """
+    items = list(deltas.items())
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        Counter.objects.filter(name=name, scope=scope, object_id__in=[pk for pk, _ in batch]).update(
+            value=F("value") - Case(*(When(object_id=pk, then=Value(amount)) for pk, amount in batch), default=Value(0))
+        )
+
+
+def _counts_query(keys):
+    query = Q()
+    for name, scope, object_id in keys:
+        query |= Q(name=name, scope=scope, object_id=object_id)
+    return Counter.objects.filter(query)
+
+
+def get_counts(*keys):
+    """
+    Read several counters in one query. Keys are (name, scope, object_id)
+    tuples; missing counters read as 0.
+    """
+    values = {
+        (c.name, c.scope, c.object_id): c.value
+        for c in _counts_query(keys)
+    } if keys else {}
+    return [values.get(key, 0) for key in keys]
+
+
+def get_count(name, scope=GLOBAL, object_id=0):
+    return get_counts((name, scope, object_id))[0]
+
+
+async def aget_counts(*keys):
+    """get_counts() for async views"""
+    values = {
+        (c.name, c.scope, c.object_id): c.value
+        async for c in _counts_query(keys)
+    } if keys else {}
+    return [values.get(key, 0) for key in keys]
+
+
+async def aget_count(name, scope=GLOBAL, object_id=0):
+    return (await aget_counts((name, scope, object_id)))[0]
+
+
+@transaction.atomic
+def recount():
+    """
+    Rebuild every counter from the source tables, repairing any drift.
+    The counter rows are locked first, so increments from concurrent
+    requests wait and land on the rebuilt values instead of being
+    overwritten, and readers see the old values until it commits.
+    """
+    list(Counter.objects.select_for_update().values_list("pk", flat=True))
+    submitted = Submission.objects.filter(submitted_by__isnull=False)
+    rows = [
+        Counter(name="users", value=User.objects.count()),
+        Counter(name="forms", value=Form.objects.count()),
+        Counter(name="submissions", value=Submission.objects.count()),
+    ]
+    rows += [
+        Counter(name="submissions", scope=FORM, object_id=row["form_id"], value=row["total"])
+        for row in Submission.objects.order_by().values("form_id").annotate(total=Count("id"))
+    ]
+    rows += [
+        Counter(name="submissions", scope=SUBMITTER, object_id=row["submitted_by_id"], value=row["total"])
+        for row in submitted.order_by().values("submitted_by_id").annotate(total=Count("id"))
+    ]
+    # forms and submitters with no submissions left read as 0 without a row
+    Counter.objects.filter(scope=FORM).exclude(object_id__in=Submission.objects.values("form_id")).delete()
+    Counter.objects.filter(scope=SUBMITTER).exclude(object_id__in=submitted.values("submitted_by_id")).delete()
+    Counter.objects.bulk_create(
+        rows, batch_size=1000,
+        update_conflicts=True, unique_fields=["name", "scope", "object_id"], update_fields=["value"],
+    )
+    return len(rows)
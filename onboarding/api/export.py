@@ -0,0 +1,101 @@
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import FormField
+
+EXPORT_CHUNK_ROWS = 2000
+FLUSH_BYTES = 64 * 1024
+BASE_COLUMNS = ["id", "created_at", "status", "submitted_by", "file_upload"]
+
+
+class _Echo:
+    """File-like object for csv.writer that hands back each line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def export_columns(form):
+    """One column per FormField.name in display order, after the submission's own columns"""
+    names = (
+        FormField.objects.filter(form=form)
+        .order_by("section__order", "order", "id")
+        .values_list("name", flat=True)
+    )
+    field_names = list(dict.fromkeys(name for name in names if name not in BASE_COLUMNS))
+    return BASE_COLUMNS, field_names
+
+
+def _rows(queryset):
+    return queryset.order_by("created_at", "id").values_list(
+        "id", "created_at", "status", "submitted_by_id", "file_upload", "data"
+    ).iterator(chunk_size=EXPORT_CHUNK_ROWS)
+
+
+def _buffered(pieces):
+    """
+    Join small pieces into ~64KB chunks so the response isn't one write per row.
+    The first piece goes out on its own so clients get bytes immediately.
+    """
+    buffer, size, first = [], 0, True
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if first or size >= FLUSH_BYTES:
+            first = False
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    return value
+
+
+def csv_stream(form, queryset):
+    base_columns, field_names = export_columns(form)
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(base_columns + field_names)
+        for pk, created_at, status, submitted_by, file_upload, data in _rows(queryset):
+            data = data or {}
+            yield writer.writerow(
+                [pk, created_at.isoformat(), status, submitted_by or "", file_upload or ""]
+                + [_csv_value(data.get(name)) for name in field_names]
+            )
+
+    return _buffered(lines())
+
+
+def ndjson_stream(form, queryset):
+    def lines():
+        for pk, created_at, status, submitted_by, file_upload, data in _rows(queryset):
+            yield json.dumps({
+                "id": pk,
+                "form": form.pk,
+                "created_at": created_at,
+                "status": status,
+                "submitted_by": submitted_by,
+                "file_upload": file_upload or None,
+                "data": data,
+            }, cls=DjangoJSONEncoder) + "\n"
+
+    return _buffered(lines())
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
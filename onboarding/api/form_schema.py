@@ -0,0 +1,63 @@
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Form
+
+
+def compile_form_schema(form_id):
+    """
+    Build the denormalized form tree, store it in Form.schema tagged with the
+    version it was built from, and return the stored document.
+    """
+    from .serializers import FormSerializer
+
+    form = Form.objects.with_tree().defer("schema").get(pk=form_id)
+    document = {
+        "version": form.schema_version,
+        "form": json.loads(json.dumps(FormSerializer(form).data, cls=DjangoJSONEncoder)),
+    }
+    # Only store it if nothing changed the tree while we were compiling
+    Form.objects.filter(pk=form_id, schema_version=form.schema_version).update(schema=document)
+    return document
+
+
+@lru_cache(maxsize=getattr(settings, "FORM_SCHEMA_CACHE_SIZE", 256))
+def _schema_for_version(form_id, version):
+    schema = Form.objects.filter(pk=form_id).values_list("schema", flat=True).first()
+    if schema and schema.get("version") == version:
+        return schema["form"]
+    return compile_form_schema(form_id)["form"]
+
+
+def get_form_schema(form_id, version=None):
+    """
+    Return the compiled tree for a form, or None if it doesn't exist.
+    Callers that already read schema_version pass it and skip that fetch;
+    otherwise warm reads cost one single-column row fetch. The result is
+    shared, don't mutate it.
+    """
+    if version is None:
+        version = Form.objects.filter(pk=form_id).values_list("schema_version", flat=True).first()
+        if version is None:
+            return None
+    return _schema_for_version(form_id, version)
+
+
+def clear_form_schema_cache():
+    _schema_for_version.cache_clear()
+
+
+def invalidate_form_schema(**lookup):
+    """
+    Bump the schema version of the form(s) matching `lookup` so cached
+    documents for the old version are never served again.
+    """
+    return Form.objects.filter(**lookup).update(
+        schema_version=F("schema_version") + 1,
+        updated_at=timezone.now(),
+    )
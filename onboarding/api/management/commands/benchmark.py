@@ -0,0 +1,88 @@
+import importlib
+import json
+import pkgutil
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+import api.benchmarks
+from api.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Run the benchmarks in api/benchmarks against a throwaway test database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Benchmarks to run (default: all)")
+        parser.add_argument("--list", action="store_true", help="List available benchmarks")
+        parser.add_argument("--output", help="Also write the results to this JSON file")
+        parser.add_argument(
+            "--baseline",
+            help="Compare with an earlier --output file and fail on more queries or a slower p95",
+        )
+        parser.add_argument(
+            "--tolerance", type=float, default=0.25,
+            help="Allowed relative p95 slowdown against --baseline (default: 0.25)",
+        )
+
+    def handle(self, *args, **options):
+        for module in pkgutil.iter_modules(api.benchmarks.__path__):
+            importlib.import_module(f"api.benchmarks.{module.name}")
+
+        if options["list"]:
+            for name, func in sorted(BENCHMARKS.items()):
+                summary = (func.__doc__ or "").strip().splitlines() or [""]
+                self.stdout.write(f"{name}: {summary[0]}")
+            return
+
+        names = options["names"] or sorted(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = {}
+            for name in names:
+                self.stderr.write(f"Running {name}...")
+                results[name] = BENCHMARKS[name]()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = json.dumps(results, indent=2, default=str)
+        self.stdout.write(report)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(report)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as fh:
+                baseline = json.load(fh)
+            regressions = list(compare(baseline, json.loads(report), options["tolerance"]))
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+
+
+def compare(baseline, results, tolerance, path=()):
+    """
+    Regressions between two reports: any measurement (a dict with "queries"
+    or "p95_ms") present in both that runs more queries, or whose p95 grew
+    by more than `tolerance`
+    """
+    for key, value in results.items():
+        before = baseline.get(key) if isinstance(baseline, dict) else None
+        if not isinstance(value, dict) or not isinstance(before, dict):
+            continue
+        where = " / ".join(path + (key,))
+        if isinstance(value.get("queries"), int) and isinstance(before.get("queries"), int):
+            if value["queries"] > before["queries"]:
+                yield f"{where}: {before['queries']} -> {value['queries']} queries"
+        if value.get("p95_ms") and before.get("p95_ms"):
+            if value["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                yield f"{where}: p95 {before['p95_ms']} -> {value['p95_ms']} ms"
+        yield from compare(before, value, tolerance, path + (key,))
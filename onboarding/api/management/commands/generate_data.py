@@ -0,0 +1,52 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+
+from api.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the configured database with synthetic forms, users, assignments and "
+        "submissions at production-like volumes (defaults: 2k forms, 100k users, 2M submissions)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--forms", type=int, default=2_000)
+        parser.add_argument("--sections", type=int, default=3, help="Sections per form")
+        parser.add_argument("--fields", type=int, default=8, help="Fields per section")
+        parser.add_argument("--options", type=int, default=4, help="Options per select/radio/checkbox field")
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--staff-ratio", type=float, default=0.05)
+        parser.add_argument("--submissions", type=int, default=2_000_000)
+        parser.add_argument("--days", type=int, default=365, help="Spread submissions over this many days")
+        parser.add_argument("--prefix", default="synth", help="Prefix for usernames, emails and slugs")
+        parser.add_argument("--password", default="Password123", help="Password of every generated user")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(username=f"{prefix}-admin").exists():
+            raise CommandError(f"Data with prefix '{prefix}' already exists; pick another --prefix")
+
+        start = time.perf_counter()
+        summary = generate(
+            forms=options["forms"],
+            users=options["users"],
+            submissions=options["submissions"],
+            sections=options["sections"],
+            fields_per_section=options["fields"],
+            options=options["options"],
+            staff_ratio=options["staff_ratio"],
+            days=options["days"],
+            prefix=prefix,
+            password=options["password"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            log=lambda message: self.stderr.write(message),
+        )
+        summary["seconds"] = round(time.perf_counter() - start, 1)
+        self.stdout.write(json.dumps(summary, indent=2))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.serializers import UserImportSerializer
+from api.user_import import parse_user_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV (username,email,first_name,last_name,password,role) "
+        "or JSON file, hashing passwords across worker processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or .json file")
+        parser.add_argument("--workers", type=int, default=None, help="Hashing processes (default: one per CPU)")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], "rb") as stream:
+                rows = parse_user_rows(stream, options["path"])
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        start = time.perf_counter()
+        serializer = UserImportSerializer(data=rows, many=True, context={"workers": options["workers"]})
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, list):
+                errors = {f"row {i + 1}": row for i, row in enumerate(errors) if row}
+            raise CommandError(f"Invalid rows: {errors}")
+        users = serializer.save()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(users)} users in {elapsed:.1f}s ({len(users) / elapsed:.0f} users/s)"
+        ))
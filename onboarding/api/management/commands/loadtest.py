@@ -0,0 +1,140 @@
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api.authentication import UserRefreshToken
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get("connection", "").lower() != "close"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running HTTP servers with many concurrent keep-alive connections "
+        "and report throughput and latency percentiles, e.g. to compare the WSGI "
+        "and ASGI deployments on the same endpoints"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="+", help="Full URLs, requested round-robin")
+        parser.add_argument("--concurrency", type=int, default=100, help="Concurrent connections")
+        parser.add_argument("--requests", type=int, default=5000, help="Total requests")
+        parser.add_argument("--user", help="Send a bearer token for this username (minted from the local database)")
+        parser.add_argument("--token", help="Bearer token to send")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before a request counts as failed")
+        parser.add_argument("--label", default="", help="Name for this run in the report")
+        parser.add_argument("--output", help="Append the report to this JSON-lines file")
+
+    def handle(self, *args, **options):
+        token = options["token"]
+        if options["user"]:
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['user']!r}")
+            token = str(UserRefreshToken.for_user(user).access_token)
+
+        targets = []
+        for url in options["urls"]:
+            parts = urlsplit(url)
+            if parts.scheme != "http" or not parts.hostname:
+                raise CommandError(f"Only plain http:// URLs are supported: {url}")
+            path = parts.path or "/"
+            if parts.query:
+                path = f"{path}?{parts.query}"
+            headers = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Accept: application/json"]
+            if token:
+                headers.append(f"Authorization: Bearer {token}")
+            targets.append((parts.hostname, parts.port or 80, ("\r\n".join(headers) + "\r\n\r\n").encode()))
+
+        report = asyncio.run(self.run(targets, options["concurrency"], options["requests"], options["timeout"]))
+        report = {"label": options["label"], "urls": options["urls"], **report}
+        self.stdout.write(json.dumps(report, indent=2))
+        if options["output"]:
+            with open(options["output"], "a") as fh:
+                fh.write(json.dumps(report) + "\n")
+
+    async def run(self, targets, concurrency, total, timeout):
+        latencies, statuses, errors = [], {}, []
+        issued = 0
+
+        async def connection():
+            nonlocal issued
+            streams = {}
+            while issued < total:
+                host, port, request = targets[issued % len(targets)]
+                issued += 1
+                start = time.perf_counter()
+                try:
+                    if (host, port) not in streams:
+                        streams[host, port] = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                    reader, writer = streams[host, port]
+                    writer.write(request)
+                    status, keep_alive = await asyncio.wait_for(_read_response(reader), timeout)
+                except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as exc:
+                    errors.append(type(exc).__name__)
+                    stream = streams.pop((host, port), None)
+                    if stream:
+                        stream[1].close()
+                    continue
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+                if not keep_alive:
+                    streams.pop((host, port))[1].close()
+            for _, writer in streams.values():
+                writer.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(connection() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2) if latencies else None
+
+        return {
+            "concurrency": concurrency,
+            "requests": len(latencies),
+            "errors": len(errors),
+            "error_types": {name: errors.count(name) for name in set(errors)},
+            "statuses": statuses,
+            "seconds": round(elapsed, 2),
+            "requests_per_s": round(len(latencies) / elapsed, 1) if elapsed else None,
+            "latency_ms": {
+                "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+                "p50": percentile(0.50),
+                "p90": percentile(0.90),
+                "p99": percentile(0.99),
+                "max": percentile(1.0),
+            },
+        }
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.utils import EmailService
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox over a single SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows to claim per batch")
+        parser.add_argument("--loop", action="store_true", help="Keep polling the outbox instead of exiting")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = EmailService.process_outbox(batch_size=options["batch_size"])
+            if sent or failed:
+                self.stdout.write(f"Outbox: {sent} sent, {failed} failed")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,34 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Delete attached upload sessions and unfinished ones that have gone stale, with their temp files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours", type=int, default=getattr(settings, "UPLOAD_SESSION_MAX_AGE_HOURS", 24),
+            help="Age after which an unattached session is considered abandoned",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        stale = UploadSession.objects.filter(
+            Q(status=UploadSession.STATUS_ATTACHED) | Q(updated_at__lt=cutoff)
+        )
+        removed = 0
+        for session in stale.iterator():
+            try:
+                os.remove(session.temp_path)
+            except FileNotFoundError:
+                pass
+            session.delete()
+            removed += 1
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} upload sessions"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.search import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the submission search index from the submissions"
+
+    def handle(self, *args, **options):
+        count = rebuild(log=lambda message: self.stderr.write(message))
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} submissions"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.counters import recount
+
+
+class Command(BaseCommand):
+    help = "Rebuild the user, form and submission counters from the tables"
+
+    def handle(self, *args, **options):
+        rows = recount()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} counters"))
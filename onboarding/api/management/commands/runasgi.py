@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Serve onboarding.asgi:application with uvicorn (pip install uvicorn)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8000)
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+        parser.add_argument("--reload", action="store_true", help="Restart on code changes (development)")
+
+    def handle(self, *args, **options):
+        try:
+            import uvicorn
+        except ImportError:
+            raise CommandError("runasgi needs uvicorn: pip install uvicorn")
+
+        uvicorn.run(
+            "onboarding.asgi:application",
+            host=options["host"],
+            port=options["port"],
+            workers=options["workers"],
+            reload=options["reload"],
+            # Django has no lifespan hooks
+            lifespan="off",
+        )
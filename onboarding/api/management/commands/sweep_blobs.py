@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import blobs
+
+
+class Command(BaseCommand):
+    help = "Delete stored files, and their blob rows, that no attachment references any more"
+
+    def handle(self, *args, **options):
+        removed = blobs.sweep()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} unreferenced blobs"))
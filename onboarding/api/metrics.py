@@ -0,0 +1,167 @@
+"""
+Per-view request metrics, recorded by api.middleware.MetricsMiddleware and
+served in Prometheus text format by the admin-only /metrics/ endpoint.
+
+For every URL name: requests by method and status, a latency histogram,
+SQL query count and time, and response bytes. Metrics live in the process
+that served the request, so with several workers each one reports its own
+numbers, like any multi-process Prometheus target.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from . import response_cache
+
+# seconds; the last bucket is +Inf
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# the SQLTimer of the request being handled; a context variable rather than a
+# per-request execute_wrapper because async views run their queries on
+# another thread's connection, and sync_to_async carries context across
+_current_timer = ContextVar("metrics_sql_timer", default=None)
+
+
+class SQLTimer:
+    """Counts statements and adds up their time while active (see timing_sql)"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """connection.execute_wrapper installed once per connection (install_sql_wrapper)"""
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.seconds += time.perf_counter() - start
+        timer.count += 1
+
+
+def install_sql_wrapper(connection):
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+@contextmanager
+def timing_sql(timer):
+    """Send the SQL run in this context, on any thread, to `timer`"""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+
+class _ViewStats:
+    __slots__ = ("responses", "buckets", "seconds", "queries", "sql_seconds", "bytes", "sized")
+
+    def __init__(self, bucket_count):
+        self.responses = {}  # (method, status) -> count
+        self.buckets = [0] * (bucket_count + 1)
+        self.seconds = 0.0
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.bytes = 0
+        self.sized = 0
+
+
+class Registry:
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or getattr(settings, "METRICS_LATENCY_BUCKETS", DEFAULT_BUCKETS))
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def record(self, view, method, status, seconds, queries, sql_seconds, size=None):
+        """Record one response; size is None for streaming responses"""
+        bucket = bisect_left(self.buckets, seconds)
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = _ViewStats(len(self.buckets))
+            key = (method, status)
+            stats.responses[key] = stats.responses.get(key, 0) + 1
+            stats.buckets[bucket] += 1
+            stats.seconds += seconds
+            stats.queries += queries
+            stats.sql_seconds += sql_seconds
+            if size is not None:
+                stats.bytes += size
+                stats.sized += 1
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """The registry in Prometheus text exposition format (0.0.4)"""
+        with self._lock:
+            views = sorted(
+                (view, dict(stats.responses), list(stats.buckets), stats.seconds,
+                 stats.queries, stats.sql_seconds, stats.bytes, stats.sized)
+                for view, stats in self._views.items()
+            )
+
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family("onboarding_http_requests_total", "counter", "Responses by view, method and status.")
+        for view, responses, *_ in views:
+            for (method, status), count in sorted(responses.items()):
+                lines.append(
+                    f'onboarding_http_requests_total{{view="{_label(view)}",method="{method}",status="{status}"}} {count}'
+                )
+
+        family("onboarding_http_request_duration_seconds", "histogram", "Time from the first middleware to the response.")
+        for view, responses, buckets, seconds, *_ in views:
+            label = _label(view)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'onboarding_http_request_duration_seconds_bucket{{view="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'onboarding_http_request_duration_seconds_sum{{view="{label}"}} {seconds:.6f}')
+            lines.append(f'onboarding_http_request_duration_seconds_count{{view="{label}"}} {cumulative}')
+
+        family("onboarding_db_queries_total", "counter", "SQL statements executed while handling the view.")
+        for view, _, _, _, queries, *_ in views:
+            lines.append(f'onboarding_db_queries_total{{view="{_label(view)}"}} {queries}')
+
+        family("onboarding_db_query_seconds_total", "counter", "Time spent executing SQL while handling the view.")
+        for view, _, _, _, _, sql_seconds, *_ in views:
+            lines.append(f'onboarding_db_query_seconds_total{{view="{_label(view)}"}} {sql_seconds:.6f}')
+
+        family("onboarding_http_response_size_bytes", "summary", "Response body sizes (streaming responses excluded).")
+        for view, *_, size, sized in views:
+            lines.append(f'onboarding_http_response_size_bytes_sum{{view="{_label(view)}"}} {size}')
+            lines.append(f'onboarding_http_response_size_bytes_count{{view="{_label(view)}"}} {sized}')
+
+        cache_stats = response_cache.stats()
+        family("onboarding_response_cache_hits_total", "counter", "Response cache hits by endpoint.")
+        for name, counts in cache_stats.items():
+            lines.append(f'onboarding_response_cache_hits_total{{endpoint="{_label(name)}"}} {counts["hits"]}')
+        family("onboarding_response_cache_misses_total", "counter", "Response cache misses by endpoint.")
+        for name, counts in cache_stats.items():
+            lines.append(f'onboarding_response_cache_misses_total{{endpoint="{_label(name)}"}} {counts["misses"]}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='form',
+            name='schema_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:35
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def seed_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Form = apps.get_model("api", "Form")
+    Submission = apps.get_model("api", "Submission")
+    Counter = apps.get_model("api", "Counter")
+
+    rows = [
+        Counter(name="users", scope="global", object_id=0, value=User.objects.count()),
+        Counter(name="forms", scope="global", object_id=0, value=Form.objects.count()),
+        Counter(name="submissions", scope="global", object_id=0, value=Submission.objects.count()),
+    ]
+    rows += [
+        Counter(name="submissions", scope="form", object_id=row["form_id"], value=row["total"])
+        for row in Submission.objects.order_by().values("form_id").annotate(total=Count("id"))
+    ]
+    rows += [
+        Counter(name="submissions", scope="submitter", object_id=row["submitted_by_id"], value=row["total"])
+        for row in Submission.objects.filter(submitted_by__isnull=False)
+        .order_by().values("submitted_by_id").annotate(total=Count("id"))
+    ]
+    Counter.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_submission_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30)),
+                ('scope', models.CharField(choices=[('global', 'Global'), ('form', 'Per form'), ('submitter', 'Per submitter')], default='global', max_length=20)),
+                ('object_id', models.BigIntegerField(default=0)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'scope', 'object_id'), name='api_counter_unique')],
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# auth_user belongs to django.contrib.auth, so its indexes are created with SQL.
+# The partial indexes match the WHERE clauses Django emits for the staff and
+# client groups in FormAssignment.save(); the email index serves LoginSerializer
+# and the signup duplicate check (email is not unique on auth_user).
+USER_INDEXES = [
+    ("api_user_email_idx", "(email)"),
+    ("api_user_staff_idx", "(id) WHERE is_staff AND NOT is_superuser"),
+    ("api_user_client_idx", "(id) WHERE NOT is_staff AND NOT is_superuser"),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        # after auth's last migration: SQLite rebuilds auth_user on AlterField,
+        # which would drop the raw indexes below
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='form',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='api_form_active_idx'),
+        ),
+    ] + [
+        migrations.RunSQL(
+            sql=f"CREATE INDEX IF NOT EXISTS {name} ON auth_user {definition}",
+            reverse_sql=f"DROP INDEX IF EXISTS {name}",
+        )
+        for name, definition in USER_INDEXES
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+GROUP_FILTERS = {
+    "staff": {"is_staff": True, "is_superuser": False},
+    "client": {"is_staff": False, "is_superuser": False},
+}
+
+
+def drop_materialized_members(apps, schema_editor):
+    """
+    Group members are now resolved at query time, so the through rows written
+    for them are redundant. Rows for users whose flags have since changed are
+    kept as explicit assignments, so nobody loses access to a form.
+    """
+    FormAssignment = apps.get_model("api", "FormAssignment")
+    Through = FormAssignment.users.through
+    for group, flags in GROUP_FILTERS.items():
+        Through.objects.filter(
+            formassignment__group=group,
+            **{f"user__{name}": value for name, value in flags.items()},
+        ).delete()
+
+
+def materialize_members(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    FormAssignment = apps.get_model("api", "FormAssignment")
+    Through = FormAssignment.users.through
+    for group, flags in GROUP_FILTERS.items():
+        members = list(User.objects.filter(**flags).values_list("id", flat=True))
+        for assignment_id in FormAssignment.objects.filter(group=group).values_list("id", flat=True):
+            Through.objects.bulk_create(
+                [Through(formassignment_id=assignment_id, user_id=user_id) for user_id in members],
+                batch_size=1000, ignore_conflicts=True,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='formassignment',
+            name='group',
+            field=models.CharField(choices=[('staff', 'Staff'), ('client', 'Client'), ('users', 'Selected users')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='formassignment',
+            index=models.Index(fields=['group', 'form'], name='api_assign_group_form_idx'),
+        ),
+        migrations.RunPython(drop_materialized_members, materialize_members),
+    ]
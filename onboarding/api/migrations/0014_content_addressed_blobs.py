@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:52
+
+import api.storage
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(max_length=255, storage=api.storage.ContentAddressedStorage(), upload_to='')),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='uploadsession',
+            name='digest',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='submissionattachment',
+            name='file',
+            field=models.FileField(max_length=255, storage=api.storage.ContentAddressedStorage(), upload_to='uploads/'),
+        ),
+        migrations.AddField(
+            model_name='submissionattachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='attachments', to='api.blob'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:55
+
+import re
+
+from django.db import migrations
+
+# A snapshot of api.search as of this migration: later changes to how
+# documents are built must not change what this migration does. Run
+# `manage.py rebuild_search_index` to re-index with the current code.
+TABLE = "api_submission_search"
+WORD = re.compile(r"\w+")
+BATCH_SIZE = 500
+
+CREATE_SQL = {
+    "sqlite": [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+        f"document, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4 5 6 7 8')",
+    ],
+    "postgresql": [
+        f"CREATE TABLE IF NOT EXISTS {TABLE} (submission_id bigint PRIMARY KEY, document tsvector NOT NULL)",
+        f"CREATE INDEX IF NOT EXISTS {TABLE}_idx ON {TABLE} USING GIN (document)",
+    ],
+}
+INSERT_SQL = {
+    "sqlite": f"INSERT INTO {TABLE} (rowid, document) VALUES (%s, %s)",
+    "postgresql": f"INSERT INTO {TABLE} (submission_id, document) VALUES (%s, to_tsvector('simple', %s))",
+}
+
+
+def _values(value):
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _values(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _values(item)
+    elif value is not None:
+        yield str(value)
+
+
+def _document(submission):
+    parts = list(_values(submission.data))
+    attachments = [attachment.name for attachment in submission.attachments.all()]
+    if not attachments and submission.file_upload:
+        attachments.append(submission.file_upload.name.rsplit("/", 1)[-1])
+    parts += attachments
+    user = submission.submitted_by
+    if user is not None:
+        parts += [user.first_name, user.last_name, user.username, user.email]
+    return " ".join(WORD.findall(" ".join(parts)))
+
+
+def create_search_index(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor not in CREATE_SQL:
+        return
+    with conn.cursor() as cursor:
+        for sql in CREATE_SQL[conn.vendor]:
+            cursor.execute(sql)
+
+    submissions = (
+        apps.get_model("api", "Submission").objects.using(conn.alias).order_by("pk")
+        .select_related("submitted_by").prefetch_related("attachments")
+    )
+    batch = []
+    with conn.cursor() as cursor:
+        for submission in submissions.iterator(chunk_size=BATCH_SIZE):
+            batch.append((submission.pk, _document(submission)))
+            if len(batch) == BATCH_SIZE:
+                cursor.executemany(INSERT_SQL[conn.vendor], batch)
+                batch = []
+        if batch:
+            cursor.executemany(INSERT_SQL[conn.vendor], batch)
+
+
+def drop_search_index(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor in CREATE_SQL:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_content_addressed_blobs'),
+    ]
+
+    # the table is an FTS5 virtual table on SQLite and a tsvector column with
+    # a GIN index on PostgreSQL, neither of which a model can declare
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:31
+
+import django.db.models.deletion
+import django.db.models.functions.text
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_submission_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailFanout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('assignment', 'Form assignment')], max_length=20)),
+                ('group', models.CharField(max_length=20)),
+                ('forms', models.JSONField(default=list)),
+                ('last_user_id', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('done_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['done_at', 'id'], name='api_fanout_due_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='fanout',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emails', to='api.emailfanout'),
+        ),
+        migrations.AddConstraint(
+            model_name='emailoutbox',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('to_email'), models.F('fanout'), name='api_outbox_fanout_recipient_unique'),
+        ),
+    ]
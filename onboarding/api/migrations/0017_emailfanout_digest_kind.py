@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_emailfanout'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailfanout',
+            name='kind',
+            field=models.CharField(choices=[('assignment', 'Form assignment'), ('digest', 'Bulk assignment digest')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:10
+
+from django.db import migrations
+
+
+# Serves the case-insensitive existing-email check of the bulk user import
+# (UserImportListSerializer), which compares lower(email). Raw SQL for the
+# same reason as the indexes in 0010: auth_user belongs to django.contrib.auth.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_uploadsession_claim'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS api_user_email_lower_idx ON auth_user (lower(email))",
+            reverse_sql="DROP INDEX IF EXISTS api_user_email_lower_idx",
+        ),
+    ]
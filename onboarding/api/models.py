@@ -1,23 +1,126 @@
-from django.db import models
-from django.db import models
+import os
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.functions import Lower
 from django.utils import timezone
 
 from django.contrib.auth.models import User
+from .storage import blob_storage
 from .utils import EmailService
 
 
+class FormQuerySet(models.QuerySet):
+    def with_tree(self):
+        """
+        Prefetch sections, fields and options so serializing any number of
+        forms with FormSerializer costs a fixed number of queries.
+        """
+        fields = FormField.objects.prefetch_related("options")
+        return self.prefetch_related(
+            models.Prefetch(
+                "sections",
+                queryset=FormSection.objects.prefetch_related(models.Prefetch("fields", queryset=fields)),
+            ),
+            models.Prefetch("fields", queryset=fields),
+        )
+
+    @transaction.atomic
+    def create_trees(self, definitions, created_by=None):
+        """
+        Create forms with their sections, fields and options from validated
+        FormSerializer data, using one bulk_create per level inside a single
+        transaction. Relies on the backend returning primary keys from bulk
+        inserts (SQLite 3.35+, PostgreSQL).
+        """
+        definitions = list(definitions)
+        forms = self.bulk_create([
+            Form(created_by=created_by, **{k: v for k, v in d.items() if k not in ("sections", "fields")})
+            for d in definitions
+        ])
+
+        sections = []
+        for form, definition in zip(forms, definitions):
+            for section_data in definition.get("sections", []):
+                section = FormSection(form=form, **{k: v for k, v in section_data.items() if k != "fields"})
+                sections.append((section, section_data.get("fields", [])))
+        FormSection.objects.bulk_create([section for section, _ in sections])
+
+        fields = []
+        for section, fields_data in sections:
+            for field_data in fields_data:
+                fields.append((FormField(form=section.form, section=section, **_without_options(field_data)), field_data))
+        for form, definition in zip(forms, definitions):
+            for field_data in definition.get("fields", []):
+                fields.append((FormField(form=form, **_without_options(field_data)), field_data))
+        FormField.objects.bulk_create([field for field, _ in fields])
+
+        FieldOption.objects.bulk_create([
+            FieldOption(field=field, **option)
+            for field, field_data in fields
+            for option in field_data.get("options", [])
+        ])
+
+        # bulk_create skips post_save, so keep the forms counter and the
+        # cached form lists in step here
+        from . import response_cache
+        from .counters import increment
+        increment("forms", delta=len(forms))
+        response_cache.invalidate()
+        return forms
+
+    def assigned_to(self, user):
+        """
+        Forms assigned to the user's group, resolved from their is_staff /
+        is_superuser flags at query time, plus any assigned to them explicitly.
+        """
+        group = FormAssignment.group_for(user)
+        explicit = FormAssignment.users.through.objects.filter(user=user)
+        return self.filter(
+            models.Q(id__in=FormAssignment.objects.filter(group=group).values("form_id"))
+            | models.Q(id__in=explicit.values("formassignment__form_id"))
+        )
+
+
+def _without_options(field_data):
+    return {k: v for k, v in field_data.items() if k != "options"}
+
 
 class Form(models.Model):
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True)
     description = models.TextField(blank=True)
-    # canonical JSON schema for the form (optional canonical representation)
+    # compiled, denormalized form tree ({"version": n, "form": {...}}); maintained by api.form_schema
     schema = models.JSONField(default=dict, blank=True)  # requires Django 3.1+; else use JSONField from postgres
+    # bumped whenever the form or anything in its tree changes
+    schema_version = models.PositiveIntegerField(default=0)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="created_forms")
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
+    objects = FormQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # available_forms: only active forms, newest first
+            models.Index(fields=["-created_at"], condition=models.Q(is_active=True), name="api_form_active_idx"),
+        ]
+
+    SCHEMA_FIELDS = ("schema", "schema_version")
+
+    def save(self, *args, **kwargs):
+        # schema/schema_version are only written by api.form_schema; never overwrite
+        # them from a possibly stale instance
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.SCHEMA_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
     
@@ -93,6 +196,199 @@ class Submission(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=50, default="submitted") 
 
+    class Meta:
+        # (created_at, id) keyset pagination, optionally narrowed by form, submitter or status
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="api_sub_created_idx"),
+            models.Index(fields=["form", "-created_at", "-id"], name="api_sub_form_created_idx"),
+            models.Index(fields=["submitted_by", "-created_at", "-id"], name="api_sub_user_created_idx"),
+            models.Index(fields=["status", "-created_at", "-id"], name="api_sub_status_created_idx"),
+        ]
+
+
+class Blob(models.Model):
+    """
+    A unique file stored once under its SHA-256 digest and shared by every
+    attachment with the same bytes. `refcount` is the number of attachments
+    pointing at it; see api.blobs for taking and dropping references. Rows
+    at 0 stay as tombstones until `manage.py sweep_blobs` deletes them and
+    their files.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    file = models.FileField(storage=blob_storage, max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+
+class SubmissionAttachment(models.Model):
+    """One uploaded file of a submission, tied to the file field it was uploaded for"""
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name="attachments")
+    # null when the file arrived under a key that isn't a file field of the form
+    field = models.ForeignKey(FormField, on_delete=models.SET_NULL, null=True, blank=True, related_name="attachments")
+    # content-addressed: `file` names the blob's file, shared with identical uploads
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name="attachments")
+    file = models.FileField(upload_to='uploads/', storage=blob_storage, max_length=255)
+    name = models.CharField(max_length=255)  # original filename
+    size = models.PositiveBigIntegerField(default=0)
+    content_type = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["id"]
+
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            # take a reference, then store the bytes unless an identical file
+            # already is; the blob row stays locked until the transaction ends,
+            # so blobs.sweep() can't delete that file in between
+            from .blobs import acquire
+            from .storage import blob_name, file_digest
+
+            upload = self.file.file
+            digest = file_digest(upload)
+            with transaction.atomic():
+                self.blob = acquire(digest, blob_name(digest, upload.name), self.size or upload.size)
+                self.file.save(self.blob.file.name, upload, save=False)
+                super().save(*args, **kwargs)
+            return
+        super().save(*args, **kwargs)
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload. Numbered chunks are appended to a temp file until the
+    client finalizes it; the finished file is then attached to a submission
+    by passing the session id to the submit endpoint.
+    """
+    STATUS_OPEN = "open"
+    STATUS_COMPLETE = "complete"
+    STATUS_ATTACHED = "attached"
+    STATUS_CHOICES = [
+        (STATUS_OPEN, "Open"),
+        (STATUS_COMPLETE, "Complete"),
+        (STATUS_ATTACHED, "Attached"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions")
+    field = models.ForeignKey(FormField, on_delete=models.SET_NULL, null=True, blank=True, related_name="upload_sessions")
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255, blank=True)
+    size = models.PositiveBigIntegerField()  # declared total, in bytes
+    received = models.PositiveBigIntegerField(default=0)  # bytes written so far; the next chunk's offset
+    chunks = models.PositiveIntegerField(default=0)  # chunks written so far; the next chunk's number
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_OPEN)
+    digest = models.CharField(max_length=64, blank=True)  # SHA-256, set on finalize
+    # set while a request streams the next chunk; see api.uploads.append_chunk
+    claim = models.UUIDField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def temp_path(self):
+        temp_dir = getattr(settings, "FILE_UPLOAD_TEMP_DIR", None) or tempfile.gettempdir()
+        return os.path.join(temp_dir, "sessions", f"{self.pk}.part")
+
+
+class EmailFanout(models.Model):
+    """
+    A notification to every member of a group, queued by the request as one
+    row. process_outbox expands it into EmailOutbox rows a batch of members
+    at a time, resuming after `last_user_id`, so the request costs the same
+    however large the group is.
+    """
+    KIND_ASSIGNMENT = "assignment"
+    KIND_DIGEST = "digest"
+    KINDS = [
+        (KIND_ASSIGNMENT, "Form assignment"),
+        (KIND_DIGEST, "Bulk assignment digest"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    group = models.CharField(max_length=20)
+    forms = models.JSONField(default=list)  # form ids, in the order they're listed
+    last_user_id = models.BigIntegerField(default=0)  # members up to this id are queued
+    created_at = models.DateTimeField(default=timezone.now)
+    done_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["done_at", "id"], name="api_fanout_due_idx")]
+
+    def __str__(self):
+        return f"{self.kind} to {self.group} ({'done' if self.done_at else 'pending'})"
+
+
+class EmailOutbox(models.Model):
+    """
+    Durable queue of outgoing emails.
+    Rows are written inside the request and delivered later by the
+    `process_email_outbox` management command, so requests never wait on SMTP.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_DEAD = "dead"
+    STATUSES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_DEAD, "Dead"),
+    ]
+
+    to_email = models.CharField(max_length=254)
+    from_email = models.CharField(max_length=255, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUSES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # the group notification this row was expanded from, if any
+    fanout = models.ForeignKey(EmailFanout, on_delete=models.SET_NULL, null=True, blank=True, related_name="emails")
+
+    class Meta:
+        ordering = ["next_attempt_at", "id"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"], name="api_outbox_due_idx")]
+        constraints = [
+            # members sharing an address get one email per fan-out, across batches
+            models.UniqueConstraint(Lower("to_email"), "fanout", name="api_outbox_fanout_recipient_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.to_email} - {self.subject} ({self.status})"
+
+
+class Counter(models.Model):
+    """
+    Row counts kept up to date by signals so hot endpoints don't run COUNT(*).
+    ("users" | "forms" | "submissions", "global", 0) hold the table totals;
+    ("submissions", "form", form_id) and ("submissions", "submitter", user_id)
+    hold per-form and per-submitter submission counts.
+    `python manage.py recount` rebuilds them from the tables.
+    """
+    SCOPE_GLOBAL = "global"
+    SCOPE_FORM = "form"
+    SCOPE_SUBMITTER = "submitter"
+    SCOPES = [
+        (SCOPE_GLOBAL, "Global"),
+        (SCOPE_FORM, "Per form"),
+        (SCOPE_SUBMITTER, "Per submitter"),
+    ]
+
+    name = models.CharField(max_length=30)
+    scope = models.CharField(max_length=20, choices=SCOPES, default=SCOPE_GLOBAL)
+    object_id = models.BigIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["name", "scope", "object_id"], name="api_counter_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.name}:{self.scope}:{self.object_id} = {self.value}"
 
 
 class Roles(models.Model):
@@ -104,14 +400,86 @@ class Roles(models.Model):
 
 
     
+class FormAssignmentQuerySet(models.QuerySet):
+    @transaction.atomic
+    def bulk_assign(self, forms, groups=(), users=(), created_by=None):
+        """
+        Assign every form to every group and user in one transaction.
+        Pairs the target can already see are skipped; explicit users are
+        attached to one 'users' assignment per form with a single through-table
+        insert. Each user reached gets one email listing all of their new
+        forms: explicit users' are queued here, and each group gets one
+        digest fan-out that the outbox worker expands. Returns a summary of
+        what was written.
+        """
+        forms, users = list(forms), list(users)
+        form_ids = [form.pk for form in forms]
+        existing = list(self.filter(form_id__in=form_ids).values_list("id", "form_id", "group"))
+        group_pairs = {(form_id, group) for _, form_id, group in existing}
+        holders = {form_id: pk for pk, form_id, group in existing if group == "users"}
+
+        new_groups = [
+            FormAssignment(form=form, group=group, created_by=created_by)
+            for form in forms for group in dict.fromkeys(groups)
+            if (form.pk, group) not in group_pairs
+        ]
+        self.bulk_create(new_groups)
+        group_pairs.update((a.form_id, a.group) for a in new_groups)
+
+        Through = FormAssignment.users.through
+        explicit = set(
+            Through.objects.filter(formassignment__form_id__in=form_ids, user__in=users)
+            .values_list("formassignment__form_id", "user_id")
+        ) if users else set()
+        pairs = [
+            (form, user) for form in forms for user in users
+            if (form.pk, user.pk) not in explicit
+            and (form.pk, FormAssignment.group_for(user)) not in group_pairs
+        ]
+
+        missing = [form for form in dict.fromkeys(form for form, _ in pairs) if form.pk not in holders]
+        created_holders = self.bulk_create([
+            FormAssignment(form=form, group="users", created_by=created_by) for form in missing
+        ])
+        holders.update((a.form_id, a.pk) for a in created_holders)
+        Through.objects.bulk_create(
+            [Through(formassignment_id=holders[form.pk], user_id=user.pk) for form, user in pairs],
+            batch_size=1000, ignore_conflicts=True,
+        )
+
+        # explicit pairs leave out users whose group was given the form, so
+        # nobody is in both a group digest and an explicit one
+        for group in dict.fromkeys(a.group for a in new_groups):
+            EmailService.queue_group_notification(
+                EmailFanout.KIND_DIGEST, group, [a.form_id for a in new_groups if a.group == group],
+            )
+        digests = {}
+        for form, user in pairs:
+            digests.setdefault(user.pk, (user, []))[1].append(form)
+        EmailService.send_assignment_digest(digests.values())
+
+        # bulk_create skips post_save
+        from . import response_cache
+        response_cache.invalidate()
+
+        return {
+            "assignments": len(new_groups) + len(created_holders),
+            "users": len(pairs),
+        }
+
+
 class FormAssignment(models.Model):
     """
     Assign a form to a group: 'Staff' or 'Client'.
-    The actual users are populated automatically based on their is_staff / is_superuser flags.
+    Group membership is resolved from is_staff / is_superuser when forms are
+    listed (see FormQuerySet.assigned_to), so users who join later see the form.
+    `users` only holds explicit per-user assignments; the 'users' group has no
+    members other than those.
     """
     FORM_GROUPS = [
         ("staff", "Staff"),
         ("client", "Client"),
+        ("users", "Selected users"),
     ]
     form = models.ForeignKey(Form, on_delete=models.CASCADE, related_name="assignments")
     group = models.CharField(max_length=20, choices=FORM_GROUPS)
@@ -119,24 +487,32 @@ class FormAssignment(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="form_assignments_created")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = FormAssignmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["group", "form"], name="api_assign_group_form_idx"),
+        ]
+
+    @staticmethod
+    def group_for(user):
+        """The group a user belongs to; superusers see every form and have none"""
+        if user.is_superuser:
+            return None
+        return "staff" if user.is_staff else "client"
+
+    @staticmethod
+    def group_members(group):
+        if group == "staff":
+            return User.objects.filter(is_staff=True, is_superuser=False)
+        if group == "client":
+            return User.objects.filter(is_staff=False, is_superuser=False)
+        return User.objects.none()
+
     def save(self, *args, **kwargs):
         is_new = self.pk is None
-        super().save(*args, **kwargs)  # save once to get an ID
-
-        if is_new:
-            if self.group == "staff":
-                assigned_users = User.objects.filter(is_staff=True, is_superuser=False)
-            elif self.group == "client":
-                assigned_users = User.objects.filter(is_staff=False, is_superuser=False)
-            else:
-                assigned_users = User.objects.none()
-
-            self.users.set(assigned_users)  # set users without saving again
-            
-            # Send email notifications
-            if assigned_users.exists():
-                EmailService.send_form_assignment_email(
-                    form=self.form,
-                    users=assigned_users,
-                    assignment_type=self.group
-                )
+        super().save(*args, **kwargs)
+
+        if is_new and self.group in ("staff", "client"):
+            # One row whatever the group's size; the outbox worker writes each member's email
+            EmailService.queue_group_notification(EmailFanout.KIND_ASSIGNMENT, self.group, [self.form_id])
@@ -0,0 +1,85 @@
+import base64
+import binascii
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError({"cursor": ["Invalid cursor."]})
+    if created_at is None:
+        raise ValidationError({"cursor": ["Invalid cursor."]})
+    return created_at, pk
+
+
+def parse_page_size(request):
+    value = request.query_params.get("limit")
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValidationError({"limit": ["Must be an integer."]})
+    if size < 1:
+        raise ValidationError({"limit": ["Must be at least 1."]})
+    return min(size, MAX_PAGE_SIZE)
+
+
+def parse_datetime_param(request, name, end_of_day=False):
+    """Accept an ISO datetime or a plain date; dates cover the whole day"""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({name: ["Expected an ISO date or datetime."]})
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def keyset_page(queryset, request):
+    """
+    Keyset pagination on (created_at, id), newest first. Each page is a
+    single index range scan no matter how deep it is, unlike OFFSET which
+    reads and discards every earlier row.
+    Returns (page queryset, page size). The page fetches one row more than
+    the page size, to tell whether there's a next page; pass its rows to
+    split_page().
+    """
+    page_size = parse_page_size(request)
+    queryset = queryset.order_by("-created_at", "-id")
+
+    cursor = request.query_params.get("cursor")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    return queryset[:page_size + 1], page_size
+
+
+def split_page(rows, page_size):
+    """(rows, next_cursor) from the rows of a keyset_page()"""
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].pk)
+    return rows, next_cursor
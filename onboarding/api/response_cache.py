@@ -0,0 +1,123 @@
+"""
+Cached response data for the form lists nearly every page loads
+(available_forms and user_forms).
+
+Entries live in the default cache under a key that includes a generation
+number. Any change to a form, its tree or its assignments bumps the
+generation (see api.signal), which orphans every entry at once; orphans and
+live entries alike expire after RESPONSE_CACHE_SECONDS. With a shared cache
+backend an invalidation reaches every worker, with the default in-process
+one only the worker that made the change.
+
+Hits and misses are counted per endpoint in-process; see stats().
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY = "response-cache:generation"
+
+_stats = {}  # endpoint name -> [hits, misses]
+_lock = threading.Lock()
+
+
+def user_scope(user):
+    """
+    All admins share one entry; everyone else gets their own, keyed by role
+    too so a role change is a miss rather than a stale list.
+    """
+    if user.is_superuser and user.is_staff:
+        return "admins"
+    from .models import FormAssignment
+    return f"user:{user.pk}:{FormAssignment.group_for(user)}"
+
+
+def _new_generation():
+    # unique even if the old value was evicted, so entries from before can't come back
+    return time.time_ns()
+
+
+def _bump():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, _new_generation(), timeout=None)
+
+
+def invalidate():
+    """
+    Drop every cached response. Bumps now, and again once the transaction
+    commits in case another request re-cached the old rows in between.
+    """
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def _key(name, scope, generation):
+    return f"response-cache:{name}:{generation}:{scope}"
+
+
+def _record(name, hit):
+    with _lock:
+        counts = _stats.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+
+def _timeout():
+    return getattr(settings, "RESPONSE_CACHE_SECONDS", 300)
+
+
+def generation():
+    """Changes whenever invalidate() runs; also part of the list ETags (api.conditional)"""
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        cache.add(GENERATION_KEY, _new_generation(), timeout=None)
+        value = cache.get(GENERATION_KEY)
+    return value
+
+
+async def ageneration():
+    value = await cache.aget(GENERATION_KEY)
+    if value is None:
+        await cache.aadd(GENERATION_KEY, _new_generation(), timeout=None)
+        value = await cache.aget(GENERATION_KEY)
+    return value
+
+
+def cached(name, scope, build):
+    """Response data for endpoint `name` and `scope`, from the cache or from build()"""
+    key = _key(name, scope, generation())
+    data = cache.get(key)
+    _record(name, data is not None)
+    if data is None:
+        data = build()
+        cache.set(key, data, _timeout())
+    return data
+
+
+async def acached(name, scope, build):
+    """cached() for async views; build is a coroutine function"""
+    key = _key(name, scope, await ageneration())
+    data = await cache.aget(key)
+    _record(name, data is not None)
+    if data is None:
+        data = await build()
+        await cache.aset(key, data, _timeout())
+    return data
+
+
+def stats():
+    """{endpoint name: {"hits", "misses", "hit_rate"}} for this process"""
+    with _lock:
+        return {
+            name: {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 4)}
+            for name, (hits, misses) in sorted(_stats.items())
+        }
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,280 @@
+"""
+Full-text search over submissions: their answers, attachment file names and
+the submitter's name, username and email.
+
+Each submission has one document in api_submission_search, an FTS5 table
+on SQLite and a tsvector column with a GIN index on PostgreSQL (created by
+migration 0015). Documents are plain words, so both backends tokenize them
+the same way, and an email or an ID like "AB-1234" is searched for as the
+phrase of its parts.
+
+Saves schedule their submissions for indexing when the transaction commits
+(see api.signal), so a submission and its attachments are indexed once per
+transaction; deletes take documents out straight away. On other databases
+there is no index and searching raises NotSupportedError. Bulk inserts skip
+the signals and call index_submissions() themselves; `manage.py
+rebuild_search_index` rebuilds the whole table.
+"""
+import base64
+import binascii
+import re
+import threading
+
+from django.db import NotSupportedError, connection, transaction
+from rest_framework.exceptions import ValidationError
+
+TABLE = "api_submission_search"
+WORD = re.compile(r"\w+")
+MAX_TERMS = 16
+BATCH_SIZE = 500
+
+
+class SQLiteBackend:
+    key = "rowid"
+    # the last word of a search is a prefix, and without an index for its
+    # length FTS5 merges the doclist of every term it starts ("income"* over
+    # 200k documents: 80ms, against 7ms with one). These make the table about
+    # five times the size of the plain index.
+    create_sql = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+        f"document, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4 5 6 7 8')",
+    ]
+    drop_sql = [f"DROP TABLE IF EXISTS {TABLE}"]
+    insert_sql = f"INSERT INTO {TABLE} (rowid, document) VALUES (%s, %s)"
+    # bm25() is lower for better matches
+    match_sql = f"SELECT rowid AS id, bm25({TABLE}) AS score FROM {TABLE} WHERE {TABLE} MATCH %s"
+
+    @staticmethod
+    def query(phrases):
+        *complete, last = phrases
+        return " ".join([f'"{" ".join(words)}"' for words in complete] + [f'"{" ".join(last)}"*'])
+
+
+class PostgresBackend:
+    key = "submission_id"
+    create_sql = [
+        f"CREATE TABLE IF NOT EXISTS {TABLE} (submission_id bigint PRIMARY KEY, document tsvector NOT NULL)",
+        f"CREATE INDEX IF NOT EXISTS {TABLE}_idx ON {TABLE} USING GIN (document)",
+    ]
+    drop_sql = [f"DROP TABLE IF EXISTS {TABLE}"]
+    insert_sql = f"INSERT INTO {TABLE} (submission_id, document) VALUES (%s, to_tsvector('simple', %s))"
+    # negated so that, as with bm25(), lower is better
+    match_sql = (
+        f"SELECT submission_id AS id, -ts_rank_cd(document, query)::float8 AS score "
+        f"FROM {TABLE}, to_tsquery('simple', %s) AS query WHERE document @@ query"
+    )
+
+    @staticmethod
+    def query(phrases):
+        *complete, last = phrases
+        return " & ".join(
+            [f"({' <-> '.join(words)})" for words in complete] + [f"({' <-> '.join(last)}:*)"]
+        )
+
+
+BACKENDS = {"sqlite": SQLiteBackend, "postgresql": PostgresBackend}
+
+
+def backend(conn=None):
+    conn = conn or connection
+    try:
+        return BACKENDS[conn.vendor]
+    except KeyError:
+        raise NotSupportedError(f"Submission search is not available on {conn.vendor}.")
+
+
+def enabled(conn=None):
+    return (conn or connection).vendor in BACKENDS
+
+
+def create_table(conn=None):
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        for sql in backend(conn).create_sql:
+            cursor.execute(sql)
+
+
+def drop_table(conn=None):
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        for sql in backend(conn).drop_sql:
+            cursor.execute(sql)
+
+
+def phrases(text):
+    """
+    A search as phrases: the words of each whitespace-separated part,
+    lowercased, so "alice@acme.example" has to match as written rather than
+    as three words anywhere. At most MAX_TERMS words in all.
+    """
+    found, count = [], 0
+    for part in dict.fromkeys(text.lower().split()):
+        words = WORD.findall(part)[:MAX_TERMS - count]
+        if words:
+            found.append(tuple(words))
+            count += len(words)
+    return found
+
+
+def _values(value):
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _values(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _values(item)
+    elif value is not None:
+        yield str(value)
+
+
+def document(submission):
+    """
+    The words a submission is found by. Reads submission.attachments.all()
+    and submission.submitted_by, so prefetch and select them for many.
+    """
+    parts = list(_values(submission.data))
+    attachments = [attachment.name for attachment in submission.attachments.all()]
+    if not attachments and submission.file_upload:
+        # older submissions have only the single file column
+        attachments.append(submission.file_upload.name.rsplit("/", 1)[-1])
+    parts += attachments
+    user = submission.submitted_by
+    if user is not None:
+        parts += [user.first_name, user.last_name, user.username, user.email]
+    return " ".join(WORD.findall(" ".join(parts)))
+
+
+def _delete(cursor, ids):
+    placeholders = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"DELETE FROM {TABLE} WHERE {backend().key} IN ({placeholders})", ids)
+
+
+def index_submissions(ids, submissions=None):
+    """
+    (Re)write the documents of the submissions with these ids; ids that no
+    longer exist lose theirs. `submissions` is the queryset to read them from.
+    """
+    if submissions is None:
+        from .models import Submission
+        submissions = Submission.objects.all()
+    ids = sorted(set(ids))
+    insert_sql = backend().insert_sql
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        rows = (
+            submissions.filter(pk__in=batch)
+            .select_related("submitted_by").prefetch_related("attachments")
+            .only("id", "data", "file_upload", "submitted_by__first_name", "submitted_by__last_name",
+                  "submitted_by__username", "submitted_by__email")
+        )
+        documents = [(submission.pk, document(submission)) for submission in rows]
+        with transaction.atomic(), connection.cursor() as cursor:
+            _delete(cursor, batch)
+            cursor.executemany(insert_sql, documents)
+
+
+def remove(ids):
+    """Drop the documents of these submissions, in the current transaction"""
+    if not enabled():
+        return
+    ids = list(ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), BATCH_SIZE):
+            _delete(cursor, ids[start:start + BATCH_SIZE])
+
+
+def remove_form(form_id):
+    """Drop the documents of every submission of a form, in one statement"""
+    if not enabled():
+        return
+    from .models import Submission
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {TABLE} WHERE {backend().key} IN "
+            f"(SELECT id FROM {Submission._meta.db_table} WHERE form_id = %s)",
+            [form_id],
+        )
+
+
+def rebuild(submissions=None, log=None):
+    """Index every submission from scratch; returns how many"""
+    if submissions is None:
+        from .models import Submission
+        submissions = Submission.objects.all()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+    ids = list(submissions.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(ids), BATCH_SIZE * 20):
+        index_submissions(ids[start:start + BATCH_SIZE * 20], submissions)
+        if log:
+            log(f"indexed {min(start + BATCH_SIZE * 20, len(ids))}/{len(ids)}")
+    return len(ids)
+
+
+_pending = threading.local()
+
+
+def _flush():
+    ids = getattr(_pending, "ids", None)
+    if ids:
+        _pending.ids = set()
+        index_submissions(ids)
+
+
+def schedule(ids):
+    """
+    Index these submissions once the transaction commits. Every submission
+    saved in one transaction is indexed by a single pass; ids scheduled by
+    a transaction that rolled back go with the next one and are harmless.
+    """
+    if not enabled():
+        return
+    if not hasattr(_pending, "ids"):
+        _pending.ids = set()
+    _pending.ids.update(ids)
+    transaction.on_commit(_flush)
+
+
+def search(phrases, submissions, limit, after=None):
+    """
+    [(submission id, score)] of the best `limit` matches for `phrases` among
+    the `submissions` queryset, best first, after a (score, id) position.
+
+    Every match is scored and the database keeps the top `limit` (a bounded
+    sort, not a full one), so a page is the same whichever page came before
+    it. A word that is in most documents scores all of them; searches for a
+    name, an email or an ID match few.
+    """
+    db = backend()
+    matches = db.match_sql
+    params = [db.query(phrases)]
+    if submissions.query.where:
+        inner, inner_params = submissions.order_by().values("id").query.sql_with_params()
+        # a bare rowid IN (...) makes FTS5 look up the match once per id,
+        # seconds for a client with a few dozen submissions; +rowid filters
+        # the matches instead
+        matches += f" AND +{db.key} IN ({inner})"
+        params += inner_params
+    sql = f"SELECT id, score FROM ({matches}) matches"
+    if after is not None:
+        score, pk = after
+        sql += " WHERE (score > %s OR (score = %s AND id > %s))"
+        params += [score, score, pk]
+    sql += " ORDER BY score, id LIMIT %s"
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def encode_cursor(score, pk):
+    # repr() round-trips the float exactly
+    return base64.urlsafe_b64encode(f"{score!r}|{pk}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        score, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return float(score), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError({"cursor": ["Invalid cursor."]})
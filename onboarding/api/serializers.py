@@ -1,8 +1,28 @@
+from collections import Counter
+
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError, AuthenticationFailed
+from rest_framework.relations import MANY_RELATION_KWARGS
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models.functions import Lower
 import re
-from .models import Form, FormSection, FormField, FieldOption,Submission,Roles,FormAssignment
+from .models import Form, FormSection, FormField, FieldOption,Submission,SubmissionAttachment,UploadSession,Roles,FormAssignment
+from .uploads import remove_session_files
+from .utils import EmailService
+
+def check_password_strength(value):
+    if len(value) < 8:
+        raise serializers.ValidationError("Password must be at least 8 characters long.")
+    if not re.search(r'[A-Z]', value):
+        raise serializers.ValidationError("Password must contain at least one uppercase letter.")
+    if not re.search(r'[a-z]', value):
+        raise serializers.ValidationError("Password must contain at least one lowercase letter.")
+    if not re.search(r'[0-9]', value):
+        raise serializers.ValidationError("Password must contain at least one digit.")
+    return value
 
 class SignupSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -13,15 +33,7 @@ class SignupSerializer(serializers.ModelSerializer):
         fields = ['first_name', 'last_name', 'email', 'username', 'password', 'confirm_password']
 
     def validate_password(self, value):
-        if len(value) < 8:
-            raise serializers.ValidationError("Password must be at least 8 characters long.")
-        if not re.search(r'[A-Z]', value):
-            raise serializers.ValidationError("Password must contain at least one uppercase letter.")
-        if not re.search(r'[a-z]', value):
-            raise serializers.ValidationError("Password must contain at least one lowercase letter.")
-        if not re.search(r'[0-9]', value):
-            raise serializers.ValidationError("Password must contain at least one digit.")
-        return value
+        return check_password_strength(value)
 
     def validate(self, attrs):
         password = attrs.get('password')
@@ -65,6 +77,63 @@ class LoginSerializer(serializers.Serializer):
 
         return {'user': user}
 
+class UserImportListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        errors = {}
+        for key in ("username", "email"):
+            counts = Counter(item[key].lower() if key == "email" else item[key] for item in attrs)
+            duplicates = {value for value, count in counts.items() if count > 1}
+            if duplicates:
+                errors[key] = [f"Duplicate {key}s in payload: {', '.join(sorted(duplicates))}"]
+        if errors:
+            raise ValidationError(errors)
+
+        # auth_user.email keeps its case, so compare lowercased (api_user_email_lower_idx)
+        emails = {item["email"].lower() for item in attrs}
+        existing = set(
+            User.objects.annotate(email_lower=Lower("email"))
+            .filter(email_lower__in=emails).values_list("email", flat=True)
+        )
+        if existing:
+            errors["email"] = [f"Emails already exist: {', '.join(sorted(existing))}"]
+        existing = set(User.objects.filter(username__in=[item["username"] for item in attrs]).values_list("username", flat=True))
+        if existing:
+            errors["username"] = [f"Usernames already exist: {', '.join(sorted(existing))}"]
+        if errors:
+            raise ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        from .user_import import import_users
+        return import_users(validated_data, workers=self.context.get("workers"))
+
+
+class UserImportSerializer(serializers.Serializer):
+    """
+    One row of a bulk user import. Uniqueness is checked for the whole batch
+    with one query per column instead of two per user.
+    """
+    username = serializers.RegexField(r'^[\w.@+-]+\Z', max_length=150)
+    email = serializers.EmailField()
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default="")
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default="")
+    # blank gives the user an unusable password until they reset it
+    password = serializers.CharField(required=False, allow_blank=True, default="", write_only=True)
+    role = serializers.CharField(required=False, allow_blank=True, default="client")
+
+    class Meta:
+        list_serializer_class = UserImportListSerializer
+
+    def validate_password(self, value):
+        return check_password_strength(value) if value else value
+
+    def validate_role(self, value):
+        role = (value or "client").lower()
+        if role not in ("admin", "staff", "client"):
+            raise serializers.ValidationError("Role must be admin, staff or client.")
+        return role
+
+
 class UsersSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -101,12 +170,20 @@ class FormSectionSerializer(serializers.ModelSerializer):
         model = FormSection
         fields = ['id', 'title', 'description', 'order', 'fields']
 
+    @transaction.atomic
     def create(self, validated_data):
         fields_data = validated_data.pop('fields', [])
         section = FormSection.objects.create(**validated_data)
 
-        for field_data in fields_data:
-            FormField.objects.create(section=section, form=section.form, **field_data)
+        fields = FormField.objects.bulk_create([
+            FormField(section=section, form=section.form, **{k: v for k, v in field_data.items() if k != 'options'})
+            for field_data in fields_data
+        ])
+        FieldOption.objects.bulk_create([
+            FieldOption(field=field, **opt)
+            for field, field_data in zip(fields, fields_data)
+            for opt in field_data.get('options', [])
+        ])
         return section
 
 
@@ -117,44 +194,153 @@ class FormSerializer(serializers.ModelSerializer):
     class Meta:
         model = Form
         fields = [
-            'id', 'name', 'slug', 'description', 'schema', 'is_active', 'sections', 'fields'
+            'id', 'name', 'slug', 'description', 'schema_version', 'is_active', 'sections', 'fields'
         ]
-        read_only_fields = ['created_by']
+        read_only_fields = ['created_by', 'schema_version']
 
     def create(self, validated_data):
         request = self.context.get('request')
         user = request.user if request else None
 
-        sections_data = validated_data.pop('sections', [])
-        fields_data = validated_data.pop('fields', [])
-        form = Form.objects.create(created_by=user, **validated_data)
-        for section_data in sections_data:
-            fields_in_section = section_data.pop('fields', [])
-            section = FormSection.objects.create(form=form, **section_data)
-            for field_data in fields_in_section:
-                options_data = field_data.pop('options', [])
-                field = FormField.objects.create(form=form, section=section, **field_data)
-                for opt in options_data:
-                    FieldOption.objects.create(field=field, **opt)
-        for field_data in fields_data:
-            options_data = field_data.pop('options', [])
-            field = FormField.objects.create(form=form, **field_data)
-            for opt in options_data:
-                FieldOption.objects.create(field=field, **opt)
-
-        return form
-    
+        # One atomic bulk insert per level instead of a row at a time
+        return Form.objects.create_trees([validated_data], created_by=user)[0]
+
+
+class FormImportListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        slugs = [item['slug'] for item in attrs]
+        duplicates = {slug for slug in slugs if slugs.count(slug) > 1}
+        if duplicates:
+            raise ValidationError({"slug": [f"Duplicate slugs in payload: {', '.join(sorted(duplicates))}"]})
+        existing = set(Form.objects.filter(slug__in=slugs).values_list('slug', flat=True))
+        if existing:
+            raise ValidationError({"slug": [f"Slugs already exist: {', '.join(sorted(existing))}"]})
+        return attrs
+
+    def create(self, validated_data):
+        request = self.context.get('request')
+        user = request.user if request else None
+        return Form.objects.create_trees(validated_data, created_by=user)
+
+
+class FormImportSerializer(FormSerializer):
+    """
+    FormSerializer for bulk imports: slug uniqueness is checked for the whole
+    batch in one query instead of once per form.
+    """
+    slug = serializers.SlugField(max_length=255)
+
+    class Meta(FormSerializer.Meta):
+        list_serializer_class = FormImportListSerializer
+
+
+class FormBulkAssignmentSerializer(serializers.Serializer):
+    """
+    Assign many forms to groups and/or explicit users at once. Ids are
+    resolved with one query per model rather than one per item.
+    """
+    forms = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    groups = serializers.ListField(
+        child=serializers.ChoiceField(choices=["staff", "client"]), required=False, default=list
+    )
+    users = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    def _resolve(self, queryset, ids):
+        ids = list(dict.fromkeys(ids))
+        found = queryset.in_bulk(ids)
+        missing = [pk for pk in ids if pk not in found]
+        if missing:
+            raise ValidationError(f"Unknown ids: {', '.join(map(str, missing))}")
+        return [found[pk] for pk in ids]
+
+    def validate_forms(self, value):
+        return self._resolve(Form.objects.only("id", "name", "description"), value)
+
+    def validate_users(self, value):
+        return self._resolve(
+            User.objects.only("id", "username", "first_name", "email", "is_staff", "is_superuser"), value
+        )
+
+    def validate(self, attrs):
+        if not attrs.get("groups") and not attrs.get("users"):
+            raise ValidationError("Provide at least one group or user.")
+        return attrs
+
+    def create(self, validated_data):
+        request = self.context.get("request")
+        user = request.user if request else None
+        return FormAssignment.objects.bulk_assign(created_by=user, **validated_data)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    field = serializers.PrimaryKeyRelatedField(
+        queryset=FormField.objects.filter(field_type="file"), required=False, allow_null=True
+    )
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'field', 'filename', 'content_type', 'size', 'received', 'chunks', 'status', 'created_at']
+        read_only_fields = ['received', 'chunks', 'status', 'created_at']
+
+    def validate_size(self, value):
+        limit = getattr(settings, "UPLOAD_SESSION_MAX_BYTES", 500 * 1024 * 1024)
+        if value < 1 or value > limit:
+            raise ValidationError(f"Size must be between 1 and {limit} bytes.")
+        return value
+
+    def create(self, validated_data):
+        request = self.context.get('request')
+        return UploadSession.objects.create(user=request.user, **validated_data)
+
+
+class SubmissionAttachmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SubmissionAttachment
+        fields = ['id', 'field', 'name', 'size', 'content_type', 'file']
+
+
 class SubmissionSerializer(serializers.ModelSerializer):
     file_upload = serializers.FileField(required=False, allow_null=True)
+    attachments = SubmissionAttachmentSerializer(many=True, read_only=True)
     class Meta:
         model = Submission
-        fields = ['id', 'form', 'data','file_upload', 'created_at', 'updated_at', 'status']
+        fields = ['id', 'form', 'data','file_upload', 'attachments', 'created_at', 'updated_at', 'status']
         read_only_fields = ['created_at', 'updated_at', 'status']
 
+    @transaction.atomic
     def create(self, validated_data):
+        """
+        `attachments` is a list of (FormField id or None, uploaded file) pairs
+        passed to save(). Upload sessions are marked attached first, only
+        if they are still complete, so two submits can't both take one; their
+        files are linked into storage and the temp files removed on commit.
+        The first attachment also fills the legacy file_upload column,
+        pointing at the same stored file.
+        """
         request = self.context.get('request')
         user = request.user if request else None
-        return Submission.objects.create(submitted_by=user, **validated_data)
+        uploads = validated_data.pop('attachments', [])
+        sessions = [upload.session for _, upload in uploads if hasattr(upload, "session")]
+        if sessions:
+            attached = UploadSession.objects.filter(
+                pk__in=[session.pk for session in sessions], status=UploadSession.STATUS_COMPLETE,
+            ).update(status=UploadSession.STATUS_ATTACHED)
+            if attached != len(sessions):
+                raise ValidationError({"uploads": ["Uploads were attached to another submission."]})
+            paths = [session.temp_path for session in sessions]
+            transaction.on_commit(lambda: remove_session_files(paths))
+        submission = Submission.objects.create(submitted_by=user, **validated_data)
+        attachments = [
+            SubmissionAttachment.objects.create(
+                submission=submission, field_id=field_id, file=upload, name=upload.name,
+                size=upload.size, content_type=getattr(upload, "content_type", None) or "",
+            )
+            for field_id, upload in uploads
+        ]
+        if attachments and not submission.file_upload:
+            submission.file_upload.name = attachments[0].file.name
+            Submission.objects.filter(pk=submission.pk).update(file_upload=submission.file_upload.name)
+        return submission
     
     def to_representation(self, instance):
             data = super().to_representation(instance)
@@ -212,16 +398,68 @@ class SimpleFormSerializer(serializers.ModelSerializer):
         model = Form
         fields = ["id", "name"]
 
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """ManyRelatedField that looks every submitted key up in one query instead of one each"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+            try:
+                pks.append(queryset.model._meta.pk.to_python(item))
+            except DjangoValidationError:
+                child.fail('incorrect_type', data_type=type(item).__name__)
+        found = queryset.in_bulk(set(pks))
+        for pk in pks:
+            if pk not in found:
+                child.fail('does_not_exist', pk_value=pk)
+        return [found[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField whose many=True form resolves all keys at once"""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
 class FormAssignmentSerializer(serializers.ModelSerializer):
     form = serializers.PrimaryKeyRelatedField(queryset=Form.objects.all())
+    # explicit per-user assignments, on top of (or instead of) the group
+    users = BulkPrimaryKeyRelatedField(queryset=User.objects.all(), many=True, required=False)
 
     class Meta:
         model = FormAssignment
-        fields = ["id", "form", "group", "created_by", "created_at"]
+        fields = ["id", "form", "group", "users", "created_by", "created_at"]
         read_only_fields = ["created_by", "created_at"]
 
+    def validate(self, attrs):
+        if attrs.get("group") == "users" and not attrs.get("users"):
+            raise serializers.ValidationError({"users": "Select at least one user."})
+        return attrs
+
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get("request")
         user = request.user if request else None
+        users = validated_data.pop("users", [])
         assignment = FormAssignment.objects.create(created_by=user, **validated_data)
+        if users:
+            assignment.users.add(*users)
+            # group members were already notified by save()
+            extra = [u for u in users if FormAssignment.group_for(u) != assignment.group]
+            EmailService.send_form_assignment_email(assignment.form, extra, "users")
         return assignment
\ No newline at end of file
@@ -1,44 +1,20 @@
-from django.db.models.signals import m2m_changed, post_save
+from django.db.models import Count, QuerySet
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
-from django.core.mail import send_mail
-from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import FormAssignment, Submission
+from . import blobs, counters, metrics, response_cache, search
+from .authentication import invalidate_user
+from .form_schema import invalidate_form_schema
+from .models import Counter, FieldOption, Form, FormAssignment, FormField, FormSection, Submission, SubmissionAttachment
+from .utils import EmailService
 
 User = get_user_model()
 
 
-@receiver(m2m_changed, sender=FormAssignment.users.through)
-def send_form_assignment_email(sender, instance, action, pk_set, **kwargs):
-    """Send email when users are assigned to a form"""
-    if action == "post_add" and pk_set:
-        try:
-            added_users = instance.users.filter(pk__in=pk_set)
-            for user in added_users:
-                if user.email:
-                    send_mail(
-                        subject=f"New Form Assigned: {instance.form.name}",
-                        message=(
-                            f"Hello {user.first_name or user.username},\n\n"
-                            f"You have been assigned a new form: {instance.form.name}.\n"
-                            f"Description: {instance.form.description or 'No description provided'}\n\n"
-                            "Please login to our onboarding site and fill it as soon as possible.\n\n"
-                            "Thank you."
-                        ),
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[user.email],
-                        fail_silently=False,
-                    )
-                    print(f"✅ Assignment email sent to {user.email} for form '{instance.form.name}'")
-                else:
-                    print(f"⚠️ No email address for user {user.username}")
-        except Exception as e:
-            print(f"❌ Failed to send assignment email notifications: {e}")
-
-
 @receiver(post_save, sender=Submission)
 def notify_admins_on_submission(sender, instance, created, **kwargs):
-    """Notify all superuser+staff admins when a new submission is created"""
+    """Queue a notification for all superuser+staff admins when a new submission is created"""
     if created:
         try:
             admin_users = User.objects.filter(
@@ -77,15 +53,217 @@ Best regards,
 Customer Onboarding System
                     """.strip()
 
-                    send_mail(
+                    EmailService.queue_email(
                         subject=subject,
                         message=message,
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[admin.email],
-                        fail_silently=False,
+                        recipients=[admin.email],
                     )
-                    print(f"✅ Submission notification sent to admin: {admin.email}")
+                    print(f"✅ Submission notification queued for admin: {admin.email}")
             else:
                 print("ℹ️ No admin users with email addresses found to notify")
         except Exception as e:
-            print(f"❌ Failed to send submission notification emails: {e}")
+            print(f"❌ Failed to queue submission notification emails: {e}")
+
+
+def _deleting_form(origin):
+    """True when a delete cascades from a Form, so there is no schema left to invalidate"""
+    if isinstance(origin, QuerySet):
+        return origin.model is Form
+    return isinstance(origin, Form)
+
+
+@receiver(post_save, sender=Form)
+def invalidate_schema_on_form_save(sender, instance, created, **kwargs):
+    """Form attributes are part of the compiled schema"""
+    if not created:
+        invalidate_form_schema(pk=instance.pk)
+
+
+@receiver(post_save, sender=FormSection)
+@receiver(post_save, sender=FormField)
+@receiver(post_delete, sender=FormSection)
+@receiver(post_delete, sender=FormField)
+def invalidate_schema_on_tree_change(sender, instance, **kwargs):
+    """A section or field changed, so the owning form's compiled schema is stale"""
+    if _deleting_form(kwargs.get("origin")):
+        return
+    invalidate_form_schema(pk=instance.form_id)
+
+
+@receiver(post_save, sender=FieldOption)
+@receiver(post_delete, sender=FieldOption)
+def invalidate_schema_on_option_change(sender, instance, **kwargs):
+    """An option changed, so the compiled schema of the field's form is stale"""
+    if _deleting_form(kwargs.get("origin")):
+        return
+    invalidate_form_schema(fields__id=instance.field_id)
+
+
+@receiver(post_save, sender=Form)
+@receiver(post_save, sender=FormSection)
+@receiver(post_save, sender=FormField)
+@receiver(post_save, sender=FieldOption)
+@receiver(post_save, sender=FormAssignment)
+@receiver(post_delete, sender=Form)
+@receiver(post_delete, sender=FormSection)
+@receiver(post_delete, sender=FormField)
+@receiver(post_delete, sender=FieldOption)
+@receiver(post_delete, sender=FormAssignment)
+@receiver(m2m_changed, sender=FormAssignment.users.through)
+def invalidate_form_responses(sender, instance, **kwargs):
+    """available_forms / user_forms may now be different for anyone"""
+    if kwargs.get("action", "").startswith("pre_"):
+        return
+    if sender is not Form and _deleting_form(kwargs.get("origin")):
+        return  # the Form's own post_delete covers it
+    response_cache.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Role changes (RolesSerializer) and deletions (delete_user) take effect on the next request"""
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def count_user_created(sender, instance, created, **kwargs):
+    if created:
+        counters.increment("users")
+
+
+@receiver(post_delete, sender=User)
+def count_user_deleted(sender, instance, **kwargs):
+    counters.increment("users", delta=-1)
+    # their submissions are kept but no longer attributed to them
+    Counter.objects.filter(scope=Counter.SCOPE_SUBMITTER, object_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Form)
+def count_form_created(sender, instance, created, **kwargs):
+    if created:
+        counters.increment("forms")
+
+
+@receiver(post_delete, sender=Form)
+def count_form_deleted(sender, instance, **kwargs):
+    counters.increment("forms", delta=-1)
+    Counter.objects.filter(scope=Counter.SCOPE_FORM, object_id=instance.pk).delete()
+
+
+def _count_submission(instance, delta):
+    counters.increment("submissions", delta=delta)
+    counters.increment("submissions", Counter.SCOPE_FORM, instance.form_id, delta=delta)
+    if instance.submitted_by_id:
+        counters.increment("submissions", Counter.SCOPE_SUBMITTER, instance.submitted_by_id, delta=delta)
+
+
+# fields of a submission that pick its per-form and per-submitter counters
+COUNTED_SUBMISSION_FIELDS = {"form", "form_id", "submitted_by", "submitted_by_id"}
+
+
+@receiver(pre_save, sender=Submission)
+def remember_counted_submission(sender, instance, update_fields=None, **kwargs):
+    """Note which counters an existing submission is in, in case this save moves it"""
+    if instance._state.adding or (update_fields is not None and not COUNTED_SUBMISSION_FIELDS & set(update_fields)):
+        return
+    instance._counted_as = (
+        Submission.objects.filter(pk=instance.pk).values_list("form_id", "submitted_by_id").first()
+    )
+
+
+def _move_count(scope, old_id, new_id):
+    if old_id == new_id:
+        return
+    if old_id:
+        counters.increment("submissions", scope, old_id, delta=-1)
+    if new_id:
+        counters.increment("submissions", scope, new_id)
+
+
+@receiver(post_save, sender=Submission)
+def count_submission_saved(sender, instance, created, **kwargs):
+    if created:
+        _count_submission(instance, 1)
+        return
+    previous = instance.__dict__.pop("_counted_as", None)
+    if previous is not None:
+        form_id, submitted_by_id = previous
+        _move_count(Counter.SCOPE_FORM, form_id, instance.form_id)
+        _move_count(Counter.SCOPE_SUBMITTER, submitted_by_id, instance.submitted_by_id)
+
+
+@receiver(post_delete, sender=Submission)
+def count_submission_deleted(sender, instance, **kwargs):
+    if _deleting_form(kwargs.get("origin")):
+        return  # uncount_form_submissions took them off already
+    _count_submission(instance, -1)
+
+
+@receiver(pre_delete, sender=Form)
+def uncount_form_submissions(sender, instance, **kwargs):
+    """
+    Take a deleted form's submissions off the counters in one pass rather
+    than three updates per cascaded submission. The form's own counter goes
+    with count_form_deleted.
+    """
+    totals = dict(
+        Submission.objects.filter(form=instance).order_by()
+        .values("submitted_by_id").annotate(total=Count("id")).values_list("submitted_by_id", "total")
+    )
+    if totals:
+        counters.increment("submissions", delta=-sum(totals.values()))
+        totals.pop(None, None)
+        counters.decrement_many("submissions", Counter.SCOPE_SUBMITTER, totals)
+
+
+@receiver(post_delete, sender=SubmissionAttachment)
+def release_attachment_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        blobs.release(instance.blob_id)
+
+
+# fields of a user that go into their submissions' search documents
+SEARCHED_USER_FIELDS = {"first_name", "last_name", "username", "email"}
+
+
+@receiver(post_save, sender=Submission)
+def index_submission(sender, instance, **kwargs):
+    search.schedule([instance.pk])
+
+
+@receiver(post_save, sender=SubmissionAttachment)
+def index_attachment_name(sender, instance, **kwargs):
+    search.schedule([instance.submission_id])
+
+
+@receiver(post_delete, sender=Submission)
+def unindex_submission(sender, instance, **kwargs):
+    if _deleting_form(kwargs.get("origin")):
+        return  # unindex_form_submissions did it
+    search.remove([instance.pk])
+
+
+@receiver(pre_delete, sender=Form)
+def unindex_form_submissions(sender, instance, **kwargs):
+    search.remove_form(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def reindex_user_submissions(sender, instance, created, update_fields=None, **kwargs):
+    """A submitter's name or email changed; logins only touch last_login"""
+    if created or (update_fields is not None and not SEARCHED_USER_FIELDS & set(update_fields)):
+        return
+    search.schedule(Submission.objects.filter(submitted_by=instance).values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=User)
+def reindex_deleted_user_submissions(sender, instance, **kwargs):
+    """Their submissions are kept, without their name (submitted_by is SET_NULL)"""
+    search.schedule(Submission.objects.filter(submitted_by=instance).values_list("pk", flat=True))
+
+
+@receiver(connection_created)
+def time_sql_for_metrics(sender, connection, **kwargs):
+    """Lets MetricsMiddleware count and time each request's SQL"""
+    metrics.install_sql_wrapper(connection)
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+HASH_CHUNK = 256 * 1024
+
+
+def file_digest(content):
+    """
+    SHA-256 of an uploaded file. StreamingUploadHandler and upload sessions
+    attach it as `sha256` while the bytes arrive; anything else is read once here.
+    """
+    digest = getattr(content, "sha256", None)
+    if digest:
+        return digest
+    sha = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK):
+        sha.update(chunk)
+    content.seek(0)
+    content.sha256 = sha.hexdigest()
+    return content.sha256
+
+
+def blob_name(digest, filename=""):
+    """blobs/ab/cd/abcd...<ext>: fanned out so no directory gets huge"""
+    extension = os.path.splitext(filename)[1].lower()[:16]
+    return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each file under its SHA-256, so identical uploads share one file on
+    disk. Saving content that is already stored skips the write entirely.
+    Files are written under a temporary name and renamed into place, so a
+    name that exists always holds the complete bytes. Content with a
+    link_path() (upload sessions) is hard-linked instead of copied, leaving
+    the source in place. Reference counts live in api.Blob; only delete
+    through api.blobs.
+    """
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, "chunks"):
+            return super().save(name, content, max_length)
+        target = blob_name(file_digest(content), name or getattr(content, "name", ""))
+        if self.exists(target):
+            return target
+        return self._save(target, content)
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        temp_name = os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+        try:
+            if not (hasattr(content, "link_path") and self._link(content.link_path(), temp_name)):
+                super()._save(temp_name, content)
+            # replacing a file a concurrent save just renamed in is harmless:
+            # the same name always means the same bytes
+            os.replace(self.path(temp_name), self.path(name))
+        except BaseException:
+            self.delete(temp_name)
+            raise
+        return name
+
+    def _link(self, source, name):
+        """Hard-link `source` in as `name`; False when they are on different filesystems"""
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(source, path)
+        except OSError:
+            return False
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        return True
+
+    def get_available_name(self, name, max_length=None):
+        # the same name always means the same bytes, so never pick another one
+        if self.exists(name):
+            raise FileExistsError(name)
+        return name
+
+
+blob_storage = ContentAddressedStorage()
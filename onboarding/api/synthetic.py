@@ -0,0 +1,219 @@
+"""
+Synthetic data at production-like volumes, for load tests and the endpoint
+benchmarks (`manage.py generate_data`, api/benchmarks/endpoints.py).
+
+Rows are written with bulk_create in batches, which skips signals, so
+submissions are indexed for search batch by batch, and the counters are
+rebuilt and the response cache invalidated at the end. Every generated
+username, email and slug starts with `prefix`, so runs with different
+prefixes can share a database.
+"""
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters, response_cache, search
+from .models import Form, FormAssignment, Roles, Submission
+
+WORDS = (
+    "account address annual bank branch business city company contact country customer "
+    "date deposit details document employer employment income identity investment loan "
+    "monthly name national number office payment personal phone postal purpose reference "
+    "residence salary source status tax total type wealth"
+).split()
+
+# field_type -> validation rules; choice fields also get options
+FIELD_KINDS = [
+    ("text", {"max_length": 120}),
+    ("email", {}),
+    ("number", {"min": 0, "max": 1_000_000}),
+    ("date", {"min": "1940-01-01", "max": "2030-12-31"}),
+    ("select", {}),
+    ("radio", {}),
+    ("checkbox", {"max": 3}),
+    ("textarea", {"max_length": 2000}),
+]
+CHOICE_KINDS = {"select", "radio", "checkbox"}
+STATUSES = ["submitted", "submitted", "submitted", "approved", "rejected"]
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def form_definition(rng, index, prefix, sections=3, fields_per_section=8, options=4):
+    """A FormSerializer-shaped definition, as accepted by Form.objects.create_trees"""
+    kinds = iter(rng.sample(FIELD_KINDS * (sections * fields_per_section // len(FIELD_KINDS) + 1),
+                            sections * fields_per_section))
+    section_data = []
+    for s in range(sections):
+        fields = []
+        for f in range(fields_per_section):
+            field_type, rules = next(kinds)
+            fields.append({
+                "name": f"s{s}_f{f}_{field_type}",
+                "label": _words(rng, 2).capitalize(),
+                "field_type": field_type,
+                "order": f,
+                "required": rng.random() < 0.3,
+                "multiple": field_type == "checkbox",
+                "validation": dict(rules),
+                "options": [
+                    {"value": f"opt{o}", "label": _words(rng, 1).capitalize(), "order": o}
+                    for o in range(options)
+                ] if field_type in CHOICE_KINDS else [],
+            })
+        section_data.append({"title": _words(rng, 2).capitalize(), "order": s, "fields": fields})
+    return {
+        "name": f"{_words(rng, 2).capitalize()} form {index}",
+        "slug": f"{prefix}-form-{index}",
+        "description": _words(rng, 12),
+        "sections": section_data,
+    }
+
+
+def field_specs(definition):
+    """[(name, field_type, option values)] for answers()"""
+    return [
+        (field["name"], field["field_type"], [o["value"] for o in field.get("options", [])])
+        for section in definition.get("sections", [])
+        for field in section["fields"]
+    ] + [
+        (field["name"], field["field_type"], [o["value"] for o in field.get("options", [])])
+        for field in definition.get("fields", [])
+    ]
+
+
+def answers(rng, specs):
+    """A submission payload that passes the form's validator"""
+    data = {}
+    for name, field_type, values in specs:
+        if field_type == "email":
+            data[name] = f"{rng.choice(WORDS)}{rng.randrange(10_000)}@example.com"
+        elif field_type == "number":
+            data[name] = str(rng.randrange(1_000_000))
+        elif field_type == "date":
+            data[name] = (date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 70))).isoformat()
+        elif field_type == "checkbox":
+            data[name] = rng.sample(values, rng.randint(1, min(3, len(values))))
+        elif field_type in CHOICE_KINDS:
+            data[name] = rng.choice(values)
+        elif field_type == "textarea":
+            data[name] = _words(rng, rng.randint(10, 40))
+        elif field_type != "file":
+            data[name] = _words(rng, rng.randint(1, 4))
+    return data
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(forms=2_000, users=100_000, submissions=2_000_000, sections=3, fields_per_section=8,
+             options=4, staff_ratio=0.05, explicit_ratio=0.1, explicit_users=20, days=365,
+             prefix="synth", password="Password123", seed=0, batch_size=5_000, log=None):
+    """
+    Create an admin, `users` users (`staff_ratio` of them staff), `forms`
+    forms with their trees, group assignments for every form plus explicit
+    users on `explicit_ratio` of them, and `submissions` submissions by
+    clients spread over the last `days` days. Returns what it made.
+    All users share `password`, hashed once.
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    hashed = make_password(password)
+    now = timezone.now()
+
+    with transaction.atomic():
+        admin = User.objects.create_superuser(
+            username=f"{prefix}-admin", email=f"{prefix}-admin@example.com", password=password,
+        )
+        Roles.objects.create(userid=admin, role="admin")
+
+    staff_count = int(users * staff_ratio)
+    created = 0
+    for batch in _batches(range(users), batch_size):
+        with transaction.atomic():
+            rows = User.objects.bulk_create([
+                User(
+                    username=f"{prefix}-user-{i}", email=f"{prefix}-user-{i}@example.com",
+                    first_name=rng.choice(WORDS).capitalize(), last_name=rng.choice(WORDS).capitalize(),
+                    password=hashed, is_staff=i < staff_count,
+                )
+                for i in batch
+            ])
+            Roles.objects.bulk_create([Roles(userid=u, role="staff" if u.is_staff else "client") for u in rows])
+        created += len(rows)
+        log(f"users: {created}/{users}")
+    user_ids = list(User.objects.filter(username__startswith=f"{prefix}-user-").values_list("id", "is_staff"))
+    client_ids = [pk for pk, is_staff in user_ids if not is_staff]
+
+    specs = {}
+    for batch in _batches(range(forms), max(1, batch_size // (sections * fields_per_section * 3))):
+        definitions = [form_definition(rng, i, prefix, sections, fields_per_section, options) for i in batch]
+        for form, definition in zip(Form.objects.create_trees(definitions, created_by=admin), definitions):
+            specs[form.pk] = field_specs(definition)
+        log(f"forms: {len(specs)}/{forms}")
+
+    Through = FormAssignment.users.through
+    with transaction.atomic():
+        assignments = FormAssignment.objects.bulk_create([
+            FormAssignment(form_id=form_id, group=group, created_by=admin)
+            for form_id in specs
+            for group in rng.choice([["client"], ["client"], ["staff"], ["client", "staff"]])
+        ], batch_size=batch_size)
+        holders = FormAssignment.objects.bulk_create([
+            FormAssignment(form_id=form_id, group="users", created_by=admin)
+            for form_id in specs if rng.random() < explicit_ratio
+        ], batch_size=batch_size)
+        explicit = [
+            Through(formassignment_id=holder.pk, user_id=user_id)
+            for holder in holders
+            for user_id in rng.sample([pk for pk, _ in user_ids], min(explicit_users, len(user_ids)))
+        ]
+        Through.objects.bulk_create(explicit, batch_size=batch_size, ignore_conflicts=True)
+    log(f"assignments: {len(assignments) + len(holders)} (+{len(explicit)} explicit users)")
+
+    form_ids = list(specs)
+    made = 0
+    for batch in _batches(range(submissions), batch_size):
+        rows = []
+        for _ in batch:
+            form_id = rng.choice(form_ids)
+            rows.append(Submission(
+                form_id=form_id,
+                submitted_by_id=rng.choice(client_ids) if client_ids else None,
+                data=answers(rng, specs[form_id]),
+                status=rng.choice(STATUSES),
+                created_at=now - timedelta(seconds=rng.randrange(days * 86_400)),
+            ))
+        Submission.objects.bulk_create(rows)
+        # bulk_create skips the signals that index them
+        search.index_submissions([row.pk for row in rows])
+        made += len(rows)
+        if made % (batch_size * 20) == 0 or made == submissions:
+            log(f"submissions: {made}/{submissions}")
+
+    counters.recount()
+    response_cache.invalidate()
+    return {
+        "admin": admin.username,
+        "users": len(user_ids),
+        "staff": staff_count,
+        "forms": len(specs),
+        "fields": sum(len(s) for s in specs.values()),
+        "assignments": len(assignments) + len(holders),
+        "explicit_users": len(explicit),
+        "submissions": made,
+    }
@@ -0,0 +1,83 @@
+"""
+Query budgets: the most SQL statements an endpoint may run, checked at
+several fixture sizes so an N+1 shows up as soon as it is introduced.
+
+    class TestBudgets(QueryBudgetMixin, APITestCase):
+
+        @query_budget("user-forms", "GET", 7)
+        def test_user_forms(self, size):
+            build_forms(size, 4)          # fixtures for this size
+            self.client.force_authenticate(self.admin)
+            return lambda: self.client.get(reverse("user-forms"))
+
+The decorated method becomes the test. For every size in SIZES it sets
+up the fixtures in a transaction that is rolled back afterwards, clears
+the in-process caches, then runs the returned request once and counts its
+queries. The test fails if any count is over the budget, if the counts
+differ between sizes, or if the request didn't succeed.
+"""
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import clear_user_cache
+from api.form_schema import clear_form_schema_cache
+from api.validation import clear_validator_cache
+
+SIZES = (1, 100)
+
+
+def query_budget(route, method, queries, sizes=SIZES):
+    """Make `setup(self, size) -> request` a test that `route`'s `method` stays within `queries`"""
+    def decorator(setup):
+        def test(self):
+            self.assertQueryBudget(queries, setup, sizes)
+        test.__name__ = test.__qualname__ = setup.__name__
+        test.__doc__ = f"{method} {route} runs at most {queries} queries, whatever the fixture size"
+        test.query_budget = (route, method)
+        return test
+    return decorator
+
+
+def budgeted_routes(test_case):
+    """{(route, method)} covered by the @query_budget tests of a TestCase class"""
+    return {
+        getattr(attr, "query_budget")
+        for attr in vars(test_case).values()
+        if hasattr(attr, "query_budget")
+    }
+
+
+class QueryBudgetMixin:
+
+    def clear_caches(self):
+        cache.clear()
+        clear_user_cache()
+        clear_form_schema_cache()
+        clear_validator_cache()
+
+    def assertQueryBudget(self, queries, setup, sizes=SIZES):
+        counts = {}
+        for size in sizes:
+            with transaction.atomic():
+                request = setup(self, size)
+                self.clear_caches()
+                with CaptureQueriesContext(connection) as ctx:
+                    response = request()
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                transaction.set_rollback(True)
+            self.assertLess(
+                response.status_code, 400,
+                f"size {size}: {response.status_code} {getattr(response, 'data', '')}",
+            )
+            counts[size] = len(ctx.captured_queries)
+            self.assertLessEqual(
+                counts[size], queries,
+                f"size {size}: {counts[size]} queries, over the budget of {queries}:\n"
+                + "\n".join(q["sql"] for q in ctx.captured_queries),
+            )
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f"query count grows with the fixtures (size: queries): {counts}",
+        )
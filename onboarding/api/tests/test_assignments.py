@@ -0,0 +1,152 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.models import EmailFanout, EmailOutbox, Form, FormAssignment
+from api.utils import EmailService
+
+
+class TestRuleBasedAssignments(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.staff = User.objects.create_user(username="staff", email="staff@example.com", is_staff=True)
+        self.client_user = User.objects.create_user(username="client", email="client@example.com")
+        self.kyc = Form.objects.create(name="KYC", slug="kyc")
+        self.tax = Form.objects.create(name="Tax", slug="tax")
+
+    def visible(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse("user-forms"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {form["slug"] for form in response.data}
+
+    def test_creation_writes_no_membership_rows(self):
+        """
+        A group assignment is one row; members are resolved when forms are listed.
+        """
+        User.objects.bulk_create([User(username=f"c{i}", email=f"c{i}@example.com") for i in range(50)])
+        assignment = FormAssignment.objects.create(form=self.kyc, group="client", created_by=self.admin)
+        self.assertEqual(assignment.users.count(), 0)
+        # everyone in the group is still notified, by the outbox worker
+        self.assertEqual(EmailOutbox.objects.count(), 0)
+        self.assertEqual(EmailService.expand_fanouts(), 51)
+
+    def test_users_who_join_later_see_group_forms(self):
+        FormAssignment.objects.create(form=self.kyc, group="client")
+        FormAssignment.objects.create(form=self.tax, group="staff")
+        late = User.objects.create_user(username="late", email="late@example.com")
+        self.assertEqual(self.visible(late), {"kyc"})
+        self.assertEqual(self.visible(self.staff), {"tax"})
+
+    def test_role_change_moves_user_between_groups(self):
+        FormAssignment.objects.create(form=self.kyc, group="client")
+        FormAssignment.objects.create(form=self.tax, group="staff")
+        self.client_user.is_staff = True
+        self.client_user.save()
+        self.assertEqual(self.visible(self.client_user), {"tax"})
+
+    def test_explicit_users_are_added_to_the_group(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(reverse("assign-form"), {
+            "form": self.kyc.id, "group": "users", "users": [self.staff.id],
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(self.visible(self.staff), {"kyc"})
+        self.assertEqual(self.visible(self.client_user), set())
+        self.assertEqual(list(EmailOutbox.objects.values_list("to_email", flat=True)), ["staff@example.com"])
+
+    def test_selected_users_group_requires_users(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(reverse("assign-form"), {"form": self.kyc.id, "group": "users"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_or_malformed_users_are_rejected(self):
+        self.client.force_authenticate(self.admin)
+        for users, message in (([self.staff.id, 99999], "object does not exist"), (["abc"], "Incorrect type")):
+            response = self.client.post(reverse("assign-form"), {
+                "form": self.kyc.id, "group": "users", "users": users,
+            }, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(message, str(response.data["users"]))
+        self.assertFalse(FormAssignment.objects.exists())
+
+
+class TestBulkAssignment(APITestCase):
+
+    def setUp(self):
+        self.url = reverse("assign-forms-bulk")
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.staff = User.objects.create_user(username="staff", email="staff@example.com", is_staff=True)
+        self.clients = User.objects.bulk_create([
+            User(username=f"client{i}", email=f"client{i}@example.com") for i in range(5)
+        ])
+        self.forms = [Form.objects.create(name=f"Form {i}", slug=f"form-{i}") for i in range(4)]
+        self.client.force_authenticate(self.admin)
+
+    def post(self, payload):
+        return self.client.post(self.url, payload, format="json")
+
+    def test_one_digest_per_user(self):
+        """
+        Four forms for the client group plus the staff user: five rows and one email each.
+        """
+        response = self.post({
+            "forms": [f.id for f in self.forms], "groups": ["client"], "users": [self.staff.id],
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data, {"assignments": 8, "users": 4})
+        # the explicit user's digest is queued now, the group's by the worker
+        self.assertEqual(list(EmailOutbox.objects.values_list("to_email", flat=True)), ["staff@example.com"])
+        self.assertEqual(EmailService.expand_fanouts(), 5)
+        self.assertEqual(EmailOutbox.objects.count(), 6)
+        self.assertEqual(EmailOutbox.objects.filter(to_email="staff@example.com").get().subject, "4 New Form Assignments")
+        self.assertEqual(
+            set(EmailOutbox.objects.exclude(to_email="staff@example.com").values_list("subject", flat=True)),
+            {"4 New Form Assignments"},
+        )
+        self.assertEqual(FormAssignment.users.through.objects.count(), 4)
+
+    def test_existing_assignments_are_skipped(self):
+        FormAssignment.objects.create(form=self.forms[0], group="client")
+        EmailOutbox.objects.all().delete()
+        response = self.post({
+            "forms": [self.forms[0].id, self.forms[1].id],
+            "groups": ["client"],
+            # clients already see both forms through the group
+            "users": [self.clients[0].id],
+        })
+        self.assertEqual(response.data, {"assignments": 1, "users": 0})
+        self.assertEqual(EmailFanout.objects.filter(kind=EmailFanout.KIND_DIGEST).get().forms, [self.forms[1].id])
+        self.assertEqual(FormAssignment.objects.filter(group="client").count(), 2)
+
+        again = self.post({"forms": [self.forms[1].id], "groups": ["client"], "users": [self.staff.id]})
+        self.post({"forms": [self.forms[1].id], "users": [self.staff.id]})
+        self.assertEqual(again.data["assignments"], 1)
+        self.assertEqual(FormAssignment.users.through.objects.count(), 1)
+
+    def test_query_count_does_not_grow_with_forms_or_members(self):
+        ids = [f.id for f in self.forms]
+        with self.assertNumQueries(11):
+            self.post({"forms": ids[:2], "groups": ["staff"], "users": [self.clients[0].id]})
+        User.objects.bulk_create([User(username=f"staff{i}", is_staff=True) for i in range(20)])
+        with self.assertNumQueries(11):
+            self.post({"forms": ids[2:], "groups": ["staff"], "users": [self.clients[1].id]})
+
+    def test_unknown_ids_are_rejected(self):
+        response = self.post({"forms": [self.forms[0].id, 999], "groups": ["staff"]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("forms", response.data)
+        self.assertFalse(FormAssignment.objects.exists())
+
+    def test_admin_only(self):
+        self.client.force_authenticate(self.clients[0])
+        response = self.post({"forms": [self.forms[0].id], "groups": ["staff"]})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
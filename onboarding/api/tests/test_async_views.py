@@ -0,0 +1,84 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import resolve, reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import counters
+from api.authentication import UserRefreshToken, clear_user_cache
+from api.models import Form, FormAssignment, Submission
+
+ASYNC_ENDPOINTS = ["me_api", "count-users", "count-forms", "count-submissions", "available-forms", "user-forms", "submissions"]
+
+
+class TestAsyncViews(APITestCase):
+    """The async views (served under ASGI) answer exactly like the sync ones"""
+
+    def setUp(self):
+        clear_user_cache()
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="Password123")
+        kyc = Form.objects.create(name="KYC", slug="kyc")
+        Form.objects.create(name="Tax", slug="tax", is_active=False)
+        FormAssignment.objects.create(form=kyc, group="client", created_by=self.admin)
+        for i in range(3):
+            Submission.objects.create(form=kyc, submitted_by=self.alice, data={"n": i})
+        Submission.objects.create(form=kyc, submitted_by=self.admin)
+        counters.recount()
+
+    def headers(self, user):
+        return {"Authorization": f"Bearer {UserRefreshToken.for_user(user).access_token}"}
+
+    def get_async(self, path, **headers):
+        with override_settings(ROOT_URLCONF="onboarding.asgi_urls"):
+            return async_to_sync(self.async_client.get)(path, headers=headers)
+
+    def test_async_responses_match_sync(self):
+        for user in (self.admin, self.alice):
+            for name in ASYNC_ENDPOINTS:
+                path = reverse(name)
+                expected = self.client.get(path, headers=self.headers(user), HTTP_ACCEPT="application/json")
+                response = self.get_async(path, **self.headers(user))
+                self.assertEqual(response.status_code, status.HTTP_200_OK, (name, response.content))
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertEqual(response.json(), expected.json(), (user.username, name))
+
+    def test_submissions_are_paginated(self):
+        response = self.get_async(reverse("submissions") + "?limit=2", **self.headers(self.alice))
+        page = response.json()
+        self.assertEqual([row["data"]["n"] for row in page["results"]], [2, 1])
+        self.assertTrue(page["next"].startswith("http://testserver/onboarding/submissions/?"))
+
+        response = self.get_async(f"{reverse('submissions')}?limit=2&cursor={page['next_cursor']}", **self.headers(self.alice))
+        self.assertEqual([row["data"]["n"] for row in response.json()["results"]], [0])
+
+    def test_requires_authentication(self):
+        response = self.get_async(reverse("me_api"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("detail", response.json())
+        self.assertTrue(response.has_header("WWW-Authenticate"))
+
+        response = self.get_async(reverse("me_api"), Authorization="Bearer not-a-token")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bad_query_parameter_is_a_400(self):
+        response = self.get_async(reverse("submissions") + "?limit=x", **self.headers(self.alice))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {"limit": ["Must be an integer."]})
+
+    def test_other_paths_fall_through_to_sync_views(self):
+        for name in ASYNC_ENDPOINTS:
+            self.assertTrue(iscoroutinefunction(resolve(reverse(name), urlconf="onboarding.asgi_urls").func), name)
+        response = self.get_async(reverse("dashboard"), **self.headers(self.alice))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["counts"], {"submissions": 3})
+
+    def test_conditional_get(self):
+        for name in ("user-forms", "available-forms", "submissions"):
+            response = self.get_async(reverse(name), **self.headers(self.alice))
+            revalidated = self.get_async(reverse(name), **self.headers(self.alice), If_None_Match=response["ETag"])
+            self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED, name)
@@ -0,0 +1,60 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import UserRefreshToken, clear_user_cache
+
+
+class TestCachedJWTAuthentication(APITestCase):
+
+    def setUp(self):
+        clear_user_cache()
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="Password123")
+
+    def login_as(self, user):
+        token = UserRefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_tokens_carry_profile_claims(self):
+        response = self.client.post(reverse("login"), {"email": "alice@example.com", "password": "Password123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        claims = AccessToken(response.data["access"])
+        self.assertEqual(
+            (claims["username"], claims["email"], claims["is_staff"], claims["is_superuser"]),
+            ("alice", "alice@example.com", False, False),
+        )
+
+    def test_warm_requests_skip_the_user_query(self):
+        self.login_as(self.alice)
+        with self.assertNumQueries(1):
+            self.client.get(reverse("me_api"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("me_api"))
+        self.assertEqual(response.data["username"], "alice")
+
+    def test_role_change_takes_effect_on_next_request(self):
+        self.login_as(self.alice)
+        self.assertFalse(self.client.get(reverse("me_api")).data["is_staff"])
+
+        self.login_as(self.admin)
+        response = self.client.post(reverse("roles-list"), {"userid": self.alice.id, "role": "staff"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        self.login_as(self.alice)
+        self.assertTrue(self.client.get(reverse("me_api")).data["is_staff"])
+
+    def test_deleted_user_is_rejected(self):
+        self.login_as(self.alice)
+        self.client.get(reverse("me_api"))
+
+        self.login_as(self.admin)
+        self.client.delete(reverse("delete-user", args=[self.alice.id]))
+
+        self.login_as(self.alice)
+        self.assertEqual(self.client.get(reverse("me_api")).status_code, status.HTTP_401_UNAUTHORIZED)
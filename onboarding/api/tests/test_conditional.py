@@ -0,0 +1,94 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.form_schema import clear_form_schema_cache
+from api.models import FieldOption, Form, FormAssignment, FormField, Submission
+
+
+class TestConditionalGet(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        clear_form_schema_cache()
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com")
+        self.kyc = Form.objects.create(name="KYC", slug="kyc")
+        self.field = FormField.objects.create(form=self.kyc, name="country", label="Country", field_type="select")
+        FieldOption.objects.create(field=self.field, value="ke", label="Kenya")
+        FormAssignment.objects.create(form=self.kyc, group="client", created_by=self.admin)
+        Submission.objects.create(form=self.kyc, submitted_by=self.alice, data={"country": "ke"})
+        self.client.force_authenticate(self.alice)
+
+    def revalidate(self, url, response, **headers):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], **headers)
+
+    def test_form_detail(self):
+        url = reverse("form-detail", args=[self.kyc.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        with self.assertNumQueries(1):
+            not_modified = self.revalidate(url, response)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+        self.assertEqual(not_modified.content, b"")
+
+        since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(since.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # a change deep in the tree is a new version of the form
+        FieldOption.objects.create(field=self.field, value="ug", label="Uganda")
+        changed = self.revalidate(url, response)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(changed["ETag"], response["ETag"])
+        self.assertEqual(len(changed.data["fields"][0]["options"]), 2)
+
+    def test_form_lists(self):
+        for name in ("user-forms", "available-forms"):
+            url = reverse(name)
+            response = self.client.get(url)
+            self.assertEqual(self.revalidate(url, response).status_code, status.HTTP_304_NOT_MODIFIED, name)
+
+            tax = Form.objects.create(name=f"Tax {name}", slug=f"tax-{name}")
+            FormAssignment.objects.create(form=tax, group="client", created_by=self.admin)
+            changed = self.revalidate(url, response)
+            self.assertEqual(changed.status_code, status.HTTP_200_OK, name)
+            self.assertEqual(len(changed.data), len(response.data) + 1)
+
+    def test_unassigning_a_form_changes_the_etag(self):
+        url = reverse("user-forms")
+        response = self.client.get(url)
+        FormAssignment.objects.filter(form=self.kyc).delete()
+        changed = self.revalidate(url, response)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data, [])
+
+    def test_submissions(self):
+        url = reverse("submissions")
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, response).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        submission = Submission.objects.get()
+        submission.status = "approved"
+        submission.save()
+        self.assertEqual(self.revalidate(url, response).status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url)
+        submission.delete()
+        self.assertEqual(self.revalidate(url, response).status_code, status.HTTP_200_OK)
+
+    def test_etags_are_per_user(self):
+        url = reverse("submissions")
+        response = self.client.get(url)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.revalidate(url, response).status_code, status.HTTP_200_OK)
+        self.assertIn("Authorization", response["Vary"])
@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api import counters
+from api.models import Counter, Form, Submission
+
+
+class TestCounters(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.alice = User.objects.create_user(username="alice", password="Password123")
+        self.kyc = Form.objects.create(name="KYC", slug="kyc")
+        self.tax = Form.objects.create(name="Tax", slug="tax")
+
+    def submission_counts(self):
+        return counters.get_counts(
+            ("submissions", Counter.SCOPE_GLOBAL, 0),
+            ("submissions", Counter.SCOPE_FORM, self.kyc.pk),
+            ("submissions", Counter.SCOPE_SUBMITTER, self.alice.pk),
+        )
+
+    def test_signals_keep_counts_in_step(self):
+        self.assertEqual(counters.get_count("users"), 2)
+        self.assertEqual(counters.get_count("forms"), 2)
+
+        first = Submission.objects.create(form=self.kyc, submitted_by=self.alice)
+        Submission.objects.create(form=self.kyc, submitted_by=self.alice)
+        Submission.objects.create(form=self.tax, submitted_by=self.admin)
+        self.assertEqual(self.submission_counts(), [3, 2, 2])
+
+        first.delete()
+        self.assertEqual(self.submission_counts(), [2, 1, 1])
+
+        self.kyc.delete()
+        self.assertEqual(counters.get_count("forms"), 1)
+        self.assertEqual(self.submission_counts(), [1, 0, 0])
+
+        self.alice.delete()
+        self.assertEqual(counters.get_count("users"), 1)
+
+    def test_deleting_a_form_uncounts_each_submitter(self):
+        bob = User.objects.create_user(username="bob", password="Password123")
+        for user in (self.alice, self.alice, bob, None):
+            Submission.objects.create(form=self.kyc, submitted_by=user)
+        Submission.objects.create(form=self.tax, submitted_by=bob)
+
+        self.kyc.delete()
+        self.assertEqual(self.submission_counts(), [1, 0, 0])
+        self.assertEqual(counters.get_count("submissions", Counter.SCOPE_SUBMITTER, bob.pk), 1)
+
+    def test_moving_a_submission_moves_its_counts(self):
+        bob = User.objects.create_user(username="bob", password="Password123")
+        submission = Submission.objects.create(form=self.tax, submitted_by=bob)
+        submission.form, submission.submitted_by = self.kyc, self.alice
+        submission.save()
+        self.assertEqual(self.submission_counts(), [1, 1, 1])
+        self.assertEqual(counters.get_count("submissions", Counter.SCOPE_FORM, self.tax.pk), 0)
+        self.assertEqual(counters.get_count("submissions", Counter.SCOPE_SUBMITTER, bob.pk), 0)
+
+        submission.submitted_by = None
+        submission.save(update_fields=["submitted_by"])
+        self.assertEqual(self.submission_counts(), [1, 1, 0])
+        # saves that can't move it don't read the old row
+        submission.status = "approved"
+        with self.assertNumQueries(1):
+            submission.save(update_fields=["status"])
+
+    def test_bulk_form_import_counts_forms(self):
+        Form.objects.create_trees([{"name": "A", "slug": "a"}, {"name": "B", "slug": "b"}])
+        self.assertEqual(counters.get_count("forms"), 4)
+
+    def test_count_views_read_counters(self):
+        Submission.objects.create(form=self.kyc, submitted_by=self.alice)
+        self.client.force_authenticate(self.admin)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("count-submissions"))
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(self.client.get(reverse("count-users")).data["count"], 2)
+        self.assertEqual(self.client.get(reverse("count-forms")).data["count"], 2)
+
+        self.client.force_authenticate(User.objects.create_user(username="bob", password="Password123"))
+        self.assertEqual(self.client.get(reverse("count-submissions")).data["count"], 0)
+
+    def test_recount_repairs_drift(self):
+        # bulk_create bypasses the signals, so the counters drift
+        Submission.objects.bulk_create([Submission(form=self.kyc, submitted_by=self.alice)])
+        Counter.objects.filter(name="users").update(value=99)
+        self.assertEqual(self.submission_counts(), [0, 0, 0])
+
+        stale = Counter.objects.create(name="submissions", scope=Counter.SCOPE_FORM, object_id=self.tax.pk, value=5)
+        users = Counter.objects.get(name="users")
+
+        call_command("recount", stdout=StringIO())
+        self.assertEqual(counters.get_count("users"), 2)
+        self.assertEqual(self.submission_counts(), [1, 1, 1])
+        # values are updated in place and only keys with nothing to count go
+        self.assertEqual(Counter.objects.get(name="users").pk, users.pk)
+        self.assertFalse(Counter.objects.filter(pk=stale.pk).exists())
@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.models import Form, Submission
+
+
+class TestDashboard(APITestCase):
+
+    def setUp(self):
+        self.url = reverse("dashboard")
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.client_user = User.objects.create_user(username="client", email="client@example.com", password="Password123")
+        form = Form.objects.create(name="KYC", slug="kyc")
+        Form.objects.create(name="Tax", slug="tax")
+        Submission.objects.create(form=form, submitted_by=self.client_user)
+        Submission.objects.create(form=form, submitted_by=self.admin)
+        Submission.objects.create(form=form, submitted_by=self.admin)
+
+    def test_admin_gets_profile_and_all_counters_in_one_query(self):
+        self.client.force_authenticate(self.admin)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user"]["username"], "admin")
+        self.assertTrue(response.data["user"]["is_superuser"])
+        self.assertEqual(response.data["counts"], {"users": 2, "forms": 2, "submissions": 3})
+
+    def test_client_counts_are_scoped(self):
+        self.client.force_authenticate(self.client_user)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["user"]["email"], "client@example.com")
+        self.assertEqual(response.data["counts"], {"submissions": 1})
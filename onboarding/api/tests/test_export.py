@@ -0,0 +1,60 @@
+import csv
+import gzip
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.models import Form, FormField, FormSection, Submission
+
+
+class TestSubmissionExport(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.client.force_authenticate(self.admin)
+        self.form = Form.objects.create(name="KYC", slug="kyc")
+        section = FormSection.objects.create(form=self.form, title="Personal", order=0)
+        FormField.objects.create(form=self.form, section=section, name="full_name", label="Full name", field_type="text", order=0)
+        FormField.objects.create(form=self.form, section=section, name="languages", label="Languages", field_type="checkbox", order=1)
+        other = Form.objects.create(name="Other", slug="other")
+        Submission.objects.bulk_create([
+            Submission(form=self.form, submitted_by=self.admin, data={"full_name": f"Person {i}", "languages": ["en", "sw"]})
+            for i in range(5)
+        ] + [Submission(form=other, data={"full_name": "Elsewhere"})])
+        self.url = reverse("form-submissions-export", args=[self.form.id])
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_csv_has_one_column_per_field(self):
+        rows = list(csv.reader(io.StringIO(self.read(self.client.get(self.url)).decode())))
+        self.assertEqual(rows[0], ["id", "created_at", "status", "submitted_by", "file_upload", "full_name", "languages"])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][5], "Person 0")
+        self.assertEqual(json.loads(rows[1][6]), ["en", "sw"])
+
+    def test_ndjson(self):
+        lines = self.read(self.client.get(self.url, {"type": "ndjson"})).decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[-1])["data"]["full_name"], "Person 4")
+
+    def test_gzip(self):
+        response = self.client.get(self.url, {"gzip": "1"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn("kyc-submissions.csv.gz", response["Content-Disposition"])
+        text = gzip.decompress(self.read(response)).decode()
+        self.assertEqual(len(text.splitlines()), 6)
+
+    def test_unknown_type_and_non_admin_rejected(self):
+        self.assertEqual(self.client.get(self.url, {"type": "xml"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(User.objects.create_user(username="client", password="Password123"))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,88 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.models import FieldOption, Form, FormField
+
+
+def form_definition(slug, sections=2, fields=5):
+    return {
+        "name": slug.title(),
+        "slug": slug,
+        "sections": [
+            {
+                "title": f"Section {s}",
+                "order": s,
+                "fields": [
+                    {
+                        "label": f"Field {s} {f}",
+                        "field_type": "radio",
+                        "order": f,
+                        "options": [{"value": "yes", "label": "Yes"}, {"value": "no", "label": "No", "order": 1}],
+                    }
+                    for f in range(fields)
+                ],
+            }
+            for s in range(sections)
+        ],
+        "fields": [{"label": "Notes", "field_type": "textarea"}],
+    }
+
+
+class TestBulkFormImport(APITestCase):
+
+    def setUp(self):
+        self.url = reverse("forms-bulk-import")
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.client.force_authenticate(self.admin)
+
+    def import_forms(self, slugs):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, [form_definition(slug) for slug in slugs], format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response, len(ctx.captured_queries)
+
+    def test_import_creates_full_trees(self):
+        """
+        Every form is created with its sections, fields and options.
+        """
+        response, _ = self.import_forms(["kyc", "employment"])
+        self.assertEqual([f["name"] for f in response.data], ["Kyc", "Employment"])
+        form = Form.objects.get(slug="kyc")
+        self.assertEqual(form.created_by, self.admin)
+        self.assertEqual(form.sections.count(), 2)
+        self.assertEqual(FormField.objects.filter(form=form).count(), 11)
+        self.assertEqual(FieldOption.objects.filter(field__form=form).count(), 20)
+        self.assertEqual(FormField.objects.get(form=form, section=None).name, "notes")
+
+    def test_import_statement_count_does_not_grow_with_forms(self):
+        """
+        Importing 5 forms takes as many statements as importing 1 (beyond this,
+        bulk_create only splits by the backend's bind-parameter limit).
+        """
+        _, one = self.import_forms(["only"])
+        _, five = self.import_forms([f"form-{i}" for i in range(5)])
+        self.assertEqual(one, five)
+
+    def test_duplicate_slug_rolls_back_everything(self):
+        """
+        A slug clash rejects the whole batch and creates nothing.
+        """
+        Form.objects.create(name="Existing", slug="existing")
+        response = self.client.post(
+            self.url, [form_definition("new"), form_definition("existing")], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Form.objects.filter(slug="new").exists())
+
+    def test_requires_admin(self):
+        user = User.objects.create_user(username="client", password="Password123")
+        self.client.force_authenticate(user)
+        response = self.client.post(self.url, [form_definition("kyc")], format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,80 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.form_schema import clear_form_schema_cache
+from api.models import FieldOption, Form, FormField
+
+
+class TestFormSchemaCache(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.client.force_authenticate(self.admin)
+        clear_form_schema_cache()
+
+        response = self.client.post(reverse("forms-list-create"), {
+            "name": "Onboarding",
+            "slug": "onboarding",
+            "fields": [{"label": "Country", "field_type": "select", "options": [
+                {"value": "ke", "label": "Kenya"},
+            ]}],
+        }, format="json")
+        self.form = Form.objects.get(pk=response.data["id"])
+        self.detail_url = reverse("form-detail", args=[self.form.id])
+
+    def test_create_compiles_schema(self):
+        """
+        Creating a form stores the compiled tree in Form.schema.
+        """
+        self.assertEqual(self.form.schema["version"], self.form.schema_version)
+        self.assertEqual(self.form.schema["form"]["fields"][0]["name"], "country")
+
+    def test_warm_read_is_one_row_fetch(self):
+        """
+        Once cached, the detail GET only looks up the form's schema version.
+        """
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "Onboarding")
+
+    def test_child_changes_invalidate_schema(self):
+        """
+        Saving or deleting fields and options bumps the version and the next read sees it.
+        """
+        self.client.get(self.detail_url)
+        field = FormField.objects.get(form=self.form)
+        FieldOption.objects.create(field=field, value="ug", label="Uganda", order=1)
+        response = self.client.get(self.detail_url)
+        self.assertEqual([o["value"] for o in response.data["fields"][0]["options"]], ["ke", "ug"])
+
+        field.label = "Country of residence"
+        field.save()
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["fields"][0]["label"], "Country of residence")
+
+        field.delete()
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["fields"], [])
+
+    def test_stale_instance_save_keeps_newer_version(self):
+        """
+        Saving a form loaded before a tree change doesn't roll its version back.
+        """
+        stale = Form.objects.get(pk=self.form.pk)
+        FormField.objects.create(form=self.form, name="city", label="City", field_type="text")
+        stale.name = "Client onboarding"
+        stale.save()
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["name"], "Client onboarding")
+        self.assertEqual(len(response.data["fields"]), 2)
+
+    def test_missing_form_is_404(self):
+        response = self.client.get(reverse("form-detail", args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
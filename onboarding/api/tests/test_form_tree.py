@@ -0,0 +1,111 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import response_cache
+from api.form_schema import clear_form_schema_cache
+from api.models import FieldOption, Form, FormField, FormSection
+
+
+def build_forms(count, fields_per_form, created_by=None, start=0):
+    """
+    Bulk-create `count` forms, each with two sections holding `fields_per_form`
+    fields between them and two options per field.
+    """
+    forms = Form.objects.bulk_create([
+        Form(name=f"Form {i}", slug=f"form-{i}", created_by=created_by) for i in range(start, start + count)
+    ])
+    sections = FormSection.objects.bulk_create([
+        FormSection(form=form, title=f"Section {j}", order=j) for form in forms for j in range(2)
+    ])
+    fields = FormField.objects.bulk_create([
+        FormField(
+            form=section.form, section=section, name=f"field_{k}", label=f"Field {k}",
+            field_type="radio", order=k,
+        )
+        for section in sections for k in range(fields_per_form // 2)
+    ])
+    FieldOption.objects.bulk_create([
+        FieldOption(field=field, value=v, label=v.title(), order=n)
+        for field in fields for n, v in enumerate(["yes", "no"])
+    ])
+    # bulk_create skips the signals that would do this
+    response_cache.invalidate()
+    return forms
+
+
+class TestFormTreeQueries(APITestCase):
+    # forms + sections + section fields + their options + form fields + their options
+    TREE_QUERIES = 6
+    # the list's ETag aggregate
+    VALIDATOR_QUERIES = 1
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.client.force_authenticate(self.admin)
+        clear_form_schema_cache()
+
+    def test_user_forms_query_count_is_constant(self):
+        """
+        Listing forms costs the same number of queries for 1 form as for 100 forms of 50 fields.
+        """
+        build_forms(1, 50, self.admin)
+        with self.assertNumQueries(self.VALIDATOR_QUERIES + self.TREE_QUERIES):
+            response = self.client.get(reverse("user-forms"))
+        self.assertEqual(len(response.data), 1)
+
+        build_forms(99, 50, self.admin, start=1)
+        with self.assertNumQueries(self.VALIDATOR_QUERIES + self.TREE_QUERIES):
+            response = self.client.get(reverse("user-forms"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 100)
+        self.assertEqual(len(response.data[0]["fields"]), 50)
+        self.assertEqual(len(response.data[0]["sections"][0]["fields"]), 25)
+        self.assertEqual(len(response.data[0]["fields"][0]["options"]), 2)
+
+    def test_form_detail_query_count(self):
+        """
+        A 50-field form detail compiles in a fixed number of queries.
+        """
+        form = build_forms(1, 50, self.admin)[0]
+        # version + stored schema lookups, the tree, and storing the compiled schema
+        with self.assertNumQueries(2 + self.TREE_QUERIES + 1):
+            response = self.client.get(reverse("form-detail", args=[form.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["fields"]), 50)
+
+    def create_form_selects(self, slug, section_count):
+        payload = {
+            "name": "Onboarding",
+            "slug": slug,
+            "sections": [
+                {
+                    "title": f"Section {s}",
+                    "order": s,
+                    "fields": [
+                        {"label": f"Field {s}-{f}", "field_type": "text", "order": f}
+                        for f in range(10)
+                    ],
+                }
+                for s in range(section_count)
+            ],
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse("forms-list-create"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["fields"]), section_count * 10)
+        return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+
+    def test_create_response_reads_are_constant(self):
+        """
+        The create response is serialized from a prefetched tree, not per section and field.
+        """
+        small = self.create_form_selects("small", 1)
+        large = self.create_form_selects("large", 5)
+        self.assertEqual(len(small), len(large))
@@ -0,0 +1,84 @@
+import re
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.authentication import UserRefreshToken, clear_user_cache
+from api.metrics import registry
+from api.models import Form, Submission
+
+
+class TestMetrics(APITestCase):
+
+    def setUp(self):
+        clear_user_cache()
+        registry.reset()
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com")
+        form = Form.objects.create(name="KYC", slug="kyc")
+        Submission.objects.create(form=form, submitted_by=self.alice)
+
+    def scrape(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/metrics/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return response.content.decode()
+
+    def sample(self, text, name, **labels):
+        selector = ",".join(f'{key}="{value}"' for key, value in labels.items())
+        match = re.search(rf"^{name}\{{{re.escape(selector)}\}} (\S+)$", text, re.M)
+        self.assertIsNotNone(match, f"{name}{{{selector}}} not in\n{text}")
+        return float(match.group(1))
+
+    def test_records_requests_latency_sql_and_size(self):
+        self.client.force_authenticate(self.alice)
+        for _ in range(3):
+            response = self.client.get(reverse("submissions"))
+        self.client.get(reverse("form-detail", args=[999]))
+        text = self.scrape()
+
+        self.assertEqual(self.sample(text, "onboarding_http_requests_total", view="submissions", method="GET", status=200), 3)
+        self.assertEqual(self.sample(text, "onboarding_http_requests_total", view="form-detail", method="GET", status=404), 1)
+        self.assertEqual(self.sample(text, "onboarding_http_request_duration_seconds_count", view="submissions"), 3)
+        self.assertEqual(self.sample(text, "onboarding_http_request_duration_seconds_bucket", view="submissions", le="+Inf"), 3)
+        # ETag aggregate, page and attachments per request
+        self.assertEqual(self.sample(text, "onboarding_db_queries_total", view="submissions"), 9)
+        self.assertGreater(self.sample(text, "onboarding_db_query_seconds_total", view="submissions"), 0)
+        self.assertEqual(
+            self.sample(text, "onboarding_http_response_size_bytes_sum", view="submissions"), 3 * len(response.content)
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry.record("v", "GET", 200, 0.003, 0, 0.0, 10)
+        registry.record("v", "GET", 200, 0.2, 0, 0.0, 10)
+        registry.record("v", "GET", 200, 60.0, 0, 0.0, 10)
+        text = self.scrape()
+        bucket = "onboarding_http_request_duration_seconds_bucket"
+        self.assertEqual(self.sample(text, bucket, view="v", le="0.005"), 1)
+        self.assertEqual(self.sample(text, bucket, view="v", le="0.25"), 2)
+        self.assertEqual(self.sample(text, bucket, view="v", le="10.0"), 2)
+        self.assertEqual(self.sample(text, bucket, view="v", le="+Inf"), 3)
+
+    def test_async_views_are_measured(self):
+        token = UserRefreshToken.for_user(self.alice).access_token
+        with override_settings(ROOT_URLCONF="onboarding.asgi_urls"):
+            response = async_to_sync(self.async_client.get)(
+                reverse("count-submissions"), headers={"Authorization": f"Bearer {token}"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        text = self.scrape()
+        self.assertEqual(self.sample(text, "onboarding_http_requests_total", view="count-submissions", method="GET", status=200), 1)
+        # the user lookup and the counter read
+        self.assertEqual(self.sample(text, "onboarding_db_queries_total", view="count-submissions"), 2)
+
+    def test_admin_only(self):
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.get("/metrics/").status_code, status.HTTP_403_FORBIDDEN)
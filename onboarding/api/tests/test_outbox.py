@@ -0,0 +1,128 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.models import EmailFanout, EmailOutbox, Form, FormAssignment, Submission
+from api.utils import EmailService
+
+
+class TestEmailOutbox(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.client_user = User.objects.create_user(
+            username="client", email="client@example.com", password="Password123",
+        )
+        self.form = Form.objects.create(name="KYC", slug="kyc", created_by=self.admin)
+
+    def test_submission_queues_instead_of_sending(self):
+        """
+        Creating a submission writes an outbox row and sends nothing inline.
+        """
+        Submission.objects.create(form=self.form, submitted_by=self.client_user, data={})
+        self.assertEqual(len(mail.outbox), 0)
+        item = EmailOutbox.objects.get()
+        self.assertEqual(item.to_email, "admin@example.com")
+        self.assertEqual(item.status, EmailOutbox.STATUS_PENDING)
+
+    def test_worker_delivers_pending_emails(self):
+        """
+        The worker command sends due rows and marks them as sent.
+        """
+        Submission.objects.create(form=self.form, submitted_by=self.client_user, data={})
+        call_command("process_email_outbox")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["admin@example.com"])
+        item = EmailOutbox.objects.get()
+        self.assertEqual(item.status, EmailOutbox.STATUS_SENT)
+        self.assertIsNotNone(item.sent_at)
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_emails_back_off_then_go_dead(self):
+        """
+        A failing send is rescheduled with backoff and dead-lettered after the last attempt.
+        """
+        item = EmailOutbox.objects.create(to_email="x@example.com", subject="Hi", body="Body")
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=ConnectionError("smtp down"),
+        ):
+            call_command("process_email_outbox")
+            item.refresh_from_db()
+            self.assertEqual(item.status, EmailOutbox.STATUS_PENDING)
+            self.assertEqual(item.attempts, 1)
+            self.assertGreater(item.next_attempt_at, timezone.now())
+            self.assertIn("smtp down", item.last_error)
+
+            EmailOutbox.objects.filter(pk=item.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+            call_command("process_email_outbox")
+            item.refresh_from_db()
+            self.assertEqual(item.status, EmailOutbox.STATUS_DEAD)
+            self.assertEqual(item.attempts, 2)
+
+
+class TestAssignmentNotifications(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.form = Form.objects.create(name="KYC", slug="kyc", created_by=self.admin)
+        User.objects.bulk_create([
+            User(username=f"client{i}", email=f"client{i}@example.com") for i in range(25)
+        ] + [
+            # same address as client0 and a user with no address: neither adds a message
+            User(username="client0-dup", email="CLIENT0@example.com"),
+            User(username="client-no-email", email=""),
+        ])
+
+    @override_settings(EMAIL_OUTBOX_BATCH_SIZE=10, EMAIL_FANOUT_BATCH_SIZE=10)
+    def test_one_message_per_recipient_over_one_connection(self):
+        """
+        A client assignment queues a single fan-out row. The worker expands it
+        into one email per distinct address, in batches, and delivers them all
+        over a single connection.
+        """
+        with self.assertNumQueries(2):
+            FormAssignment.objects.create(form=self.form, group="client", created_by=self.admin)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailOutbox.objects.count(), 0)
+        self.assertEqual(EmailFanout.objects.get().forms, [self.form.pk])
+
+        with mock.patch.object(EmailBackend, "open", autospec=True, side_effect=BaseEmailBackend.open) as opened, \
+                mock.patch.object(EmailBackend, "close", autospec=True, side_effect=BaseEmailBackend.close) as closed:
+            sent, failed = EmailService.process_outbox()
+
+        self.assertEqual((sent, failed), (25, 0))
+        # one session: opened before the first message, closed after the last
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(closed.call_count, 1)
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertEqual(len({m.to[0].lower() for m in mail.outbox}), 25)
+        self.assertIsNotNone(EmailFanout.objects.get().done_at)
+
+    @override_settings(EMAIL_FANOUT_BATCH_SIZE=10)
+    def test_expansion_resumes_after_the_last_batch(self):
+        FormAssignment.objects.create(form=self.form, group="client")
+        fanout = EmailFanout.objects.get()
+        # a worker that stopped after its first batch
+        first = list(User.objects.filter(is_staff=False).order_by("pk")[:10])
+        EmailService.queue_mass_email(
+            [("New Form Assignment: KYC", "Hi", None, [user.email]) for user in first], fanout=fanout,
+        )
+        EmailFanout.objects.filter(pk=fanout.pk).update(last_user_id=first[-1].pk)
+
+        self.assertEqual(EmailService.expand_fanouts(), 15)
+        self.assertEqual(EmailOutbox.objects.count(), 25)
+        self.assertEqual(EmailService.expand_fanouts(), 0)
@@ -0,0 +1,292 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api import search
+from api.models import FormAssignment, Roles, Submission, SubmissionAttachment, UploadSession
+from api.urls import urlpatterns
+
+from .query_budget import QueryBudgetMixin, budgeted_routes, query_budget
+from .test_form_tree import build_forms
+from .test_uploads import UploadTestMixin
+
+
+def make_users(count, prefix="user", **extra):
+    users = User.objects.bulk_create([
+        User(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com", **extra) for i in range(count)
+    ])
+    Roles.objects.bulk_create([Roles(userid=user, role="staff" if extra.get("is_staff") else "client") for user in users])
+    return users
+
+
+def make_submissions(count, form, user=None, attachments=0):
+    now = timezone.now()
+    submissions = Submission.objects.bulk_create([
+        Submission(form=form, submitted_by=user, data={"field_0": "yes"}, created_at=now - timedelta(minutes=i))
+        for i in range(count)
+    ])
+    SubmissionAttachment.objects.bulk_create([
+        SubmissionAttachment(submission=s, name=f"doc{n}.pdf", size=3, file=f"submissions/doc{n}.pdf")
+        for s in submissions for n in range(attachments)
+    ])
+    return submissions
+
+
+def form_definition(index, fields=4):
+    return {
+        "name": f"Imported {index}",
+        "slug": f"imported-{index}",
+        "sections": [{
+            "title": "Main", "order": 0,
+            "fields": [
+                {"name": f"field_{k}", "label": f"Field {k}", "field_type": "radio", "order": k,
+                 "options": [{"value": "yes", "label": "Yes", "order": 0}, {"value": "no", "label": "No", "order": 1}]}
+                for k in range(fields)
+            ],
+        }],
+    }
+
+
+class TestQueryBudgets(UploadTestMixin, QueryBudgetMixin, APITestCase):
+    """
+    Every route in api/urls.py, at 1 and at 100 rows of the data it reads or
+    writes. The budgets are today's counts; raise one only with a reason.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.user = User.objects.create_user(username="client", email="client@example.com", password="Password123")
+        self.form = build_forms(1, 4, self.admin, start=1000)[0]
+        FormAssignment.objects.create(form=self.form, group="client")
+
+    def as_admin(self):
+        self.client.force_authenticate(self.admin)
+
+    def as_client(self):
+        self.client.force_authenticate(self.user)
+
+    def test_every_route_has_a_budget(self):
+        budgeted = {route for route, _ in budgeted_routes(type(self))}
+        self.assertEqual({p.name for p in urlpatterns} - budgeted, set())
+
+    # accounts
+
+    @query_budget("signup", "POST", 5)
+    def test_signup(self, size):
+        make_users(size)
+        return lambda: self.client.post(reverse("signup"), {
+            "username": "new", "email": "new@example.com", "first_name": "New", "last_name": "User",
+            "password": "Password123", "confirm_password": "Password123",
+        }, format="json")
+
+    @query_budget("login", "POST", 1)
+    def test_login(self, size):
+        make_users(size)
+        return lambda: self.client.post(
+            reverse("login"), {"email": "client@example.com", "password": "Password123"}, format="json",
+        )
+
+    @query_budget("me_api", "GET", 0)
+    def test_me(self, size):
+        make_submissions(size, self.form, self.user)
+        self.as_client()
+        return lambda: self.client.get(reverse("me_api"))
+
+    @query_budget("dashboard", "GET", 1)
+    def test_dashboard(self, size):
+        make_submissions(size, self.form, self.user)
+        self.as_admin()
+        return lambda: self.client.get(reverse("dashboard"))
+
+    @query_budget("roles-list", "POST", 4)
+    def test_roles(self, size):
+        make_users(size)
+        self.as_admin()
+        return lambda: self.client.post(reverse("roles-list"), {"userid": self.user.pk, "role": "staff"}, format="json")
+
+    @query_budget("users-list", "GET", 1)
+    def test_users_list(self, size):
+        make_users(size)
+        self.as_admin()
+        return lambda: self.client.get(reverse("users-list"))
+
+    # bulk_create splits an insert at SQLite's 999 parameters, which is
+    # batching rather than N+1, so the bulk payloads stay within one batch
+
+    @query_budget("users-bulk-import", "POST", 7, sizes=(1, 50))
+    def test_users_bulk_import(self, size):
+        rows = [{"username": f"imported{i}", "email": f"imported{i}@example.com", "role": "client"} for i in range(size)]
+        self.as_admin()
+        return lambda: self.client.post(reverse("users-bulk-import"), rows, format="json")
+
+    @query_budget("delete-user", "DELETE", 14)
+    def test_delete_user(self, size):
+        make_submissions(size, self.form, self.user, attachments=1)
+        UploadSession.objects.bulk_create([
+            UploadSession(user=self.user, filename=f"{i}.pdf", size=10) for i in range(size)
+        ])
+        self.as_admin()
+        return lambda: self.client.delete(reverse("delete-user", args=[self.user.pk]))
+
+    @query_budget("count-users", "GET", 1)
+    def test_count_users(self, size):
+        make_users(size)
+        self.as_client()
+        return lambda: self.client.get(reverse("count-users"))
+
+    # forms
+
+    @query_budget("forms-list-create", "POST", 15)
+    def test_forms_create(self, size):
+        build_forms(size, 4, self.admin)
+        self.as_admin()
+        return lambda: self.client.post(reverse("forms-list-create"), form_definition("new"), format="json")
+
+    @query_budget("forms-bulk-import", "POST", 8, sizes=(1, 20))
+    def test_forms_bulk_import(self, size):
+        definitions = [form_definition(i) for i in range(size)]
+        self.as_admin()
+        return lambda: self.client.post(reverse("forms-bulk-import"), definitions, format="json")
+
+    @query_budget("user-forms", "GET", 7)
+    def test_user_forms(self, size):
+        FormAssignment.objects.bulk_create([
+            FormAssignment(form=form, group="client") for form in build_forms(size, 4, self.admin)
+        ])
+        self.as_client()
+        return lambda: self.client.get(reverse("user-forms"))
+
+    @query_budget("available-forms", "GET", 2)
+    def test_available_forms(self, size):
+        build_forms(size, 4, self.admin)
+        self.as_client()
+        return lambda: self.client.get(reverse("available-forms"))
+
+    @query_budget("count-forms", "GET", 1)
+    def test_count_forms(self, size):
+        build_forms(size, 4, self.admin)
+        self.as_client()
+        return lambda: self.client.get(reverse("count-forms"))
+
+    @query_budget("form-detail", "GET", 9)
+    def test_form_detail(self, size):
+        form = build_forms(1, size * 2, self.admin)[0]
+        self.as_client()
+        return lambda: self.client.get(reverse("form-detail", args=[form.pk]))
+
+    @query_budget("form-detail", "PUT", 10)
+    def test_form_update(self, size):
+        form = build_forms(1, size * 2, self.admin)[0]
+        self.as_admin()
+        return lambda: self.client.put(reverse("form-detail", args=[form.pk]), {"description": "New"}, format="json")
+
+    @query_budget("form-detail", "DELETE", 25)
+    def test_form_delete(self, size):
+        form = build_forms(1, 4, self.admin)[0]
+        make_submissions(size, form, self.user, attachments=1)
+        FormAssignment.objects.bulk_create([FormAssignment(form=form, group="client") for _ in range(size)])
+        self.as_admin()
+        return lambda: self.client.delete(reverse("form-detail", args=[form.pk]))
+
+    # one queued email per user, inserted in batches (see the bulk imports above)
+    @query_budget("assign-form", "POST", 9, sizes=(1, 50))
+    def test_assign_form(self, size):
+        users = make_users(size, "member")
+        self.as_admin()
+        return lambda: self.client.post(reverse("assign-form"), {
+            "form": self.form.pk, "group": "users", "users": [u.pk for u in users],
+        }, format="json")
+
+    @query_budget("assign-forms-bulk", "POST", 11)
+    def test_assign_forms_bulk(self, size):
+        forms = build_forms(size, 4, self.admin)
+        users = make_users(3, "member")
+        self.as_admin()
+        return lambda: self.client.post(reverse("assign-forms-bulk"), {
+            "forms": [f.pk for f in forms], "groups": ["staff"], "users": [u.pk for u in users],
+        }, format="json")
+
+    # submissions
+
+    @query_budget("form-submit", "POST", 26)
+    def test_form_submit(self, size):
+        form = build_forms(1, size * 2, self.admin)[0]
+        data = {f"field_{k}": "yes" for k in range(size)}
+        self.as_client()
+        return lambda: self.client.post(reverse("form-submit", args=[form.pk]), data, format="multipart")
+
+    @query_budget("form-submissions-export", "GET", 3)
+    def test_export(self, size):
+        make_submissions(size, self.form, self.user, attachments=1)
+        self.as_admin()
+        return lambda: self.client.get(reverse("form-submissions-export", args=[self.form.pk]))
+
+    @query_budget("submissions", "GET", 3)
+    def test_submissions(self, size):
+        make_submissions(size, self.form, self.user, attachments=2)
+        self.as_admin()
+        return lambda: self.client.get(reverse("submissions"), {"limit": 100})
+
+    @query_budget("submissions-search", "GET", 3)
+    def test_search_submissions(self, size):
+        submissions = make_submissions(size, self.form, self.user, attachments=1)
+        search.index_submissions([s.pk for s in submissions])
+        self.as_client()
+        return lambda: self.client.get(reverse("submissions-search"), {"q": "yes", "limit": 100})
+
+    @query_budget("count-submissions", "GET", 1)
+    def test_count_submissions(self, size):
+        make_submissions(size, self.form, self.user)
+        self.as_client()
+        return lambda: self.client.get(reverse("count-submissions"))
+
+    @query_budget("response-cache-stats", "GET", 0)
+    def test_response_cache_stats(self, size):
+        self.as_admin()
+        return lambda: self.client.get(reverse("response-cache-stats"))
+
+    # resumable uploads
+
+    @query_budget("uploads", "POST", 1)
+    def test_create_upload(self, size):
+        UploadSession.objects.bulk_create([
+            UploadSession(user=self.user, filename=f"{i}.pdf", size=10) for i in range(size)
+        ])
+        self.as_client()
+        return lambda: self.client.post(reverse("uploads"), {"filename": "id.pdf", "size": 10}, format="json")
+
+    @query_budget("upload-status", "GET", 1)
+    def test_upload_status(self, size):
+        sessions = UploadSession.objects.bulk_create([
+            UploadSession(user=self.user, filename=f"{i}.pdf", size=10) for i in range(size)
+        ])
+        self.as_client()
+        return lambda: self.client.get(reverse("upload-status", args=[sessions[-1].pk]))
+
+    # the chunk is claimed and recorded in two short transactions so that no
+    # transaction stays open while the body is read
+    @query_budget("upload-chunk", "PUT", 5)
+    def test_upload_chunk(self, size):
+        session = UploadSession.objects.create(user=self.user, filename="id.pdf", size=size * 10)
+        self.as_client()
+        return lambda: self.client.put(
+            reverse("upload-chunk", args=[session.pk, 0]), b"x" * size * 10,
+            content_type="application/octet-stream", headers={"Upload-Offset": "0"},
+        )
+
+    @query_budget("upload-finalize", "POST", 4)
+    def test_upload_finalize(self, size):
+        session = UploadSession.objects.create(user=self.user, filename="id.pdf", size=size * 10)
+        self.as_client()
+        self.client.put(
+            reverse("upload-chunk", args=[session.pk, 0]), b"x" * size * 10,
+            content_type="application/octet-stream", headers={"Upload-Offset": "0"},
+        )
+        return lambda: self.client.post(reverse("upload-finalize", args=[session.pk]))
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.functions import Lower
+from django.test import TestCase
+
+from api.models import Counter, EmailOutbox, Form, Submission
+
+# Every query shape on a hot path; each must be answered from an index
+HOT_QUERIES = {
+    "submissions page": lambda: Submission.objects.order_by("-created_at", "-id")[:50],
+    "submissions by submitter": lambda: Submission.objects.filter(submitted_by_id=1).order_by("-created_at", "-id")[:50],
+    "submissions by form": lambda: Submission.objects.filter(form_id=1).order_by("-created_at", "-id")[:50],
+    "submissions by status": lambda: Submission.objects.filter(status="submitted").order_by("-created_at", "-id")[:50],
+    "available forms": lambda: Form.objects.filter(is_active=True),
+    "staff group": lambda: User.objects.filter(is_staff=True, is_superuser=False),
+    "client group": lambda: User.objects.filter(is_staff=False, is_superuser=False),
+    "assigned forms": lambda: Form.objects.assigned_to(User(pk=1)),
+    "login by email": lambda: User.objects.filter(email="someone@example.com"),
+    "import email check": lambda: User.objects.annotate(email_lower=Lower("email")).filter(
+        email_lower__in=["someone@example.com", "other@example.com"]
+    ),
+    "due outbox emails": lambda: EmailOutbox.objects.filter(status="pending", next_attempt_at__lte="2030-01-01").order_by("next_attempt_at", "id")[:50],
+    "counter lookup": lambda: Counter.objects.filter(name="submissions", scope="submitter", object_id=1),
+}
+
+
+def full_scans(queryset):
+    """Return the plan lines that read a whole table (or sort without an index)"""
+    plan = queryset.explain()
+    if connection.vendor == "postgresql":
+        return [line for line in plan.splitlines() if "Seq Scan" in line]
+    # SQLite: "SCAN table" without an index, or an extra sort step
+    return [
+        line for line in plan.splitlines()
+        if ("SCAN " in line and " USING " not in line) or "TEMP B-TREE" in line
+    ]
+
+
+class TestHotQueryPlans(TestCase):
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # tiny test tables make a seq scan "cheaper"; check that an index can be used at all
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+
+    def test_hot_queries_use_indexes(self):
+        for name, build in HOT_QUERIES.items():
+            with self.subTest(name):
+                scans = full_scans(build())
+                self.assertEqual(scans, [], f"{name} falls back to a full scan:\n" + "\n".join(scans))
@@ -0,0 +1,89 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import response_cache
+from api.models import FieldOption, Form, FormAssignment, FormField
+
+
+class TestResponseCache(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        response_cache.reset_stats()
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.other_admin = User.objects.create_user(
+            username="admin2", email="admin2@example.com", is_staff=True, is_superuser=True,
+        )
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com")
+        self.kyc = Form.objects.create(name="KYC", slug="kyc")
+        FormAssignment.objects.create(form=self.kyc, group="client", created_by=self.admin)
+
+    def get(self, user, name="user-forms"):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_warm_reads_skip_the_database(self):
+        self.get(self.alice)
+        with self.assertNumQueries(0):
+            response = self.get(self.alice)
+        self.assertEqual([form["slug"] for form in response.data], ["kyc"])
+
+        self.get(self.alice, "available-forms")
+        with self.assertNumQueries(0):
+            self.get(self.bob, "available-forms")
+
+    def test_admins_share_one_entry_and_users_get_their_own(self):
+        self.get(self.admin)
+        with self.assertNumQueries(0):
+            self.get(self.other_admin)
+        self.get(self.alice)
+        self.get(self.bob)
+        self.assertEqual(response_cache.stats()["user_forms"], {"hits": 1, "misses": 3, "hit_rate": 0.25})
+
+    def test_changes_to_forms_and_assignments_invalidate(self):
+        self.assertEqual(len(self.get(self.alice).data), 1)
+
+        tax = Form.objects.create(name="Tax", slug="tax")
+        assignment = FormAssignment.objects.create(form=tax, group="client", created_by=self.admin)
+        self.assertEqual({form["slug"] for form in self.get(self.alice).data}, {"kyc", "tax"})
+
+        field = FormField.objects.create(form=tax, name="country", label="Country", field_type="select")
+        FieldOption.objects.create(field=field, value="ke", label="Kenya")
+        tax_data = next(form for form in self.get(self.alice).data if form["slug"] == "tax")
+        self.assertEqual(tax_data["fields"][0]["options"][0]["value"], "ke")
+
+        assignment.delete()
+        self.assertEqual([form["slug"] for form in self.get(self.alice).data], ["kyc"])
+
+        self.assertEqual({form["name"] for form in self.get(self.alice, "available-forms").data}, {"KYC", "Tax"})
+        self.kyc.is_active = False
+        self.kyc.save()
+        self.assertEqual([form["name"] for form in self.get(self.alice, "available-forms").data], ["Tax"])
+
+    def test_role_change_is_a_miss(self):
+        self.assertEqual(len(self.get(self.alice).data), 1)
+        self.alice.is_staff = True
+        self.alice.save()
+        self.assertEqual(self.get(self.alice).data, [])
+
+    def test_bulk_assign_invalidates(self):
+        self.assertEqual(len(self.get(self.bob).data), 1)
+        tax = Form.objects.create(name="Tax", slug="tax")
+        self.get(self.bob)
+        FormAssignment.objects.bulk_assign([tax], users=[self.bob], created_by=self.admin)
+        self.assertEqual({form["slug"] for form in self.get(self.bob).data}, {"kyc", "tax"})
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.get(self.alice)
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.get(reverse("response-cache-stats")).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.get(self.admin, "response-cache-stats").data["user_forms"]["misses"], 1)
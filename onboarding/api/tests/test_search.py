@@ -0,0 +1,168 @@
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import search
+from api.models import Form, FormField, Submission
+
+from .test_uploads import UploadTestMixin
+
+
+class TestSubmissionSearch(UploadTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("submissions-search")
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.alice = User.objects.create_user(
+            username="alice", email="alice@acme.example", first_name="Alice", last_name="Wanjiru",
+        )
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com")
+        self.kyc = Form.objects.create(name="KYC", slug="kyc")
+        self.tax = Form.objects.create(name="Tax", slug="tax")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.acme = Submission.objects.create(
+                form=self.kyc, submitted_by=self.alice,
+                data={"company": "Acme Holdings Ltd", "id_number": "AB-12345678"},
+            )
+            self.globex = Submission.objects.create(
+                form=self.tax, submitted_by=self.bob, data={"company": "Globex", "directors": ["Hank Scorpio"]},
+            )
+            self.both = Submission.objects.create(
+                form=self.tax, submitted_by=self.bob, data={"company": "Acme Globex joint venture"},
+            )
+
+    def find(self, q, user=None, **params):
+        self.client.force_authenticate(user or self.admin)
+        response = self.client.get(self.url, {"q": q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_matches_answers_submitter_and_prefixes(self):
+        self.assertEqual(set(self.find("acme")), {self.acme.pk, self.both.pk})
+        self.assertEqual(self.find("AB-12345678"), [self.acme.pk])
+        self.assertEqual(self.find("1234"), [self.acme.pk])
+        self.assertEqual(self.find("scorpio"), [self.globex.pk])
+        self.assertEqual(self.find("wanjiru"), [self.acme.pk])
+        self.assertEqual(self.find("alice@acme.example"), [self.acme.pk])
+        self.assertEqual(self.find("acme globex"), [self.both.pk])
+        self.assertEqual(self.find("acme.globex"), [self.both.pk])
+        self.assertEqual(self.find("globex.acme"), [])
+        self.assertEqual(self.find("nothing"), [])
+
+    def test_best_match_first(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Submission.objects.create(form=self.kyc, data={"notes": "Globex " * 5})
+        self.assertEqual(self.find("globex")[0], Submission.objects.latest("id").pk)
+
+    def test_clients_only_find_their_own(self):
+        self.assertEqual(self.find("acme", user=self.bob), [self.both.pk])
+        self.assertEqual(self.find("acme", form=self.kyc.pk), [self.acme.pk])
+
+    def test_older_matches_are_ranked_with_the_newest(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            best = Submission.objects.create(form=self.kyc, data={"notes": "Umbrella " * 5})
+            Submission.objects.bulk_create([
+                Submission(form=self.kyc, data={"notes": f"Umbrella and {i} other words"}) for i in range(30)
+            ])
+            search.index_submissions(Submission.objects.filter(pk__gt=best.pk).values_list("pk", flat=True))
+        self.assertEqual(self.find("umbrella", limit=5)[0], best.pk)
+        self.assertEqual(len(self.find("umbrella", limit=50)), 31)
+
+    def test_pages_follow_the_ranking(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(7):
+                Submission.objects.create(form=self.kyc, data={"notes": "Initech " * (i + 1)})
+        expected = self.find("initech", limit=50)
+        seen, params = [], {"limit": 3}
+        while True:
+            self.client.force_authenticate(self.admin)
+            response = self.client.get(self.url, {"q": "initech", **params})
+            seen += [row["id"] for row in response.data["results"]]
+            if not response.data["next_cursor"]:
+                break
+            params["cursor"] = response.data["next_cursor"]
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 7)
+
+    def test_index_follows_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.globex.data = {"company": "Initrode"}
+            self.globex.save()
+        self.assertEqual(self.find("globex"), [self.both.pk])
+        self.assertEqual(self.find("initrode"), [self.globex.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.last_name = "Otieno"
+            self.alice.save()
+        self.assertEqual(self.find("otieno"), [self.acme.pk])
+
+        self.both.delete()
+        self.assertEqual(self.find("acme"), [self.acme.pk])
+        self.kyc.delete()
+        self.assertEqual(self.find("acme"), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {search.TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_attachment_names_are_indexed_once_per_submit(self):
+        field = FormField.objects.create(form=self.kyc, name="doc", label="Doc", field_type="file")
+        self.client.force_authenticate(self.alice)
+        with mock.patch("api.search.index_submissions", wraps=search.index_submissions) as index, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("form-submit", args=[self.kyc.pk]), {
+                field.name: SimpleUploadedFile("passport_scan.pdf", b"%PDF", content_type="application/pdf"),
+            })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(self.find("passport"), [response.data["submission_id"]])
+        # the submission and its attachment are written in one pass
+        index.assert_called_once()
+
+    def test_empty_query_is_rejected(self):
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(self.url, {"q": " -- "}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestSearchQueries(SimpleTestCase):
+
+    def test_backend_queries(self):
+        phrases = search.phrases("alice@acme.example AB-12")
+        self.assertEqual(search.SQLiteBackend.query(phrases), '"alice acme example" "ab 12"*')
+        self.assertEqual(
+            search.PostgresBackend.query(phrases), "(alice <-> acme <-> example) & (ab <-> 12:*)",
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "tsvector search needs PostgreSQL")
+class TestPostgresBackend(TestCase):
+
+    def setUp(self):
+        documents = {1: "Alice Wanjiru alice acme example", 2: "Acme Globex joint venture acme acme", 3: "Globex"}
+        with connection.cursor() as cursor:
+            cursor.executemany(search.PostgresBackend.insert_sql, list(documents.items()))
+
+    def match(self, q):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                search.PostgresBackend.match_sql + " ORDER BY score, id",
+                [search.PostgresBackend.query(search.phrases(q))],
+            )
+            return cursor.fetchall()
+
+    def test_phrases_prefixes_and_scores(self):
+        self.assertEqual([pk for pk, _ in self.match("alice@acme.example")], [1])
+        self.assertEqual([pk for pk, _ in self.match("acme globex")], [2])
+        self.assertEqual({pk for pk, _ in self.match("glob")}, {2, 3})
+        # lower is better, as with bm25(): more "acme"s rank first
+        ranked = self.match("acme")
+        self.assertEqual([pk for pk, _ in ranked], [2, 1])
+        self.assertLess(ranked[0][1], ranked[1][1])
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.models import Form, Submission
+from api.pagination import encode_cursor
+
+
+class TestSubmissionsPagination(APITestCase):
+
+    def setUp(self):
+        self.url = reverse("submissions")
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.alice = User.objects.create_user(username="alice", password="Password123")
+        self.bob = User.objects.create_user(username="bob", password="Password123")
+        self.kyc = Form.objects.create(name="KYC", slug="kyc")
+        self.tax = Form.objects.create(name="Tax", slug="tax")
+
+        self.now = now = timezone.now()
+        rows = []
+        for i in range(120):
+            rows.append(Submission(
+                form=self.kyc if i % 2 else self.tax,
+                submitted_by=self.alice if i % 3 else self.bob,
+                status="approved" if i % 5 == 0 else "submitted",
+                # pairs of rows share a timestamp, so the id tie-breaker matters
+                created_at=now - timedelta(minutes=i // 2),
+                data={"i": i},
+            ))
+        Submission.objects.bulk_create(rows)
+
+    def collect(self, params=None):
+        """Follow next cursors to the end, returning every row and the page count"""
+        params = dict(params or {})
+        rows, pages = [], 0
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+            rows.extend(response.data["results"])
+            pages += 1
+            if not response.data["next_cursor"]:
+                return rows, pages
+            params["cursor"] = response.data["next_cursor"]
+
+    def test_pages_cover_every_row_once_in_order(self):
+        self.client.force_authenticate(self.admin)
+        rows, pages = self.collect({"limit": 50})
+        self.assertEqual(pages, 3)
+        ids = [r["id"] for r in rows]
+        self.assertEqual(len(ids), 120)
+        self.assertEqual(len(set(ids)), 120)
+        expected = list(Submission.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_deep_page_costs_the_same_as_the_first(self):
+        self.client.force_authenticate(self.admin)
+        first = self.client.get(self.url, {"limit": 10})
+        last_id = Submission.objects.order_by("created_at", "id").values_list("id", flat=True)[10]
+        deep = Submission.objects.get(pk=last_id)
+        # the page's ETag aggregate, the page and its attachments
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {"limit": 10, "cursor": encode_cursor(deep.created_at, deep.pk)})
+        self.assertEqual(len(first.data["results"]), 10)
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_filters(self):
+        self.client.force_authenticate(self.admin)
+        rows, _ = self.collect({"form": self.kyc.id, "status": "submitted", "submitted_by": self.alice.id})
+        expected = Submission.objects.filter(form=self.kyc, status="submitted", submitted_by=self.alice)
+        self.assertEqual(len(rows), expected.count())
+
+        since = (self.now - timedelta(minutes=9)).isoformat()
+        rows, _ = self.collect({"created_after": since})
+        self.assertEqual(len(rows), 20)
+
+    def test_non_admin_only_sees_own_submissions(self):
+        self.client.force_authenticate(self.bob)
+        rows, _ = self.collect({"submitted_by": self.alice.id})
+        self.assertEqual(len(rows), Submission.objects.filter(submitted_by=self.bob).count())
+
+    def test_invalid_cursor_is_rejected(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
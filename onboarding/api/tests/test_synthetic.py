@@ -0,0 +1,45 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from api import counters, synthetic
+from api.models import Form, FormAssignment, Submission
+from api.validation import clear_validator_cache, get_submission_validator
+
+
+class TestGenerate(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        clear_validator_cache()
+
+    def test_volumes_and_counters(self):
+        summary = synthetic.generate(forms=5, users=40, submissions=300, prefix="t", batch_size=64)
+        self.assertEqual(summary["forms"], Form.objects.filter(slug__startswith="t-form-").count())
+        self.assertEqual(User.objects.filter(username__startswith="t-user-").count(), 40)
+        self.assertEqual(Submission.objects.count(), 300)
+        self.assertEqual(summary["fields"], 5 * 3 * 8)
+        # bulk_create skips the signals, so the counters were rebuilt
+        self.assertEqual(counters.get_count("submissions"), 300)
+        self.assertEqual(counters.get_count("users"), 41)
+        # every form is assigned to at least one group
+        self.assertEqual(
+            set(FormAssignment.objects.exclude(group="users").values_list("form_id", flat=True)),
+            set(Form.objects.values_list("id", flat=True)),
+        )
+        self.assertTrue(User.objects.get(username="t-admin").check_password("Password123"))
+
+    def test_answers_pass_the_form_validator(self):
+        synthetic.generate(forms=3, users=5, submissions=60, prefix="t")
+        for submission in Submission.objects.select_related("form"):
+            _, errors = get_submission_validator(submission.form).clean(submission.data)
+            self.assertEqual(errors, {}, submission.data)
+
+    def test_same_seed_same_data(self):
+        synthetic.generate(forms=2, users=5, submissions=10, prefix="a", seed=7)
+        synthetic.generate(forms=2, users=5, submissions=10, prefix="b", seed=7)
+        first, second = (
+            list(Submission.objects.filter(form__slug__startswith=p).order_by("id").values_list("data", flat=True))
+            for p in ("a-", "b-")
+        )
+        self.assertEqual(first, second)
@@ -0,0 +1,367 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import blobs
+from api.form_schema import clear_form_schema_cache
+from api.models import Blob, Form, FormField, Submission, UploadSession
+from api.storage import ContentAddressedStorage, blob_name, file_digest
+from api.uploads import SessionFile, append_chunk, completed_sessions
+from api.validation import clear_validator_cache
+
+
+class UploadTestMixin:
+    """Point MEDIA_ROOT and the upload temp dir at a throwaway directory"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=self.media_root, FILE_UPLOAD_TEMP_DIR=self.media_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+
+class TestStreamingUploadHandler(UploadTestMixin, TestCase):
+
+    def test_small_files_still_go_to_disk(self):
+        request = RequestFactory().post("/", {"doc": SimpleUploadedFile("id.pdf", b"%PDF tiny")})
+        upload = request.FILES["doc"]
+        self.assertIsInstance(upload, TemporaryUploadedFile)
+        self.assertTrue(upload.temporary_file_path().startswith(self.media_root))
+        upload.close()
+
+
+class TestMultiFileSubmission(UploadTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        clear_form_schema_cache()
+        clear_validator_cache()
+        self.user = User.objects.create_user(username="client", password="Password123")
+        self.client.force_authenticate(self.user)
+        self.form = Form.objects.create(name="KYC", slug="kyc")
+        self.ids = FormField.objects.create(form=self.form, name="ids", label="IDs", field_type="file", multiple=True)
+        self.photo = FormField.objects.create(form=self.form, name="photo", label="Photo", field_type="file", required=True)
+        self.url = reverse("form-submit", args=[self.form.id])
+
+    def upload(self, name, size=1024):
+        return SimpleUploadedFile(name, b"x" * size, content_type="application/pdf")
+
+    def test_every_file_is_kept(self):
+        response = self.client.post(self.url, {
+            "ids": [self.upload("front.pdf"), self.upload("back.pdf"), self.upload("passport.pdf")],
+            "photo": self.upload("me.jpg", 2048),
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        submission = Submission.objects.get(pk=response.data["submission_id"])
+        attachments = list(submission.attachments.all())
+        self.assertEqual(len(attachments), 4)
+        self.assertEqual(
+            sorted((a.field_id, a.name) for a in attachments),
+            sorted([(self.ids.id, "front.pdf"), (self.ids.id, "back.pdf"),
+                    (self.ids.id, "passport.pdf"), (self.photo.id, "me.jpg")]),
+        )
+        self.assertEqual(submission.data["ids"], ["front.pdf", "back.pdf", "passport.pdf"])
+        self.assertEqual(submission.data["photo"], "me.jpg")
+        self.assertEqual(submission.file_upload.name, attachments[0].file.name)
+        for attachment in attachments:
+            self.assertTrue(attachment.file.storage.exists(attachment.file.name))
+        self.assertEqual(len(response.data["data"]["attachments"]), 4)
+
+    def test_single_file_field_rejects_several_files(self):
+        response = self.client.post(self.url, {"photo": [self.upload("a.jpg"), self.upload("b.jpg")]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("photo", response.data["data"])
+        self.assertFalse(Submission.objects.exists())
+
+
+class TestResumableUploads(UploadTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        clear_form_schema_cache()
+        clear_validator_cache()
+        self.user = User.objects.create_user(username="client", password="Password123")
+        self.client.force_authenticate(self.user)
+        self.form = Form.objects.create(name="KYC", slug="kyc")
+        self.statement = FormField.objects.create(
+            form=self.form, name="statement", label="Statement", field_type="file", required=True,
+        )
+        self.content = bytes(range(256)) * 40  # 10 KB
+
+    def start(self, size=None):
+        response = self.client.post(reverse("uploads"), {
+            "filename": "statement.pdf", "size": size or len(self.content),
+            "content_type": "application/pdf", "field": self.statement.id,
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data["id"]
+
+    def put(self, upload_id, number, offset, body):
+        return self.client.generic(
+            "PUT", reverse("upload-chunk", args=[upload_id, number]), body,
+            content_type="application/octet-stream", HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_upload_resume_finalize_and_attach(self):
+        upload_id = self.start()
+        self.assertEqual(self.put(upload_id, 0, 0, self.content[:4096]).status_code, status.HTTP_200_OK)
+
+        # the response to chunk 1 was lost; the client asks where to resume and retries
+        self.put(upload_id, 1, 4096, self.content[4096:8192])
+        state = self.client.get(reverse("upload-status", args=[upload_id])).data
+        self.assertEqual((state["received"], state["chunks"]), (8192, 2))
+        retry = self.put(upload_id, 1, 4096, self.content[4096:8192])
+        self.assertEqual(retry.data["received"], 8192)
+
+        skipped = self.put(upload_id, 3, 9000, b"x")
+        self.assertEqual(skipped.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(skipped.data["offset"], 8192)
+
+        self.put(upload_id, 2, 8192, self.content[8192:])
+        finalized = self.client.post(reverse("upload-finalize", args=[upload_id]))
+        self.assertEqual(finalized.data["status"], UploadSession.STATUS_COMPLETE)
+
+        response = self.client.post(reverse("form-submit", args=[self.form.id]), {"uploads": [upload_id]})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        attachment = Submission.objects.get().attachments.get()
+        self.assertEqual((attachment.field_id, attachment.name, attachment.size),
+                         (self.statement.id, "statement.pdf", len(self.content)))
+        with attachment.file.open("rb") as stored:
+            self.assertEqual(stored.read(), self.content)
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.STATUS_ATTACHED)
+
+        # a session can only be attached once
+        again = self.client.post(reverse("form-submit", args=[self.form.id]), {"uploads": [upload_id]})
+        self.assertEqual(again.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_incomplete_upload_cannot_be_finalized_or_attached(self):
+        upload_id = self.start()
+        self.put(upload_id, 0, 0, self.content[:100])
+        self.assertEqual(self.client.post(reverse("upload-finalize", args=[upload_id])).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse("form-submit", args=[self.form.id]), {"uploads": [upload_id]})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_chunks_cannot_overrun_the_declared_size(self):
+        upload_id = self.start(size=10)
+        response = self.put(upload_id, 0, 0, b"x" * 11)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(UploadSession.objects.get().received, 0)
+
+    def test_chunk_body_is_read_outside_a_transaction(self):
+        upload_id = self.start()
+        depth = len(connection.atomic_blocks)  # the test case's own
+        body = io.BytesIO(self.content[:4096])
+        depths = []
+
+        def read(size):
+            depths.append(len(connection.atomic_blocks))
+            return body.read(size)
+
+        session = append_chunk(upload_id, self.user, 0, 0, mock.Mock(read=read))
+        self.assertEqual(set(depths), {depth})
+        self.assertEqual((session.received, session.chunks, session.claim), (4096, 1, None))
+        self.assertEqual(UploadSession.objects.get().received, 4096)
+
+    def test_a_chunk_being_written_is_not_written_twice(self):
+        upload_id = self.start()
+        # another request claimed chunk 0 and is still streaming it
+        UploadSession.objects.filter(pk=upload_id).update(claim=uuid.uuid4(), claimed_at=timezone.now())
+        busy = self.put(upload_id, 0, 0, self.content[:4096])
+        self.assertEqual(busy.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(busy.data["offset"], 0)
+
+        # a claim left by a worker that died is taken over once it goes stale
+        UploadSession.objects.filter(pk=upload_id).update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.put(upload_id, 0, 0, self.content[:4096]).data["received"], 4096)
+
+    def test_a_failed_chunk_releases_its_claim(self):
+        upload_id = self.start(size=10)
+        self.assertEqual(self.put(upload_id, 0, 0, b"x" * 11).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsNone(UploadSession.objects.get().claim)
+        self.assertEqual(self.put(upload_id, 0, 0, b"x" * 10).status_code, status.HTTP_200_OK)
+
+    def finished(self):
+        upload_id = self.start()
+        self.put(upload_id, 0, 0, self.content)
+        self.client.post(reverse("upload-finalize", args=[upload_id]))
+        return upload_id, UploadSession.objects.get(pk=upload_id).temp_path
+
+    def submit_uploads(self, *upload_ids):
+        return self.client.post(reverse("form-submit", args=[self.form.id]), {"uploads": list(upload_ids)})
+
+    def test_temp_file_is_removed_once_the_submission_commits(self):
+        upload_id, part = self.finished()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.submit_uploads(upload_id)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertFalse(os.path.exists(part))
+        with Submission.objects.get().attachments.get().file.open("rb") as stored:
+            self.assertEqual(stored.read(), self.content)
+
+    def test_a_failed_submit_can_be_retried(self):
+        upload_id, part = self.finished()
+        acquire = blobs.acquire
+        calls = []
+
+        def fail_second(*args):
+            # the session's file is already in storage when the next one fails
+            calls.append(args)
+            if len(calls) > 1:
+                raise RuntimeError("disk full")
+            return acquire(*args)
+
+        # a second session, not tied to a field
+        extra = self.client.post(reverse("uploads"), {"filename": "notes.txt", "size": 5}, format="json").data["id"]
+        self.put(extra, 0, 0, b"notes")
+        self.client.post(reverse("upload-finalize", args=[extra]))
+
+        with mock.patch("api.blobs.acquire", fail_second), self.assertRaises(RuntimeError):
+            self.submit_uploads(upload_id, extra)
+        # rolled back: the session is still complete and its temp file still there
+        self.assertEqual(UploadSession.objects.get(pk=upload_id).status, UploadSession.STATUS_COMPLETE)
+        self.assertTrue(os.path.exists(part))
+        self.assertEqual(self.submit_uploads(upload_id, extra).status_code, status.HTTP_201_CREATED)
+
+    def test_a_session_attached_concurrently_is_a_bad_request(self):
+        upload_id, part = self.finished()
+        read = completed_sessions
+
+        def attached_meanwhile(user, ids):
+            # another submit attaches the session after this one has read it
+            sessions = read(user, ids)
+            UploadSession.objects.filter(pk=upload_id).update(status=UploadSession.STATUS_ATTACHED)
+            return sessions
+
+        with mock.patch("api.views.completed_sessions", attached_meanwhile):
+            self.assertEqual(self.submit_uploads(upload_id).status_code, status.HTTP_400_BAD_REQUEST)
+            # ... and its commit has already removed the temp file
+            UploadSession.objects.filter(pk=upload_id).update(status=UploadSession.STATUS_COMPLETE)
+            os.remove(part)
+            self.assertEqual(self.submit_uploads(upload_id).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Submission.objects.exists())
+
+    def test_session_files_are_closed_when_the_submission_is_invalid(self):
+        upload_id, _ = self.finished()
+
+        def invalid(serializer, **kwargs):
+            serializer._errors = {"form": ["Invalid."]}
+            return False
+
+        with mock.patch("api.views.SubmissionSerializer.is_valid", autospec=True, side_effect=invalid), \
+                mock.patch.object(SessionFile, "close", autospec=True) as close:
+            self.assertEqual(self.submit_uploads(upload_id).status_code, status.HTTP_400_BAD_REQUEST)
+        close.assert_called_once()
+
+    def test_sessions_are_private(self):
+        upload_id = self.start()
+        other = User.objects.create_user(username="other", password="Password123")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.put(upload_id, 0, 0, b"x").status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestContentAddressedStorage(UploadTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        clear_form_schema_cache()
+        clear_validator_cache()
+        self.user = User.objects.create_user(username="client", password="Password123")
+        self.client.force_authenticate(self.user)
+        self.form = Form.objects.create(name="KYC", slug="kyc")
+        FormField.objects.create(form=self.form, name="passport", label="Passport", field_type="file")
+        self.url = reverse("form-submit", args=[self.form.id])
+
+    def submit(self, content, name="passport.pdf"):
+        response = self.client.post(self.url, {"passport": SimpleUploadedFile(name, content)})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return Submission.objects.get(pk=response.data["submission_id"])
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.submit(b"same passport scan")
+        with mock.patch.object(ContentAddressedStorage, "_save") as write:
+            second = self.submit(b"same passport scan", name="copy.pdf")
+        write.assert_not_called()
+
+        a, b = first.attachments.get(), second.attachments.get()
+        self.assertEqual(a.blob_id, b.blob_id)
+        self.assertEqual(a.file.name, b.file.name)
+        self.assertEqual((a.name, b.name), ("passport.pdf", "copy.pdf"))
+        blob = Blob.objects.get()
+        self.assertEqual(blob.refcount, 2)
+        self.assertEqual(blob.digest, hashlib.sha256(b"same passport scan").hexdigest())
+
+        self.submit(b"a different document")
+        self.assertEqual(Blob.objects.count(), 2)
+
+    def test_unreferenced_files_are_swept(self):
+        first = self.submit(b"statement")
+        second = self.submit(b"statement")
+        name = first.attachments.get().file.name
+        storage = first.attachments.get().file.storage
+
+        first.delete()
+        self.assertEqual(Blob.objects.get().refcount, 1)
+        second.delete()
+        # the last reference leaves a tombstone; only the sweep deletes files
+        self.assertEqual(Blob.objects.get().refcount, 0)
+        self.assertTrue(storage.exists(name))
+
+        call_command("sweep_blobs", stdout=io.StringIO())
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(storage.exists(name))
+
+    def test_uploading_again_revives_a_tombstone(self):
+        blob = self.submit(b"statement").attachments.get().blob
+        Submission.objects.all().delete()
+        self.assertEqual(Blob.objects.get().refcount, 0)
+
+        again = self.submit(b"statement", name="statement.pdf").attachments.get()
+        self.assertEqual((again.blob_id, Blob.objects.get().refcount), (blob.pk, 1))
+        self.assertEqual(blobs.sweep(), 0)
+        with again.file.open("rb") as stored:
+            self.assertEqual(stored.read(), b"statement")
+
+    def test_tombstone_whose_file_went_missing_is_stored_again(self):
+        blob = self.submit(b"statement").attachments.get().blob
+        Submission.objects.all().delete()
+        # a sweep that deleted the file but whose transaction then rolled back
+        blob.file.storage.delete(blob.file.name)
+
+        again = self.submit(b"statement").attachments.get()
+        self.assertEqual(again.blob_id, blob.pk)
+        self.assertTrue(again.file.storage.exists(again.file.name))
+
+    def test_interrupted_writes_leave_no_file(self):
+        storage = ContentAddressedStorage(location=self.media_root)
+        content = ContentFile(b"statement", name="statement.pdf")
+        target = blob_name(file_digest(content), "statement.pdf")
+
+        def broken_chunks(*args, **kwargs):
+            yield b"state"
+            raise OSError("disk full")
+
+        with mock.patch.object(content, "chunks", broken_chunks), self.assertRaises(OSError):
+            storage._save(target, content)
+        # nothing under the final name, and no partial temp file left behind
+        self.assertFalse(storage.exists(target))
+        self.assertEqual(storage.listdir(os.path.dirname(target)), ([], []))
+        self.assertEqual(storage.save("statement.pdf", ContentFile(b"statement", name="statement.pdf")), target)
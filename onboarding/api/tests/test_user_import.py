@@ -0,0 +1,109 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api import counters
+from api.models import Roles
+from api.user_import import hash_passwords
+
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class TestBulkUserImport(APITestCase):
+
+    def setUp(self):
+        self.url = reverse("users-bulk-import")
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="Password123",
+            is_staff=True, is_superuser=True,
+        )
+        self.client.force_authenticate(self.admin)
+
+    def rows(self, count, start=0):
+        return [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "first_name": f"User{i}",
+             "password": "Password123", "role": "staff" if i % 10 == 0 else "client"}
+            for i in range(start, start + count)
+        ]
+
+    def test_json_import_creates_users_and_roles_in_bulk(self):
+        users_before = counters.get_count("users")
+        # 2 duplicate checks, savepoint, users, roles, counter update, release
+        with self.assertNumQueries(7):
+            response = self.client.post(self.url, self.rows(50), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data, {"created": 50})
+
+        user = User.objects.get(username="user0")
+        self.assertTrue(user.is_staff)
+        self.assertFalse(user.is_superuser)
+        self.assertTrue(user.check_password("Password123"))
+        self.assertEqual(Roles.objects.filter(role="client").count(), 45)
+        self.assertEqual(counters.get_count("users"), users_before + 50)
+
+    def test_csv_upload(self):
+        csv = "username,email,first_name,last_name,password,role\n" \
+              "ann,ann@example.com,Ann,Lee,Password123,Admin\n" \
+              "ben,ben@example.com,Ben,,,\n"
+        response = self.client.post(self.url, {"file": SimpleUploadedFile("people.csv", csv.encode())})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertTrue(User.objects.get(username="ann").is_superuser)
+        # no password: the account can't log in until one is set
+        self.assertFalse(User.objects.get(username="ben").has_usable_password())
+
+    def test_duplicates_reject_the_whole_batch(self):
+        rows = self.rows(3) + [{"username": "admin", "email": "USER1@example.com"}]
+        response = self.client.post(self.url, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("email", response.data)
+
+        response = self.client.post(self.url, self.rows(2) + [{"username": "admin", "email": "new@example.com"}],
+                                    format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("admin", response.data["username"][0])
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_existing_emails_match_whatever_their_case(self):
+        User.objects.create_user(username="mixed", email="Mixed.Case@Example.com")
+        rows = self.rows(2) + [{"username": "newcomer", "email": "mixed.case@example.COM"}]
+        response = self.client.post(self.url, rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Mixed.Case@example.com", response.data["email"][0])
+        self.assertFalse(User.objects.filter(username="newcomer").exists())
+
+    @override_settings(USER_IMPORT_MAX_ROWS=5)
+    def test_large_imports_are_sent_to_the_management_command(self):
+        response = self.client.post(self.url, self.rows(6), format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("import_users", response.data["detail"])
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_requests_hash_in_process(self):
+        with mock.patch("api.user_import.ProcessPoolExecutor") as pool:
+            response = self.client.post(self.url, self.rows(10), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        pool.assert_not_called()
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("username,email,password\ncarl,carl@example.com,Password123\n")
+        self.addCleanup(os.remove, f.name)
+        call_command("import_users", f.name, "--workers", "1", stdout=open(os.devnull, "w"))
+        self.assertTrue(User.objects.filter(username="carl").exists())
+
+    def test_hashing_across_processes_matches_in_process(self):
+        passwords = ["Password1", "", "Password2", "Password3"]
+        hashes = hash_passwords(passwords, workers=2)
+        self.assertEqual(len(hashes), 4)
+        self.assertTrue(hashes[1].startswith("!"))
+        user = User(password=hashes[2])
+        self.assertTrue(user.check_password("Password2"))
@@ -0,0 +1,123 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.form_schema import clear_form_schema_cache
+from api.models import FieldOption, Form, FormField, Submission
+from api.validation import clear_validator_cache, get_submission_validator
+
+
+def add_field(form, name, field_type="text", options=(), **kwargs):
+    field = FormField.objects.create(form=form, name=name, label=name.title(), field_type=field_type, **kwargs)
+    FieldOption.objects.bulk_create([FieldOption(field=field, value=v, label=v) for v in options])
+    return field
+
+
+class TestSubmissionValidator(TestCase):
+
+    def setUp(self):
+        clear_form_schema_cache()
+        clear_validator_cache()
+        self.form = Form.objects.create(name="KYC", slug="kyc")
+        add_field(self.form, "full_name", required=True, validation={"min_length": 2, "max_length": 20})
+        add_field(self.form, "age", "number", validation={"min": 18, "max": 120})
+        add_field(self.form, "email", "email")
+        add_field(self.form, "born", "date", validation={"max": "2010-01-01"})
+        add_field(self.form, "country", "select", options=["ke", "ug"])
+        add_field(self.form, "docs", "checkbox", options=["id", "passport", "utility"], validation={"max": 2})
+        add_field(self.form, "tax_pin", validation={
+            "regex": r"[A-Z]\d{9}[A-Z]", "message": "Invalid PIN.",
+            "required": True, "conditional": {"field": "country", "equals": "ke"},
+        })
+
+    def clean(self, payload):
+        return get_submission_validator(Form.objects.get(pk=self.form.pk)).clean(payload)
+
+    def test_valid_payload_keeps_only_form_fields(self):
+        data, errors = self.clean({
+            "full_name": "Ada", "age": "30", "email": "ada@example.com", "born": "1990-05-01",
+            "country": "ke", "docs": ["id", "passport"], "tax_pin": "A123456789B", "extra": "dropped",
+        })
+        self.assertEqual(errors, {})
+        self.assertEqual(data["docs"], ["id", "passport"])
+        self.assertNotIn("extra", data)
+
+    def test_rule_violations(self):
+        _, errors = self.clean({
+            "full_name": "A", "age": "12", "email": "nope", "born": "2015-01-01",
+            "country": "tz", "docs": ["id", "passport", "utility"],
+        })
+        self.assertEqual(
+            set(errors), {"full_name", "age", "email", "born", "country", "docs"}
+        )
+        self.assertEqual(self.clean({})[1], {"full_name": ["This field is required."]})
+
+    def test_impossible_dates(self):
+        for born in ("2024-02-30", "2023-13-01", "1990-5-1x"):
+            with self.subTest(born):
+                _, errors = self.clean({"full_name": "Ada", "born": born})
+                self.assertEqual(errors, {"born": ["Enter a valid date (YYYY-MM-DD)."]})
+
+        # a bound that isn't a day is ignored instead of breaking the validator
+        add_field(self.form, "start", "date", validation={"min": "2024-02-30", "max": "2030-01-01"})
+        _, errors = self.clean({"full_name": "Ada", "start": "1900-01-01"})
+        self.assertEqual(errors, {})
+        _, errors = self.clean({"full_name": "Ada", "start": "2031-01-01"})
+        self.assertEqual(errors, {"start": ["Must be on or before 2030-01-01."]})
+
+    def test_conditional_rules(self):
+        _, errors = self.clean({"full_name": "Ada", "country": "ke"})
+        self.assertEqual(errors, {"tax_pin": ["This field is required."]})
+        _, errors = self.clean({"full_name": "Ada", "country": "ke", "tax_pin": "123"})
+        self.assertEqual(errors, {"tax_pin": ["Invalid PIN."]})
+        _, errors = self.clean({"full_name": "Ada", "country": "ug"})
+        self.assertEqual(errors, {})
+
+    def test_validator_is_cached_per_schema_version(self):
+        form = Form.objects.get(pk=self.form.pk)
+        validator = get_submission_validator(form)
+        self.assertIs(get_submission_validator(Form.objects.get(pk=self.form.pk)), validator)
+
+        add_field(self.form, "phone", required=True)
+        form = Form.objects.get(pk=self.form.pk)
+        self.assertIsNot(get_submission_validator(form), validator)
+        self.assertIn("phone", get_submission_validator(form).clean({"full_name": "Ada"})[1])
+
+
+class TestSubmitValidation(APITestCase):
+
+    def setUp(self):
+        clear_form_schema_cache()
+        clear_validator_cache()
+        self.user = User.objects.create_user(username="client", password="Password123")
+        self.client.force_authenticate(self.user)
+        self.form = Form.objects.create(name="KYC", slug="kyc")
+        add_field(self.form, "full_name", required=True)
+        add_field(self.form, "docs", "checkbox", options=["id", "passport"])
+        self.url = reverse("form-submit", args=[self.form.id])
+
+    def test_invalid_submission_is_rejected(self):
+        response = self.client.post(self.url, {"docs": "visa"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data["data"]), {"full_name", "docs"})
+        self.assertFalse(Submission.objects.exists())
+
+    def test_impossible_date_is_a_bad_request(self):
+        add_field(self.form, "born", "date")
+        response = self.client.post(self.url, {"full_name": "Ada", "born": "2024-02-30"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["data"], {"born": ["Enter a valid date (YYYY-MM-DD)."]})
+
+    def test_warm_submit_does_not_read_field_tables(self):
+        self.client.post(self.url, {"full_name": "Ada"})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, {"full_name": "Ada", "docs": ["id", "passport"]})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(Submission.objects.get(pk=response.data["submission_id"]).data,
+                         {"full_name": "Ada", "docs": ["id", "passport"]})
+        touched = [q["sql"] for q in ctx.captured_queries if "api_formfield" in q["sql"] or "api_fieldoption" in q["sql"]]
+        self.assertEqual(touched, [])
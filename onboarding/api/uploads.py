@@ -0,0 +1,213 @@
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import UploadSession
+
+
+class StreamingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream every upload to a temporary file chunk by chunk, whatever its size.
+    Django's default MemoryFileUploadHandler would keep small files in RAM;
+    with several files per submission those add up per worker.
+    Point FILE_UPLOAD_TEMP_DIR at the storage's filesystem and saving the
+    finished file becomes a rename instead of a second copy.
+    Each file is hashed as it streams through and gets a `sha256` attribute,
+    which the content-addressed storage uses without reading the file again.
+    """
+    chunk_size = getattr(settings, "FILE_UPLOAD_CHUNK_SIZE", 256 * 1024)
+
+    def new_file(self, *args, **kwargs):
+        temp_dir = getattr(settings, "FILE_UPLOAD_TEMP_DIR", None)
+        if temp_dir:
+            os.makedirs(temp_dir, exist_ok=True)
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.sha256 = self.sha256.hexdigest()
+        return upload
+
+
+class UploadConflict(APIException):
+    """A chunk that doesn't continue the upload where it left off; says where to resume"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Chunk does not match the upload's current offset."
+    default_code = "upload_conflict"
+
+    def __init__(self, session, detail=None):
+        super().__init__(detail)
+        # kept as plain values so offset and chunk stay numbers in the response
+        self.detail = {"detail": str(self.detail), "offset": session.received, "chunk": session.chunks}
+
+
+class SessionFile(File):
+    """
+    A finished upload session's temp file. Its link_path() lets the blob
+    storage hard-link the file into place instead of copying it, and the
+    temp file itself stays until the submission commits (see
+    remove_session_files), so a rolled back submit can be retried.
+    """
+
+    def __init__(self, session):
+        super().__init__(open(session.temp_path, "rb"), name=session.filename)
+        self.session = session
+        self.size = session.size
+        self.content_type = session.content_type
+        self.sha256 = session.digest or None
+
+    def link_path(self):
+        return self.session.temp_path
+
+
+def open_session_files(sessions):
+    """
+    SessionFiles for completed sessions. A temp file that is gone means a
+    concurrent submit attached the session first, which is a 400.
+    """
+    files = []
+    for session in sessions:
+        try:
+            files.append(SessionFile(session))
+        except FileNotFoundError:
+            for file in files:
+                file.close()
+            raise ValidationError({"uploads": [f"Unknown or unfinished uploads: {session.pk}"]})
+    return files
+
+
+def remove_session_files(paths):
+    """Delete attached sessions' temp files; run on commit"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _claim_chunk(session_id, user, number, offset):
+    """
+    Check that chunk `number` continues the upload at `offset` and mark the
+    session as being written, in one short transaction. Returns the session
+    and the claim, or no claim for a chunk that was already written.
+    """
+    stale = timezone.now() - timedelta(seconds=getattr(settings, "UPLOAD_CHUNK_CLAIM_SECONDS", 600))
+    with transaction.atomic():
+        session = get_object_or_404(UploadSession.objects.select_for_update(), pk=session_id, user=user)
+        if session.status != UploadSession.STATUS_OPEN:
+            raise UploadConflict(session, "Upload is already finalized.")
+        if number < session.chunks and offset < session.received:
+            return session, None
+        if number != session.chunks or offset != session.received:
+            raise UploadConflict(session, f"Expected chunk {session.chunks} at offset {session.received}.")
+        if session.claim and session.claimed_at > stale:
+            raise UploadConflict(session, f"Chunk {session.chunks} is being written by another request.")
+        session.claim, session.claimed_at = uuid.uuid4(), timezone.now()
+        session.save(update_fields=["claim", "claimed_at"])
+    return session, session.claim
+
+
+def _write_chunk(session, stream, max_chunk):
+    """Stream a chunk into the temp file at the session's offset; returns the bytes written"""
+    path = session.temp_path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    with open(path, "r+b" if os.path.exists(path) else "wb") as part:
+        # drop anything a previously interrupted write left past the offset
+        part.seek(session.received)
+        part.truncate()
+        for block in iter(lambda: stream.read(64 * 1024), b""):
+            written += len(block)
+            if written > max_chunk or session.received + written > session.size:
+                part.truncate(session.received)
+                raise ValidationError({"detail": "Chunk is larger than allowed or overruns the declared size."})
+            part.write(block)
+    if not written:
+        raise ValidationError({"detail": "Empty chunk."})
+    return written
+
+
+def append_chunk(session_id, user, number, offset, stream):
+    """
+    Append one chunk read from `stream` to the session's temp file.
+    Chunk `number` must start at byte `offset` where the previous one ended;
+    resending a chunk that was already written is acknowledged without
+    writing it again, so clients can retry blindly after a dropped response.
+
+    The body is read from the network with no transaction open (on SQLite
+    one would hold the database write lock for the whole transfer). A claim
+    taken beforehand keeps a second request off the same chunk, and a
+    conditional UPDATE records the chunk only if the upload is still where
+    the claim found it.
+    """
+    max_chunk = getattr(settings, "UPLOAD_CHUNK_MAX_BYTES", 8 * 1024 * 1024)
+    session, claim = _claim_chunk(session_id, user, number, offset)
+    if claim is None:
+        return session
+    claimed = UploadSession.objects.filter(pk=session.pk, claim=claim)
+    try:
+        written = _write_chunk(session, stream, max_chunk)
+    except BaseException:
+        claimed.update(claim=None, claimed_at=None)
+        raise
+
+    now = timezone.now()
+    if not claimed.filter(received=offset, chunks=number).update(
+        received=offset + written, chunks=number + 1, claim=None, claimed_at=None, updated_at=now,
+    ):
+        # the claim went stale and another request took the chunk over
+        session.refresh_from_db()
+        raise UploadConflict(session, f"Expected chunk {session.chunks} at offset {session.received}.")
+    session.received, session.chunks, session.claim, session.claimed_at, session.updated_at = (
+        offset + written, number + 1, None, None, now,
+    )
+    return session
+
+
+def finalize_upload(session_id, user):
+    with transaction.atomic():
+        session = get_object_or_404(UploadSession.objects.select_for_update(), pk=session_id, user=user)
+        if session.status == UploadSession.STATUS_OPEN:
+            if session.received != session.size:
+                raise ValidationError({
+                    "detail": f"Received {session.received} of {session.size} bytes.",
+                    "offset": session.received,
+                })
+            # hashlib state can't outlive a request, so the digest is taken
+            # here in one sequential read instead of chunk by chunk
+            sha = hashlib.sha256()
+            with open(session.temp_path, "rb") as part:
+                for block in iter(lambda: part.read(256 * 1024), b""):
+                    sha.update(block)
+            session.digest = sha.hexdigest()
+            session.status = UploadSession.STATUS_COMPLETE
+            session.save(update_fields=["digest", "status", "updated_at"])
+    return session
+
+
+def completed_sessions(user, ids):
+    """The user's finalized, not yet attached sessions with the given ids, in that order"""
+    try:
+        ids = list(dict.fromkeys(uuid.UUID(str(pk)) for pk in ids))
+    except ValueError:
+        raise ValidationError({"uploads": ["Invalid upload id."]})
+    found = UploadSession.objects.filter(user=user, status=UploadSession.STATUS_COMPLETE).in_bulk(ids)
+    missing = [str(pk) for pk in ids if pk not in found]
+    if missing:
+        raise ValidationError({"uploads": [f"Unknown or unfinished uploads: {', '.join(missing)}"]})
+    return [found[pk] for pk in ids]
@@ -11,18 +11,30 @@ urlpatterns = [
 
     path('<int:id>/', views.form_detail_api, name='form-detail'),
     path('<int:id>/submit/', views.submit_form_api, name='form-submit'),
+    path('<int:id>/export/', views.export_submissions, name='form-submissions-export'),
+
+    path('uploads/', views.create_upload, name='uploads'),
+    path('uploads/<uuid:upload_id>/', views.upload_status, name='upload-status'),
+    path('uploads/<uuid:upload_id>/chunks/<int:number>/', views.upload_chunk, name='upload-chunk'),
+    path('uploads/<uuid:upload_id>/finalize/', views.finalize_upload_api, name='upload-finalize'),
 
     path('submissions/', views.submissions_api, name='submissions'),
+    path('submissions/search/', views.search_submissions, name='submissions-search'),
     path('count-users/', views.count_users, name='count-users'),
     path('count-forms/', views.count_forms, name='count-forms'),
     path('count-submissions/', views.count_submissions, name='count-submissions'),
     path('roles/', views.roles_list, name='roles-list'),
     path('users/', views.users_list, name='users-list'),
+    path('users/bulk-import/', views.bulk_import_users, name='users-bulk-import'),
 
     path('forms/available/', views.available_forms, name='available-forms'),             
     path('forms/assign/', views.assign_form, name='assign-form'),  
+    path('forms/assign/bulk/', views.bulk_assign_forms, name='assign-forms-bulk'),
+    path('forms/bulk-import/', views.bulk_import_forms, name='forms-bulk-import'),
 
     path('me/', views.mydataapi, name='me_api'),   
+    path('dashboard/', views.dashboard, name='dashboard'),
+    path('cache-stats/', views.response_cache_stats, name='response-cache-stats'),
 
     path('delete-user/<int:user_id>/', views.delete_user, name='delete-user'),
 
@@ -0,0 +1,105 @@
+"""
+Bulk user import: rows from CSV or JSON are validated with set-based
+duplicate checks (see UserImportListSerializer), passwords are hashed across
+a process pool (by `manage.py import_users`; the API hashes its capped batches
+in-process) and users and their Roles are inserted with bulk_create.
+"""
+import codecs
+import csv
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .counters import increment
+from .models import Roles
+
+# role -> (is_staff, is_superuser), as RolesSerializer sets them
+ROLE_FLAGS = {
+    "admin": (True, True),
+    "staff": (True, False),
+    "client": (False, False),
+}
+
+
+def parse_user_rows(stream, name=""):
+    """Read rows from a binary CSV or JSON file, uploaded or opened; JSON is picked by extension"""
+    if name.lower().endswith(".json"):
+        return json.load(stream)
+    return [
+        {key.strip(): (value or "").strip() for key, value in row.items() if key}
+        for row in csv.DictReader(codecs.iterdecode(stream, "utf-8-sig"))
+    ]
+
+
+def _setup_worker():
+    # spawned (non-forked) workers start without Django configured
+    django.setup()
+
+
+def _hash_chunk(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hash passwords in parallel. PBKDF2 is CPU-bound and holds the GIL, so this
+    uses processes, not threads. Empty passwords get an unusable password.
+    """
+    passwords = list(passwords)
+    hashed = [None if password else make_password(None) for password in passwords]
+    todo = [i for i, password in enumerate(passwords) if password]
+    workers = workers or getattr(settings, "USER_IMPORT_WORKERS", None) or os.cpu_count() or 1
+
+    if workers <= 1 or len(todo) < 2:
+        for i in todo:
+            hashed[i] = make_password(passwords[i])
+        return hashed
+
+    # a few chunks per worker keeps them busy without pickling per password
+    size = math.ceil(len(todo) / (workers * 4))
+    chunks = [todo[start:start + size] for start in range(0, len(todo), size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker) as pool:
+        results = pool.map(_hash_chunk, [[passwords[i] for i in chunk] for chunk in chunks])
+        for chunk, chunk_hashes in zip(chunks, results):
+            for i, value in zip(chunk, chunk_hashes):
+                hashed[i] = value
+    return hashed
+
+
+def import_users(rows, workers=None):
+    """
+    Create users and their Roles from validated rows. Hashing happens before
+    the transaction so it isn't held open for the slow part.
+    Returns the created users.
+    """
+    rows = list(rows)
+    hashes = hash_passwords([row.get("password") for row in rows], workers)
+    batch_size = getattr(settings, "USER_IMPORT_BATCH_SIZE", 500)
+
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(
+                username=row["username"],
+                email=row["email"],
+                first_name=row.get("first_name", ""),
+                last_name=row.get("last_name", ""),
+                password=password,
+                is_staff=ROLE_FLAGS[row["role"]][0],
+                is_superuser=ROLE_FLAGS[row["role"]][1],
+            )
+            for row, password in zip(rows, hashes)
+        ], batch_size=batch_size)
+        Roles.objects.bulk_create(
+            [Roles(userid=user, role=row["role"]) for user, row in zip(users, rows)],
+            batch_size=batch_size,
+        )
+        # bulk_create skips post_save, so keep the users counter in step here
+        increment("users", delta=len(users))
+    return users
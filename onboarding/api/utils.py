@@ -1,40 +1,268 @@
-from django.core.mail import send_mail, send_mass_mail
+from datetime import timedelta
+from django.core.mail import EmailMessage, get_connection, send_mail
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
 class EmailService:
+    @staticmethod
+    def queue_email(subject, message, recipients, from_email=None):
+        """Write one outbox row per recipient; delivery happens in process_outbox"""
+        from_email = from_email or settings.DEFAULT_FROM_EMAIL
+        return EmailService.queue_mass_email(
+            (subject, message, from_email, [email]) for email in recipients
+        )
+
+    @staticmethod
+    def queue_mass_email(datatuple, fanout=None):
+        """
+        Queue messages given as send_mass_mail style (subject, message, from_email, recipient_list)
+        tuples. Each recipient gets its own outbox row, and a recipient that appears
+        twice for the same subject is only queued once. Rows expanded from a
+        `fanout` also skip addresses an earlier batch of it already queued.
+        """
+        from .models import EmailOutbox
+
+        batch_size = getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50)
+        seen = set()
+        rows = []
+        for subject, message, from_email, recipient_list in datatuple:
+            for email in recipient_list:
+                key = ((email or "").strip().lower(), subject)
+                if not key[0] or key in seen:
+                    continue
+                seen.add(key)
+                rows.append(EmailOutbox(
+                    to_email=email,
+                    from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+                    subject=subject,
+                    body=message,
+                    fanout=fanout,
+                ))
+        if fanout is None:
+            EmailOutbox.objects.bulk_create(rows, batch_size=batch_size)
+            return len(rows)
+        # ignore_conflicts can't say which rows it skipped, so count them
+        before = fanout.emails.count()
+        EmailOutbox.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+        return fanout.emails.count() - before
+
+    @staticmethod
+    def queue_group_notification(kind, group, form_ids):
+        """
+        Queue one notification to every member of `group` as a single
+        EmailFanout row, written in the caller's transaction. process_outbox
+        expands it into one email per member.
+        """
+        from .models import EmailFanout
+
+        return EmailFanout.objects.create(kind=kind, group=group, forms=list(form_ids))
+
+    @staticmethod
+    def _fanout_messages(fanout, forms, members):
+        from .models import EmailFanout
+
+        if fanout.kind == EmailFanout.KIND_ASSIGNMENT:
+            form = forms[0]
+            subject = f"New Form Assignment: {form.name}"
+            for user in members:
+                yield (subject, EmailService._create_assignment_message(form, user, fanout.group),
+                       settings.DEFAULT_FROM_EMAIL, [user.email])
+        elif fanout.kind == EmailFanout.KIND_DIGEST:
+            subject = EmailService._digest_subject(forms)
+            for user in members:
+                yield (subject, EmailService._create_digest_message(user, forms),
+                       settings.DEFAULT_FROM_EMAIL, [user.email])
+
+    @staticmethod
+    def expand_fanouts(batch_size=None):
+        """
+        Write the outbox rows of queued group notifications, `batch_size`
+        members per transaction. Each batch moves its fan-out's last_user_id
+        on in the same transaction, so a worker that stops part way resumes
+        where it left off. Returns the number of rows queued.
+        """
+        from .models import EmailFanout, Form, FormAssignment
+
+        batch_size = batch_size or getattr(settings, "EMAIL_FANOUT_BATCH_SIZE", 500)
+        queued = 0
+        while True:
+            with transaction.atomic():
+                fanout = (
+                    EmailFanout.objects.select_for_update(skip_locked=True)
+                    .filter(done_at__isnull=True).order_by("id").first()
+                )
+                if fanout is None:
+                    break
+                found = Form.objects.only("name", "description").in_bulk(fanout.forms)
+                forms = [found[pk] for pk in fanout.forms if pk in found]
+                members = list(
+                    FormAssignment.group_members(fanout.group)
+                    .filter(pk__gt=fanout.last_user_id).exclude(email="")
+                    .only("username", "first_name", "email").order_by("pk")[:batch_size]
+                ) if forms else []
+                if members:
+                    queued += EmailService.queue_mass_email(
+                        EmailService._fanout_messages(fanout, forms, members), fanout=fanout,
+                    )
+                    fanout.last_user_id = members[-1].pk
+                if len(members) < batch_size:
+                    fanout.done_at = timezone.now()
+                fanout.save(update_fields=["last_user_id", "done_at"])
+        return queued
+
+    @staticmethod
+    def process_outbox(batch_size=None, max_attempts=None):
+        """
+        Expand queued group notifications, then deliver due outbox rows in
+        batches over a single reused connection. Failed rows are retried with
+        exponential backoff and marked dead once they run out of attempts.
+        Returns a (sent, failed) tuple.
+        """
+        from .models import EmailOutbox
+
+        EmailService.expand_fanouts()
+
+        batch_size = batch_size or getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50)
+        max_attempts = max_attempts or getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+        retry_base = getattr(settings, "EMAIL_OUTBOX_RETRY_BASE_SECONDS", 60)
+        sent = failed = 0
+
+        connection = get_connection()
+        opened = False
+        try:
+            while True:
+                with transaction.atomic():
+                    batch = list(
+                        EmailOutbox.objects.select_for_update(skip_locked=True)
+                        .filter(status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+                        .order_by("next_attempt_at", "id")[:batch_size]
+                    )
+                    if not batch:
+                        break
+
+                    for item in batch:
+                        item.attempts += 1
+                        try:
+                            if not opened:
+                                connection.open()
+                                opened = True
+                            connection.send_messages([EmailMessage(
+                                subject=item.subject,
+                                body=item.body,
+                                from_email=item.from_email or settings.DEFAULT_FROM_EMAIL,
+                                to=[item.to_email],
+                                connection=connection,
+                            )])
+                        except Exception as e:
+                            # Drop the (possibly broken) connection; the next send reopens it
+                            connection.close()
+                            opened = False
+                            item.last_error = str(e)
+                            if item.attempts >= max_attempts:
+                                item.status = EmailOutbox.STATUS_DEAD
+                            else:
+                                delay = retry_base * (2 ** (item.attempts - 1))
+                                item.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+                            failed += 1
+                            logger.warning(f"Failed to send outbox email {item.id} to {item.to_email}: {e}")
+                        else:
+                            item.status = EmailOutbox.STATUS_SENT
+                            item.sent_at = timezone.now()
+                            item.last_error = ""
+                            sent += 1
+
+                    EmailOutbox.objects.bulk_update(
+                        batch, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+                    )
+        finally:
+            connection.close()
+
+        if sent or failed:
+            logger.info(f"Outbox processed: {sent} sent, {failed} failed")
+        return sent, failed
+
     @staticmethod
     def send_form_assignment_email(form, users, assignment_type="staff"):
-        """Send email notification when a form is assigned to users"""
+        """Queue one notification per recipient when a form is assigned to users"""
         try:
             subject = f"New Form Assignment: {form.name}"
-            
-            # Prepare email data for mass sending
-            email_messages = []
-            
-            for user in users:
-                message = EmailService._create_assignment_message(form, user, assignment_type)
-                
-                email_messages.append((
+            if hasattr(users, "only"):
+                users = users.only("username", "first_name", "email").iterator()
+
+            # Prepare email data for mass queueing
+            email_messages = (
+                (
                     subject,
-                    message,
+                    EmailService._create_assignment_message(form, user, assignment_type),
                     settings.DEFAULT_FROM_EMAIL,
                     [user.email]
-                ))
-            
-            # Send all emails
-            if email_messages:
-                send_mass_mail(email_messages, fail_silently=False)
-                logger.info(f"Assignment emails sent for form '{form.name}' to {len(users)} users")
+                )
+                for user in users if user.email
+            )
+
+            queued = EmailService.queue_mass_email(email_messages)
+            if queued:
+                logger.info(f"Assignment emails queued for form '{form.name}' to {queued} users")
                 return True
-                
+            return False
+
         except Exception as e:
-            logger.error(f"Failed to send assignment emails: {str(e)}")
+            logger.error(f"Failed to queue assignment emails: {str(e)}")
             return False
     
+    @staticmethod
+    def send_assignment_digest(digests):
+        """
+        Queue one email per user for a bulk assignment, listing every form they
+        were given. `digests` yields (user, forms) pairs. Returns the number queued.
+        """
+        try:
+            email_messages = (
+                (
+                    EmailService._digest_subject(forms),
+                    EmailService._create_digest_message(user, forms),
+                    settings.DEFAULT_FROM_EMAIL,
+                    [user.email]
+                )
+                for user, forms in digests if user.email and forms
+            )
+            queued = EmailService.queue_mass_email(email_messages)
+            if queued:
+                logger.info(f"Assignment digests queued for {queued} users")
+            return queued
+
+        except Exception as e:
+            logger.error(f"Failed to queue assignment digests: {str(e)}")
+            return 0
+
+    @staticmethod
+    def _digest_subject(forms):
+        if len(forms) == 1:
+            return f"New Form Assignment: {forms[0].name}"
+        return f"{len(forms)} New Form Assignments"
+
+    @staticmethod
+    def _create_digest_message(user, forms):
+        """Create digest email content"""
+        form_lines = "\n".join(f"- {form.name}" for form in forms)
+        return f"""
+Hello {user.first_name or user.username},
+
+You have been assigned new forms to complete:
+
+{form_lines}
+
+Please log in to your account to view and complete these forms.
+
+Best regards,
+Customer Onboarding Team
+        """.strip()
+
     @staticmethod
     def _create_assignment_message(form, user, assignment_type):
         """Create email message content"""
@@ -71,7 +299,7 @@ Customer Onboarding Team
 
     @staticmethod
     def send_form_submission_notification(submission):
-        """Send email notification to admins when a form is submitted"""
+        """Queue email notifications to admins when a form is submitted"""
         try:
             # Get all admin users (is_staff=True and is_superuser=True)
             admin_users = User.objects.filter(is_staff=True, is_superuser=True)
@@ -96,17 +324,17 @@ Customer Onboarding Team
                         [admin.email]
                     ))
             
-            # Send all emails
+            # Queue all emails
             if email_messages:
-                send_mass_mail(email_messages, fail_silently=False)
-                logger.info(f"Submission notification emails sent for form '{submission.form.name}' to {len(email_messages)} admins")
+                EmailService.queue_mass_email(email_messages)
+                logger.info(f"Submission notification emails queued for form '{submission.form.name}' to {len(email_messages)} admins")
                 return True
             else:
                 logger.info("No admin users with email addresses found")
                 return False
                 
         except Exception as e:
-            logger.error(f"Failed to send submission notification emails: {str(e)}")
+            logger.error(f"Failed to queue submission notification emails: {str(e)}")
             return False
     
     @staticmethod
@@ -0,0 +1,260 @@
+"""
+Server-side submission validation compiled from a form's schema.
+
+Each field becomes a closure with its rules resolved up front: regexes are
+compiled once, option values are held in frozensets and conditional rules are
+turned into predicates. Validators are cached per (form id, schema version),
+so validating a payload never reads the field tables.
+
+Rules come from FormField.required / multiple / options and the
+FormField.validation object:
+    required            same as FormField.required
+    min, max            number value, date (ISO) bounds, text length or
+                        number of checkbox selections, depending on field_type
+    min_length,
+    max_length          text length
+    regex (or pattern)  full match on text values; `message` overrides the error
+    conditional         {"field": name, "equals": value} or {"field": name, "in": [...]};
+                        without either, the other field just has to be filled in.
+                        The field is only validated while the condition holds.
+                        May also live in FormField.config.
+"""
+import logging
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.dateparse import parse_date
+
+from .form_schema import get_form_schema
+
+logger = logging.getLogger(__name__)
+
+TEXT_TYPES = frozenset(["text", "textarea", "email"])
+CHOICE_TYPES = frozenset(["select", "radio", "checkbox"])
+REQUIRED = "This field is required."
+
+
+# a plain shape check; deliverability is the outbox's problem
+EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s.]+")
+
+
+def _is_empty(values):
+    for value in values:
+        if value is not None and value != "":
+            return False
+    return True
+
+
+def _number(value):
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+
+def _date(value):
+    if isinstance(value, date):
+        return value
+    try:
+        return parse_date(str(value))
+    except ValueError:
+        # well formed but not a day, such as 2024-02-30
+        return None
+
+
+def _bound(field_type, value):
+    """A min/max rule as a number or date; a rule that isn't one is ignored"""
+    if value in (None, ""):
+        return None
+    if field_type == "date":
+        return _date(value)
+    return _number(value)
+
+
+def _value_checks(field, rules):
+    """Closures that each take one value and return an error message or None"""
+    field_type = field["field_type"]
+    checks = []
+
+    if field_type == "number":
+        low, high = _bound("number", rules.get("min")), _bound("number", rules.get("max"))
+
+        def check_number(value):
+            number = _number(value)
+            if number is None:
+                return "Enter a number."
+            if low is not None and number < low:
+                return f"Must be at least {low}."
+            if high is not None and number > high:
+                return f"Must be at most {high}."
+        checks.append(check_number)
+
+    elif field_type == "date":
+        low, high = _bound("date", rules.get("min")), _bound("date", rules.get("max"))
+
+        def check_date(value):
+            day = _date(value)
+            if day is None:
+                return "Enter a valid date (YYYY-MM-DD)."
+            if low is not None and day < low:
+                return f"Must be on or after {low.isoformat()}."
+            if high is not None and day > high:
+                return f"Must be on or before {high.isoformat()}."
+        checks.append(check_date)
+
+    elif field_type in CHOICE_TYPES:
+        allowed = frozenset(str(option["value"]) for option in field.get("options") or ())
+        if allowed:
+            def check_choice(value):
+                if str(value) not in allowed:
+                    return f"'{value}' is not a valid choice."
+            checks.append(check_choice)
+
+    if field_type == "email":
+        def check_email(value):
+            if not EMAIL_RE.fullmatch(str(value)):
+                return "Enter a valid email address."
+        checks.append(check_email)
+
+    if field_type in TEXT_TYPES:
+        min_length = _number(rules.get("min_length", rules.get("min", "")))
+        max_length = _number(rules.get("max_length", rules.get("max", "")))
+        if min_length is not None or max_length is not None:
+            def check_length(value):
+                length = len(str(value))
+                if min_length is not None and length < min_length:
+                    return f"Must be at least {min_length} characters."
+                if max_length is not None and length > max_length:
+                    return f"Must be at most {max_length} characters."
+            checks.append(check_length)
+
+        pattern = rules.get("regex") or rules.get("pattern")
+        if pattern:
+            try:
+                compiled = re.compile(pattern)
+            except re.error:
+                logger.warning(f"Ignoring invalid regex on field '{field['name']}': {pattern}")
+            else:
+                message = rules.get("message") or "Enter a valid value."
+
+                def check_pattern(value):
+                    if not compiled.fullmatch(str(value)):
+                        return message
+                checks.append(check_pattern)
+
+    return checks
+
+
+def _condition(rule):
+    """Predicate over all submitted values that says whether a field applies"""
+    if not isinstance(rule, dict) or not rule.get("field"):
+        return None
+    other = rule["field"]
+    if "in" in rule:
+        expected = frozenset(str(value) for value in rule["in"])
+    elif "equals" in rule or "value" in rule:
+        expected = frozenset([str(rule.get("equals", rule.get("value")))])
+    else:
+        expected = None
+
+    def applies(values):
+        submitted = values.get(other, ())
+        if expected is None:
+            return not _is_empty(submitted)
+        return any(str(value) in expected for value in submitted)
+    return applies
+
+
+def _compile_field(field):
+    rules = field.get("validation") or {}
+    field_type = field["field_type"]
+    multiple = bool(field.get("multiple")) or field_type == "checkbox"
+    required = bool(field.get("required") or rules.get("required"))
+    checks = [] if field_type == "file" else _value_checks(field, rules)
+    applies = _condition(rules.get("conditional") or (field.get("config") or {}).get("conditional"))
+
+    # for checkboxes min/max count selections
+    min_items = _number(rules.get("min", "")) if field_type == "checkbox" else None
+    max_items = _number(rules.get("max", "")) if field_type == "checkbox" else None
+
+    def check(submitted, values):
+        if applies is not None and not applies(values):
+            return None
+        if _is_empty(submitted):
+            return REQUIRED if required else None
+        if not multiple and len(submitted) > 1:
+            return "Only one value is allowed."
+        if min_items is not None and len(submitted) < min_items:
+            return f"Select at least {min_items}."
+        if max_items is not None and len(submitted) > max_items:
+            return f"Select at most {max_items}."
+        for value in submitted:
+            for value_check in checks:
+                error = value_check(value)
+                if error:
+                    return error
+        return None
+
+    return field["name"], multiple, field_type == "file", check
+
+
+class SubmissionValidator:
+    """A form's fields compiled into closures; build with get_submission_validator()"""
+
+    def __init__(self, schema):
+        self.fields = [_compile_field(field) for field in schema.get("fields", [])]
+        # name -> FormField id, for attaching uploaded files
+        self.file_fields = {
+            field["name"]: field["id"] for field in schema.get("fields", []) if field["field_type"] == "file"
+        }
+
+    def clean(self, payload, extra=None):
+        """
+        Validate a submission payload (a dict or a QueryDict of form data).
+        `extra` maps field names to more values for them, such as the
+        filenames of finished upload sessions.
+        Returns (data, errors): the values of the form's fields, with uploaded
+        files replaced by their names, and a {field name: [message]} dict.
+        Keys that aren't fields of the form are dropped.
+        """
+        getlist = getattr(payload, "getlist", None)
+        values = {}
+        for name, _, _, _ in self.fields:
+            if getlist is not None:
+                values[name] = getlist(name)
+            else:
+                value = payload.get(name)
+                values[name] = value if isinstance(value, list) else ([] if value is None else [value])
+        for name, more in (extra or {}).items():
+            if name in values:
+                values[name] = values[name] + list(more)
+
+        data, errors = {}, {}
+        for name, multiple, is_file, check in self.fields:
+            submitted = values[name]
+            error = check(submitted, values)
+            if error:
+                errors[name] = [error]
+            elif submitted:
+                if is_file:
+                    submitted = [getattr(value, "name", value) for value in submitted]
+                data[name] = submitted if multiple else submitted[0]
+        return data, errors
+
+
+@lru_cache(maxsize=getattr(settings, "FORM_SCHEMA_CACHE_SIZE", 256))
+def _validator_for_version(form_id, version):
+    return SubmissionValidator(get_form_schema(form_id, version))
+
+
+def get_submission_validator(form):
+    """Compiled validator for the form's current schema version"""
+    return _validator_for_version(form.pk, form.schema_version)
+
+
+def clear_validator_cache():
+    _validator_for_version.cache_clear()
@@ -1,14 +1,26 @@
+import io
 from rest_framework.decorators import api_view, permission_classes,parser_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated,IsAdminUser
 from rest_framework import status
-from rest_framework.exceptions import AuthenticationFailed
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
 from django.contrib.auth.models import User
-from .serializers import SignupSerializer, LoginSerializer, FormSerializer,SubmissionSerializer,RolesSerializer,UsersSerializer,SimpleFormSerializer,FormAssignmentSerializer
-from .models import Form,Submission,Roles
-from rest_framework.parsers import MultiPartParser, FormParser
+from django.conf import settings
+from .serializers import SignupSerializer, LoginSerializer, FormSerializer,SubmissionSerializer,RolesSerializer,UsersSerializer,UserImportSerializer,SimpleFormSerializer,UploadSessionSerializer,FormAssignmentSerializer,FormBulkAssignmentSerializer,FormImportSerializer
+from .models import Form,Submission,Roles,Counter,UploadSession
+from . import counters, metrics, response_cache, search
+from .authentication import UserRefreshToken
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from django.shortcuts import get_object_or_404
+from django.db import NotSupportedError
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from .export import csv_stream, gzip_stream, ndjson_stream
+from .conditional import add_validators, list_validators, make_etag, not_modified
+from .form_schema import compile_form_schema, get_form_schema
+from .pagination import keyset_page, parse_datetime_param, parse_page_size, split_page
+from .validation import get_submission_validator
+from .user_import import parse_user_rows
+from .uploads import append_chunk, completed_sessions, finalize_upload, open_session_files
 from django.views.decorators.csrf import csrf_exempt
 
 
@@ -30,7 +42,7 @@ def login_api(request):
         user = serializer.validated_data.get('user', None)
         if user is None:
             raise AuthenticationFailed('Email does not exist')
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         return Response({
             'user': {
                 'username': user.username,
@@ -45,7 +57,7 @@ def login_api(request):
 @permission_classes([IsAuthenticated])
 def count_users(request):
     try:
-        forms_count = User.objects.count()
+        forms_count = counters.get_count("users")
         return Response(
             {"count": forms_count}, 
             status=status.HTTP_200_OK
@@ -63,15 +75,29 @@ def forms_list_create_api(request):
         serializer = FormSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             # Remove created_by parameter since it's handled in the serializer
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            form = serializer.save()
+            # Compile the tree once (prefetched) and answer with the compiled document
+            schema = compile_form_schema(form.pk)
+            return Response(schema["form"], status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def bulk_import_forms(request):
+    """Create many forms from an array of form definitions in one transaction"""
+    if not isinstance(request.data, list):
+        return Response({"detail": "Expected a list of form definitions."}, status=status.HTTP_400_BAD_REQUEST)
+    serializer = FormImportSerializer(data=request.data, many=True, context={'request': request})
+    if serializer.is_valid():
+        forms = serializer.save()
+        return Response(SimpleFormSerializer(forms, many=True).data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def count_forms(request):
     try:
-        forms_count = Form.objects.count()
+        forms_count = counters.get_count("forms")
         return Response(
             {"count": forms_count}, 
             status=status.HTTP_200_OK
@@ -85,17 +111,26 @@ def count_forms(request):
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def form_detail_api(request, id):
-    form = get_object_or_404(Form, id=id)
-
     if request.method == 'GET':
-        serializer = FormSerializer(form)
-        return Response(serializer.data)
+        # every change to the form or its tree bumps schema_version and updated_at
+        row = Form.objects.filter(pk=id).values_list("schema_version", "updated_at").first()
+        if row is None:
+            raise Http404
+        version, updated_at = row
+        etag = make_etag("form", id, version)
+        response = not_modified(request, etag, updated_at)
+        if response is None:
+            # Served from the compiled schema instead of walking the tree
+            response = add_validators(Response(get_form_schema(id, version)), etag, updated_at)
+        return response
+
+    form = get_object_or_404(Form, id=id)
 
-    elif request.method == 'PUT':
+    if request.method == 'PUT':
         serializer = FormSerializer(form, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
             serializer.save()
-            return Response(serializer.data)
+            return Response(compile_form_schema(form.pk)["form"])
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == 'DELETE':
@@ -107,52 +142,205 @@ def form_detail_api(request, id):
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
 def submit_form_api(request, id):
-    form = get_object_or_404(Form, id=id)
-    raw_data = request.data.copy()
-    formatted_data = {}
-    file_obj = None
-
-    for key, value in raw_data.items():
-        # ✅ Detect file uploads
-        if hasattr(value, "size"):
-            file_obj = value  # store file
-            formatted_data[key] = value.name  # keep filename in JSON if needed
-        else:
-            formatted_data[key] = value
-
-    serializer = SubmissionSerializer(
-        data={
-            "form": form.id,
-            "data": formatted_data,
-            "file_upload": file_obj,
-        },
-        context={"request": request},
-    )
+    form = get_object_or_404(Form.objects.defer("schema"), id=id)
+    validator = get_submission_validator(form)
+    # finished resumable uploads, referenced by session id
+    sessions = completed_sessions(request.user, request.data.getlist("uploads"))
+    field_names = {field_id: name for name, field_id in validator.file_fields.items()}
+    session_names = {}
+    for session in sessions:
+        if session.field_id in field_names:
+            session_names.setdefault(field_names[session.field_id], []).append(session.filename)
 
-    if serializer.is_valid():
-        submission = serializer.save()
-        return Response(
-            {
-                "message": "✅ Form submitted successfully",
-                "submission_id": submission.id,
-                "data": serializer.data,  # ✅ includes full file URL now
+    formatted_data, errors = validator.clean(request.data, session_names)
+    if errors:
+        return Response({"data": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    # ✅ Every uploaded file becomes an attachment; the validator kept the filenames in JSON
+    attachments = [
+        (validator.file_fields.get(key), upload)
+        for key, uploads in request.FILES.lists()
+        for upload in uploads
+    ]
+    session_files = open_session_files(sessions)
+    attachments += [
+        (session.field_id if session.field_id in field_names else None, session_file)
+        for session, session_file in zip(sessions, session_files)
+    ]
+
+    try:
+        serializer = SubmissionSerializer(
+            data={
+                "form": form.id,
+                "data": formatted_data,
             },
-            status=status.HTTP_201_CREATED,
+            context={"request": request},
         )
 
-    print(serializer.errors)
+        if serializer.is_valid():
+            submission = serializer.save(attachments=attachments)
+            return Response(
+                {
+                    "message": "✅ Form submitted successfully",
+                    "submission_id": submission.id,
+                    "data": serializer.data,  # ✅ includes full file URL now
+                },
+                status=status.HTTP_201_CREATED,
+            )
+
+        print(serializer.errors)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    finally:
+        for session_file in session_files:
+            session_file.close()
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def create_upload(request):
+    """Start a resumable upload: declare the filename and total size, then PUT chunks"""
+    serializer = UploadSessionSerializer(data=request.data, context={"request": request})
+    if serializer.is_valid():
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-@api_view(['GET'])
+@api_view(["GET"])
 @permission_classes([IsAuthenticated])
-def submissions_api(request):
+def upload_status(request, upload_id):
+    """Where to resume: `received` is the next offset and `chunks` the next chunk number"""
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    return Response(UploadSessionSerializer(session).data)
+
+@api_view(["PUT"])
+@permission_classes([IsAuthenticated])
+def upload_chunk(request, upload_id, number):
+    """Append the raw request body as chunk `number`, starting at the Upload-Offset header"""
+    try:
+        offset = int(request.headers.get("Upload-Offset", request.query_params.get("offset", "")))
+    except ValueError:
+        return Response({"detail": "Upload-Offset header is required."}, status=status.HTTP_400_BAD_REQUEST)
+    session = append_chunk(upload_id, request.user, number, offset, request.stream or io.BytesIO())
+    return Response(UploadSessionSerializer(session).data)
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def finalize_upload_api(request, upload_id):
+    session = finalize_upload(upload_id, request.user)
+    return Response(UploadSessionSerializer(session).data)
+
+def _int_param(request, name):
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: ["Must be an integer."]})
+
+
+def filtered_submissions(request):
+    """
+    Submissions visible to the user, narrowed by the form, status, submitted_by,
+    created_after and created_before query parameters.
+    """
     user = request.user
     if user.is_superuser and user.is_staff:
-        submissions = Submission.objects.all().order_by('-created_at')
+        submissions = Submission.objects.all()
+        submitted_by = _int_param(request, "submitted_by")
+        if submitted_by is not None:
+            submissions = submissions.filter(submitted_by_id=submitted_by)
     else:
-        submissions = Submission.objects.filter(submitted_by=user).order_by('-created_at')
+        submissions = Submission.objects.filter(submitted_by=user)
+
+    form_id = _int_param(request, "form")
+    if form_id is not None:
+        submissions = submissions.filter(form_id=form_id)
+    if request.query_params.get("status"):
+        submissions = submissions.filter(status=request.query_params["status"])
+    created_after = parse_datetime_param(request, "created_after")
+    if created_after:
+        submissions = submissions.filter(created_at__gte=created_after)
+    created_before = parse_datetime_param(request, "created_before", end_of_day=True)
+    if created_before:
+        submissions = submissions.filter(created_at__lte=created_before)
+    return submissions
+
+
+def submissions_page(request, submissions, next_cursor):
     serializer = SubmissionSerializer(submissions, many=True, context={"request": request})
-    return Response(serializer.data)
+    next_url = None
+    if next_cursor:
+        params = request.query_params.copy()
+        params["cursor"] = next_cursor
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return {"next": next_url, "next_cursor": next_cursor, "results": serializer.data}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def submissions_api(request):
+    page, page_size = keyset_page(filtered_submissions(request), request)
+    # validators cover just this page, so revalidating stays one index range scan
+    etag, last_modified = list_validators(page, response_cache.user_scope(request.user))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    rows, next_cursor = split_page(list(page.prefetch_related("attachments")), page_size)
+    return add_validators(Response(submissions_page(request, rows, next_cursor)), etag, last_modified)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_submissions(request):
+    """
+    Submissions whose answers, file names or submitter match every part of
+    ?q=, each as a phrase and the last one as a prefix, best match first,
+    paged with next_cursor. Accepts the same filters as submissions_api.
+    """
+    phrases = search.phrases(request.query_params.get("q", ""))
+    if not phrases:
+        return Response({"q": ["Enter something to search for."]}, status=status.HTTP_400_BAD_REQUEST)
+    page_size = parse_page_size(request)
+    cursor = request.query_params.get("cursor")
+    after = search.decode_cursor(cursor) if cursor else None
+    try:
+        matches = search.search(phrases, filtered_submissions(request), page_size + 1, after)
+    except NotSupportedError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+    next_cursor = None
+    if len(matches) > page_size:
+        matches = matches[:page_size]
+        next_cursor = search.encode_cursor(*reversed(matches[-1]))
+    found = Submission.objects.prefetch_related("attachments").in_bulk([pk for pk, _ in matches])
+    rows = [found[pk] for pk, _ in matches if pk in found]
+    return Response(submissions_page(request, rows, next_cursor))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def export_submissions(request, id):
+    """
+    Stream a form's submissions as CSV (default) or NDJSON (?type=ndjson),
+    optionally gzipped (?gzip=1). Accepts the same filters as submissions_api.
+    """
+    form = get_object_or_404(Form, id=id)
+    submissions = filtered_submissions(request).filter(form=form)
+    export_type = request.query_params.get("type", "csv")
+    if export_type == "csv":
+        chunks, content_type = csv_stream(form, submissions), "text/csv"
+    elif export_type == "ndjson":
+        chunks, content_type = ndjson_stream(form, submissions), "application/x-ndjson"
+    else:
+        return Response({"type": ["Must be 'csv' or 'ndjson'."]}, status=status.HTTP_400_BAD_REQUEST)
+
+    filename = f"{form.slug}-submissions.{export_type}"
+    if request.query_params.get("gzip") in ("1", "true"):
+        chunks, content_type, filename = gzip_stream(chunks), "application/gzip", f"{filename}.gz"
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 
 @api_view(['GET'])
@@ -161,9 +349,9 @@ def count_submissions(request):
     user = request.user
     try:
         if user.is_superuser and user.is_staff:
-            submissions_count = Submission.objects.count()
+            submissions_count = counters.get_count("submissions")
         else:
-            submissions_count = Submission.objects.filter(submitted_by=user).count()
+            submissions_count = counters.get_count("submissions", Counter.SCOPE_SUBMITTER, user.pk)
 
         return Response({"count": submissions_count}, status=status.HTTP_200_OK)
     except Exception as e:
@@ -183,6 +371,34 @@ def roles_list(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+@parser_classes([JSONParser, MultiPartParser, FormParser])
+def bulk_import_users(request):
+    """
+    Create up to USER_IMPORT_MAX_ROWS users from a JSON array or an uploaded
+    CSV/JSON file (`file`); bigger imports go through `manage.py import_users`
+    """
+    upload = request.FILES.get("file")
+    try:
+        rows = parse_user_rows(upload, upload.name) if upload else request.data
+    except (ValueError, UnicodeDecodeError) as e:
+        return Response({"file": [f"Could not read file: {e}"]}, status=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(rows, list):
+        return Response({"detail": "Expected a list of users."}, status=status.HTTP_400_BAD_REQUEST)
+    max_rows = getattr(settings, "USER_IMPORT_MAX_ROWS", 100)
+    if len(rows) > max_rows:
+        return Response(
+            {"detail": f"At most {max_rows} users per request; import larger files with `manage.py import_users`."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    # no process pool inside a web worker: hash in this process
+    serializer = UserImportSerializer(data=rows, many=True, context={"workers": 1})
+    if serializer.is_valid():
+        users = serializer.save()
+        return Response({"created": len(users)}, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def users_list(request):
@@ -194,8 +410,18 @@ def users_list(request):
 @permission_classes([IsAuthenticated])
 def available_forms(request):
     forms = Form.objects.filter(is_active=True)
-    serializer = SimpleFormSerializer(forms, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    # the same list for everyone, so a single entry
+    etag, last_modified = response_cache.cached(
+        "available_forms.validators", "all",
+        lambda: list_validators(forms, response_cache.generation()),
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    data = response_cache.cached(
+        "available_forms", "all", lambda: SimpleFormSerializer(forms, many=True).data,
+    )
+    return add_validators(Response(data, status=status.HTTP_200_OK), etag, last_modified)
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -206,23 +432,56 @@ def assign_form(request):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def bulk_assign_forms(request):
+    """Assign many forms to groups and users in one transaction"""
+    serializer = FormBulkAssignmentSerializer(data=request.data, context={"request": request})
+    if serializer.is_valid():
+        summary = serializer.save()
+        return Response(summary, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+def user_forms_queryset(user):
+    forms = Form.objects.with_tree().order_by('-created_at')
+    if user.is_superuser and user.is_staff:
+        return forms
+    return forms.assigned_to(user)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_forms(request):
-    user = request.user
-    if user.is_superuser and user.is_staff:
-        forms = Form.objects.all().order_by('-created_at')
-    else:
-        forms = Form.objects.filter(assignments__users=user).distinct().order_by('-created_at')
-    serializer = FormSerializer(forms, many=True)
-    return Response(serializer.data)
+    forms = user_forms_queryset(request.user)
+    scope = response_cache.user_scope(request.user)
+    # the generation changes with assignments, which the forms' own rows don't show
+    etag, last_modified = response_cache.cached(
+        "user_forms.validators", scope,
+        lambda: list_validators(forms, response_cache.generation(), scope),
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    data = response_cache.cached("user_forms", scope, lambda: FormSerializer(forms, many=True).data)
+    return add_validators(Response(data), etag, last_modified)
 
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def mydataapi(request):
-    user = request.user
-    data = {
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def response_cache_stats(request):
+    """Hit and miss counts of the response cache in the worker that answers"""
+    return Response(response_cache.stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def metrics_api(request):
+    """Per-view request metrics of the worker that answers, for Prometheus"""
+    return HttpResponse(metrics.registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _profile_data(user):
+    return {
         "id": user.id,
         "username": user.username,
         "first_name": user.first_name,
@@ -230,7 +489,35 @@ def mydataapi(request):
         "email": user.email,
         "is_superuser": user.is_superuser,
         "is_staff": user.is_staff,}
-    return Response(data)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def mydataapi(request):
+    return Response(_profile_data(request.user))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    """
+    Profile plus the header counters in one response, replacing /me/ and the
+    count-* calls. All counters are read from the Counter table in one query;
+    submissions are scoped like count_submissions, and users/forms are only
+    included for admins.
+    """
+    user = request.user
+    if user.is_superuser and user.is_staff:
+        keys = {
+            "users": ("users", Counter.SCOPE_GLOBAL, 0),
+            "forms": ("forms", Counter.SCOPE_GLOBAL, 0),
+            "submissions": ("submissions", Counter.SCOPE_GLOBAL, 0),
+        }
+    else:
+        keys = {"submissions": ("submissions", Counter.SCOPE_SUBMITTER, user.pk)}
+
+    counts = dict(zip(keys, counters.get_counts(*keys.values())))
+    return Response({"user": _profile_data(user), "counts": counts})
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated, IsAdminUser])
@@ -2,6 +2,11 @@
 ASGI config for onboarding project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are routed through settings.ASGI_URLCONF, so the read-heavy API
+endpoints are served by their async views (api.async_views).
+
+Serve it with `python manage.py runasgi` (uvicorn), or any ASGI server:
+    uvicorn onboarding.asgi:application --workers 4
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +14,20 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'onboarding.settings')
 
-application = get_asgi_application()
+
+class OnboardingASGIHandler(ASGIHandler):
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = settings.ASGI_URLCONF
+        return request, error_response
+
+
+django.setup(set_prefix=False)
+application = OnboardingASGIHandler()
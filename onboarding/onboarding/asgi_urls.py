@@ -0,0 +1,14 @@
+"""
+URL configuration used under ASGI (settings.ASGI_URLCONF).
+
+Same as onboarding.urls, with the async versions of the read-heavy API
+views matched first; everything else falls through to the sync views.
+"""
+from django.urls import include, path
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('onboarding/', include('api.async_urls')),
+    *sync_urlpatterns,
+]
@@ -46,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its latency covers every other middleware (see /metrics/)
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -58,6 +60,8 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'onboarding.urls'
+# used by onboarding.asgi: serves the async versions of the read-heavy API views
+ASGI_URLCONF = 'onboarding.asgi_urls'
 
 TEMPLATES = [
     {
@@ -115,10 +119,13 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ],
 }
 
+# Authenticated users are cached in-process for this long (see api.authentication)
+AUTH_USER_CACHE_SECONDS = 60
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -166,3 +173,47 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+
+# Outgoing mail is queued in api.EmailOutbox and delivered by
+# `python manage.py process_email_outbox --loop`
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 60
+# Group members turned into outbox rows per transaction (see api.EmailFanout)
+EMAIL_FANOUT_BATCH_SIZE = 500
+
+# Compiled form schemas kept in-process, keyed by (form_id, schema_version)
+FORM_SCHEMA_CACHE_SIZE = 256
+
+# Uploads always stream to a temp file under MEDIA_ROOT in chunks (never into
+# memory), so storing them is a rename on the same filesystem
+FILE_UPLOAD_HANDLERS = ["api.uploads.StreamingUploadHandler"]
+FILE_UPLOAD_TEMP_DIR = os.path.join(MEDIA_ROOT, 'tmp')
+
+# Resumable uploads (api.UploadSession): bytes per PUT chunk and per file,
+# how long a chunk may take before another request can take it over, and how
+# long unfinished sessions live before `purge_upload_sessions` drops them
+UPLOAD_CHUNK_MAX_BYTES = 8 * 1024 * 1024
+UPLOAD_CHUNK_CLAIM_SECONDS = 600
+UPLOAD_SESSION_MAX_BYTES = 500 * 1024 * 1024
+UPLOAD_SESSION_MAX_AGE_HOURS = 24
+
+# Bulk user import: password hashing processes (default: one per CPU) and insert batch size.
+# POST /users/bulk-import/ hashes in the request's own process and takes at most
+# USER_IMPORT_MAX_ROWS rows; larger files go through `manage.py import_users`
+USER_IMPORT_WORKERS = None
+USER_IMPORT_BATCH_SIZE = 500
+USER_IMPORT_MAX_ROWS = 100
+
+# Cached response data for available_forms / user_forms (api.response_cache).
+# Point CACHES at a shared backend (Redis, Memcached) so invalidations reach
+# every worker; the in-process default only invalidates the worker that saw the change.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+RESPONSE_CACHE_SECONDS = 300
+
+# Upper bounds (seconds) of the request latency histogram at /metrics/
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
@@ -19,9 +19,12 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path,include
 
+from api.views import metrics_api
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('onboarding/', include('api.urls'))
+    path('onboarding/', include('api.urls')),
+    path('metrics/', metrics_api, name='metrics'),
 ]
 if settings.DEBUG:  # ✅ only serve media files in development
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)